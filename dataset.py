@@ -1,51 +1,76 @@
-import torch
+import os
+import sys
 import time
+import argparse
+import numpy as np
 import pandas as pd
 from sklearn.cluster import KMeans
 from sklearn.metrics import normalized_mutual_info_score, adjusted_rand_score
 
-from torch_geometric.datasets import Reddit
-from torch_geometric.transforms import NormalizeFeatures
-from torch_geometric.utils import subgraph
-
-# Carregar e normalizar o dataset Reddit
-dataset = Reddit(root='data/Reddit', transform=NormalizeFeatures())
-data = dataset[0]
-
-# Parâmetros
-n_amostra = 2000  # número de nós na amostra
-subset_mask = torch.arange(n_amostra)
-
-# Subgrafo
-sub_edge_index, _ = subgraph(subset_mask, data.edge_index, relabel_nodes=True)
-sub_x = data.x[subset_mask]
-sub_y = data.y[subset_mask]
-
-# Número de clusters baseado nos rótulos únicos da amostra
-k = len(torch.unique(sub_y))
-
-# Clusterização com KMeans
-start = time.perf_counter()
-kmeans = KMeans(n_clusters=k, random_state=0)
-predicted_clusters = kmeans.fit_predict(sub_x.numpy())
-end = time.perf_counter()
-tempo_ms = (end - start) * 1000
-
-# Avaliação com NMI e ARI
-nmi = normalized_mutual_info_score(sub_y.numpy(), predicted_clusters)
-ari = adjusted_rand_score(sub_y.numpy(), predicted_clusters)
-
-# Criar tabela de resultados
-tabela = pd.DataFrame([{
-    'Instância': 'Reddit-2k',
-    'Num Nós': n_amostra,
-    'Solução Referência (NMI)': "1.00 (rótulo)",
-    'Solução Gulosa (NMI)': f"{nmi:.4f}",
-    'Solução Gulosa (ARI)': f"{ari:.4f}",
-    'Tempo (ms)': f"{tempo_ms:.2f}"
-}])
-
-# Exibir tabela
-print(tabela)
-tabela.to_csv("resultado_clusterizacao.csv", index=False)
+base_dir = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
 
+from real.reddit import carregar_amostra, SELECOES, raw_dir
+
+
+def nome_instancia(n):
+    return f"Reddit-{n // 1000}k" if n % 1000 == 0 else f"Reddit-{n}"
+
+
+def avaliar(n, seed, selecao='estratificada', entrada_dir=raw_dir):
+    """
+    Amostra `n` nós do Reddit (features normalizadas só na amostra), roda
+    KMeans com k = nº de rótulos da amostra e compara com os rótulos.
+    """
+    t0 = time.perf_counter()
+    X, y, _ = carregar_amostra(n, selecao, seed, entrada_dir=entrada_dir)
+    tempo_carga_ms = (time.perf_counter() - t0) * 1000
+
+    # Número de clusters baseado nos rótulos únicos da amostra
+    k = len(np.unique(y))
+
+    # Clusterização com KMeans
+    start = time.perf_counter()
+    kmeans = KMeans(n_clusters=k, random_state=seed)
+    predicted_clusters = kmeans.fit_predict(X)
+    tempo_ms = (time.perf_counter() - start) * 1000
+
+    # Avaliação com NMI e ARI
+    nmi = normalized_mutual_info_score(y, predicted_clusters)
+    ari = adjusted_rand_score(y, predicted_clusters)
+    return {
+        'Instância': nome_instancia(len(y)),
+        'Num Nós': len(y),
+        'Seed': seed,
+        'Solução Referência (NMI)': "1.00 (rótulo)",
+        'Solução Gulosa (NMI)': f"{nmi:.4f}",
+        'Solução Gulosa (ARI)': f"{ari:.4f}",
+        'Tempo (ms)': f"{tempo_ms:.2f}",
+        'Carga (ms)': f"{tempo_carga_ms:.2f}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KMeans sobre amostras do Reddit: NMI/ARI/tempo por tamanho e seed")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[2000])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--selecao", choices=SELECOES, default="estratificada")
+    parser.add_argument("--entrada", default=raw_dir, help="Pasta com reddit_data.npz")
+    parser.add_argument("--saida", default="resultado_clusterizacao.csv")
+    args = parser.parse_args()
+
+    # Uma linha por configuração (tamanho × seed)
+    linhas = []
+    for n in args.tamanhos:
+        for seed in args.seeds:
+            linhas.append(avaliar(n, seed, args.selecao, args.entrada))
+            print(f"[dataset] {nome_instancia(n)} seed {seed}: NMI {linhas[-1]['Solução Gulosa (NMI)']}")
+
+    # Exibir tabela
+    tabela = pd.DataFrame(linhas)
+    print(tabela.to_string(index=False))
+    tabela.to_csv(args.saida, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Comparação em lote das partições geradas (NMI, ARI e variação de informação).
+
+Todos os `*_labels.npy` sob data/cluster/ (e, opcionalmente, um vetor de
+rótulos de referência) são codificados uma vez como inteiros 0..k-1, com
+as contagens por cluster. Cada par de partições com o mesmo número de nós
+gera uma tabela de contingência esparsa (só as células não nulas: bincount
+quando ka·kb é pequeno, senão sort + máscara sobre a·kb + b), da qual saem
+as três medidas de uma vez. Os pares são divididos entre processos, com os
+códigos em memória compartilhada (graph/memoria_compartilhada.py).
+
+NMI usa a média aritmética das entropias (padrão do sklearn); VI é
+H(A) + H(B) - 2·I(A; B), em nats.
+"""
+import os
+import sys
+import csv
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+SRC_DIR = os.path.abspath(os.path.dirname(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from graph.memoria_compartilhada import compartilhar_arrays, anexar_arrays, liberar
+from perfil import etapa
+
+base_dir = os.path.abspath(os.path.join(SRC_DIR, '..'))
+cluster_root = os.path.join(base_dir, 'data', 'cluster')
+saida_dir = os.path.join(base_dir, 'data', 'avaliacao')
+
+MEDIDAS = ('nmi', 'ari', 'vi')
+NOME_REFERENCIA = 'referencia'
+# Pares por tarefa do pool
+PARES_POR_TAREFA = 64
+
+# Códigos compartilhados, anexados uma vez por worker (ver _iniciar_worker)
+_BLOCOS = None
+_CODIGOS = None
+
+
+# =====================================================
+# Partições
+# =====================================================
+def descobrir_rotulos(raiz=cluster_root):
+    """{nome: caminho} de todos os *_labels.npy sob `raiz` (nome = caminho relativo sem o sufixo)."""
+    arquivos = {}
+    for caminho in sorted(glob.glob(os.path.join(raiz, '**', '*_labels.npy'), recursive=True)):
+        nome = os.path.relpath(caminho, raiz)[:-len('_labels.npy')].replace(os.sep, '/')
+        arquivos[nome] = caminho
+    return arquivos
+
+
+def codificar(labels):
+    """(códigos 0..k-1, contagens por código) de um vetor de rótulos."""
+    _, codigos, contagens = np.unique(np.asarray(labels).ravel(), return_inverse=True, return_counts=True)
+    return codigos.astype(np.int64), contagens.astype(np.int64)
+
+
+class Particoes:
+    """Códigos e contagens de várias partições, concatenados (uma cópia para compartilhar)."""
+
+    def __init__(self, nomes, codigos, contagens):
+        self.nomes = list(nomes)
+        self.n = np.array([len(c) for c in codigos], dtype=np.int64)
+        self.k = np.array([len(c) for c in contagens], dtype=np.int64)
+        self.ini_cod = np.r_[0, np.cumsum(self.n)]
+        self.ini_cont = np.r_[0, np.cumsum(self.k)]
+        self.codigos = np.concatenate(codigos) if codigos else np.empty(0, dtype=np.int64)
+        self.contagens = np.concatenate(contagens) if contagens else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def carregar(cls, arquivos, referencia=None):
+        """`arquivos`: {nome: caminho .npy}; `referencia`: rótulos verdadeiros (array ou caminho)."""
+        nomes, codigos, contagens = [], [], []
+        itens = list(arquivos.items())
+        if referencia is not None:
+            itens.insert(0, (NOME_REFERENCIA, referencia))
+        for nome, origem in itens:
+            labels = np.load(origem) if isinstance(origem, str) else origem
+            c, cont = codificar(labels)
+            nomes.append(nome)
+            codigos.append(c)
+            contagens.append(cont)
+        return cls(nomes, codigos, contagens)
+
+    def arrays(self):
+        return dict(codigos=self.codigos, contagens=self.contagens, n=self.n, k=self.k,
+                    ini_cod=self.ini_cod, ini_cont=self.ini_cont)
+
+    def pares(self):
+        """Pares (a, b), a < b, de partições com o mesmo número de nós."""
+        return [(a, b) for a in range(len(self.nomes)) for b in range(a + 1, len(self.nomes))
+                if self.n[a] == self.n[b]]
+
+
+# =====================================================
+# Medidas
+# =====================================================
+def contingencia(a, b, ka, kb):
+    """Contagens não nulas n_ij da tabela de contingência entre os códigos `a` e `b`."""
+    if ka * kb <= 4 * len(a):
+        nij = np.bincount(a * kb + b, minlength=ka * kb)
+        return nij[nij > 0]
+    chaves = np.sort(a * kb + b)
+    corte = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+    return np.diff(np.r_[corte, len(chaves)])
+
+
+def _entropia(contagens, n):
+    p = contagens[contagens > 0] / n
+    return float(-(p * np.log(p)).sum())
+
+
+def _pares_em(contagens):
+    c = contagens.astype(np.float64)
+    return float((c * (c - 1)).sum() / 2)
+
+
+def medidas(nij, ca, cb, n):
+    """(nmi, ari, vi) a partir das células não nulas e das contagens marginais."""
+    ha, hb = _entropia(ca, n), _entropia(cb, n)
+    nij = nij.astype(np.float64)
+    ca_ = ca.astype(np.float64)
+    cb_ = cb.astype(np.float64)
+    # I(A;B) = Σ n_ij/n · log(n·n_ij / (a_i·b_j)) = Σ n_ij/n · log(n_ij/n) + H(A) + H(B)
+    mi = max(float((nij / n * np.log(nij / n)).sum()) + ha + hb, 0.0)
+    if (len(ca_) == len(cb_) == 1) or (ha == hb == 0):
+        nmi = 1.0
+    else:
+        nmi = mi / ((ha + hb) / 2) if ha + hb > 0 else 0.0
+
+    soma_ij, soma_a, soma_b = _pares_em(nij), _pares_em(ca_), _pares_em(cb_)
+    total = n * (n - 1) / 2
+    esperado = soma_a * soma_b / total if total else 0.0
+    maximo = (soma_a + soma_b) / 2
+    ari = 1.0 if maximo == esperado else (soma_ij - esperado) / (maximo - esperado)
+    return min(nmi, 1.0), ari, max(ha + hb - 2 * mi, 0.0)
+
+
+def comparar(labels_a, labels_b):
+    """NMI, ARI e VI entre dois vetores de rótulos (fora do lote)."""
+    a, ca = codificar(labels_a)
+    b, cb = codificar(labels_b)
+    return medidas(contingencia(a, b, len(ca), len(cb)), ca, cb, len(a))
+
+
+def _comparar_pares(arr, pares):
+    resultado = []
+    for x, y in pares:
+        a = arr['codigos'][arr['ini_cod'][x]:arr['ini_cod'][x + 1]]
+        b = arr['codigos'][arr['ini_cod'][y]:arr['ini_cod'][y + 1]]
+        ca = arr['contagens'][arr['ini_cont'][x]:arr['ini_cont'][x + 1]]
+        cb = arr['contagens'][arr['ini_cont'][y]:arr['ini_cont'][y + 1]]
+        nij = contingencia(a, b, int(arr['k'][x]), int(arr['k'][y]))
+        resultado.append((x, y) + medidas(nij, ca, cb, int(arr['n'][x])))
+    return resultado
+
+
+def _iniciar_worker(descritor):
+    global _BLOCOS, _CODIGOS
+    _BLOCOS, _CODIGOS = anexar_arrays(descritor)
+
+
+def _tarefa(pares):
+    return _comparar_pares(_CODIGOS, pares)
+
+
+def matriz_comparacoes(particoes, workers=None):
+    """
+    Matrizes (P × P) de NMI, ARI e VI entre todas as partições; pares com
+    número de nós diferente ficam NaN. Retorna {medida: matriz}.
+    """
+    P = len(particoes.nomes)
+    matrizes = {m: np.full((P, P), np.nan) for m in MEDIDAS}
+    for x in range(P):
+        matrizes['nmi'][x, x] = matrizes['ari'][x, x] = 1.0
+        matrizes['vi'][x, x] = 0.0
+    pares = particoes.pares()
+    lotes = [pares[i:i + PARES_POR_TAREFA] for i in range(0, len(pares), PARES_POR_TAREFA)]
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or len(lotes) <= 1:
+        resultados = [_comparar_pares(particoes.arrays(), lote) for lote in lotes]
+    else:
+        blocos, descritor = compartilhar_arrays(**particoes.arrays())
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(lotes)), initializer=_iniciar_worker,
+                                     initargs=(descritor,)) as pool:
+                resultados = list(pool.map(_tarefa, lotes))
+        finally:
+            liberar(blocos, remover=True)
+
+    for lote in resultados:
+        for x, y, *valores in lote:
+            for m, v in zip(MEDIDAS, valores):
+                matrizes[m][x, y] = matrizes[m][y, x] = v
+    return matrizes
+
+
+# =====================================================
+# Saída
+# =====================================================
+def salvar_resultados(particoes, matrizes, pasta=saida_dir):
+    """Uma matriz CSV por medida e a lista de pares em comparacoes.csv."""
+    os.makedirs(pasta, exist_ok=True)
+    for m, M in matrizes.items():
+        with open(os.path.join(pasta, f'{m}.csv'), 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.writer(f)
+            escritor.writerow([''] + particoes.nomes)
+            for nome, linha in zip(particoes.nomes, M):
+                escritor.writerow([nome] + [f'{v:.6f}' if np.isfinite(v) else '' for v in linha])
+    with open(os.path.join(pasta, 'comparacoes.csv'), 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['a', 'b', 'nos', 'k_a', 'k_b'] + list(MEDIDAS))
+        for x, y in particoes.pares():
+            escritor.writerow([particoes.nomes[x], particoes.nomes[y], particoes.n[x],
+                               particoes.k[x], particoes.k[y]]
+                              + [f'{matrizes[m][x, y]:.6f}' for m in MEDIDAS])
+    return pasta
+
+
+def tabela_markdown(particoes, matrizes, referencia=NOME_REFERENCIA):
+    """Uma linha por partição; contra a referência, se houver, senão a média contra as demais."""
+    linhas = ["| Partição                     |     Nós | #Clusters |    NMI |    ARI |     VI |",
+              "|------------------------------|---------|-----------|--------|--------|--------|"]
+    ref = particoes.nomes.index(referencia) if referencia in particoes.nomes else None
+    for x, nome in enumerate(particoes.nomes):
+        if ref is not None:
+            valores = [matrizes[m][x, ref] for m in MEDIDAS]
+        else:
+            outros = [y for y in range(len(particoes.nomes)) if y != x]
+            valores = [np.nanmean(matrizes[m][x, outros]) if outros and np.isfinite(matrizes[m][x, outros]).any()
+                       else np.nan for m in MEDIDAS]
+        texto = ' | '.join(f'{v:6.3f}' if np.isfinite(v) else '     -' for v in valores)
+        linhas.append(f"| {nome:<28} | {particoes.n[x]:>7} | {particoes.k[x]:>9} | {texto} |")
+    return '\n'.join(linhas)
+
+
+def avaliar(raiz=cluster_root, referencia=None, workers=None, pasta=saida_dir):
+    """Carrega as partições, compara todos os pares e grava em `pasta`. Retorna (particoes, matrizes)."""
+    with etapa("avaliacao:carregar") as itens:
+        arquivos = descobrir_rotulos(raiz)
+        particoes = Particoes.carregar(arquivos, referencia)
+        itens.update(particoes=len(particoes.nomes))
+    if not particoes.nomes:
+        raise SystemExit(f"[avaliacao] nenhum *_labels.npy em {raiz}")
+    with etapa("avaliacao:comparar", particoes=len(particoes.nomes)) as itens:
+        matrizes = matriz_comparacoes(particoes, workers=workers)
+        itens["pares"] = len(particoes.pares())
+    salvar_resultados(particoes, matrizes, pasta)
+    return particoes, matrizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NMI/ARI/VI entre todas as partições de data/cluster')
+    parser.add_argument('--raiz', default=cluster_root, help='Pasta varrida atrás de *_labels.npy')
+    parser.add_argument('--referencia', default=None, help='.npy com os rótulos verdadeiros (opcional)')
+    parser.add_argument('--workers', type=int, default=None, help='Processos do pool (padrão: todos os núcleos)')
+    parser.add_argument('--saida', default=saida_dir)
+    args = parser.parse_args()
+
+    particoes, matrizes = avaliar(args.raiz, args.referencia, args.workers, args.saida)
+    print(tabela_markdown(particoes, matrizes))
+    print(f"[avaliacao] {len(particoes.pares())} pares -> {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
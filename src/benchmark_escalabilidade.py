@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalabilidade do pipeline.
+
+Para cada instância (config.NUM_ROBOS/TAMANHO_AREA e tamanhos extras
+passados na linha de comando) mede, separadamente, cada etapa:
+geração, grafo ε-ball, baselines, guloso FO1 e coocorrência. O grafo
+ε-ball é medido com o ajuste de raio real do construtor (varredura e
+exato) e, à parte, só a montagem a raio fixo ('epsilon_fixo').
+Registra tempo de parede, tempo de CPU (do processo e dos filhos, p.ex.
+pools de workers) e pico de memória em JSON e compara com um baseline
+salvo para sinalizar regressões.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import statistics
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from config import NUM_ROBOS, TAMANHO_AREA, SEED, RAIO_COMUNICACAO
+
+# Acima destes tamanhos a etapa é pulada (memória quadrática em n)
+LIMITE_N = {
+    'aglomerativo': 30000,
+}
+
+
+# =====================================================
+# Etapas: cada uma recebe o contexto da instância e pode deixar resultados
+# nele para as etapas seguintes. Devolve o número de itens processados.
+# =====================================================
+def etapa_geracao(ctx):
+    from generate.gerar_dados import gerar_estados
+    ctx['estados'], _ = gerar_estados(ctx['seed'], ctx['n'], ctx['lado'])
+    return {'robos': ctx['n'], 'celulas': ctx['lado'] ** 2}
+
+
+def etapa_epsilon_fixo(ctx):
+    """Só pares a raio fixo + CSR (sem o ajuste de ε do construtor)."""
+    from scipy.spatial import KDTree
+    from graph.grafo_csr import pares_epsilon, montar_csr, numero_componentes
+    pos = ctx['estados'][:, :2]
+    i, j, d = pares_epsilon(KDTree(pos), pos, ctx['raio'])
+    ctx['A'] = montar_csr(ctx['n'], i, j, d)
+    ctx['componentes'] = numero_componentes(ctx['A'])
+    return {'nos': ctx['n'], 'arestas': len(i)}
+
+
+def _etapa_ajuste(ctx, modo):
+    from graph.construir_grafo import ajustar_raio
+    itens = {}
+    ctx['A'], _, ctx['raio_final'], ctx['componentes'], _ = ajustar_raio(
+        ctx['estados'][:, :2], ctx['raio'], modo=modo, itens=itens)
+    return {'nos': ctx['n'], 'arestas': itens['arestas'], 'iteracoes': itens['iteracoes'],
+            'raio_final': float(ctx['raio_final'])}
+
+
+def etapa_epsilon_exato(ctx):
+    """Ajuste de ε do construtor no modo "exato" (aresta gargalo até raio_max)."""
+    return _etapa_ajuste(ctx, 'exato')
+
+
+def etapa_epsilon(ctx):
+    """Ajuste de ε do construtor no modo padrão (varredura até conectar)."""
+    return _etapa_ajuste(ctx, 'varredura')
+
+
+def etapa_kmeans(ctx):
+    from cluster_baselines.kmeans import executar_kmeans
+    ctx.setdefault('rotulos', {})['kmeans'] = executar_kmeans(ctx['estados'])
+    return {'robos': ctx['n']}
+
+
+def etapa_aglomerativo(ctx):
+    from cluster_baselines.aglomerativo import executar_aglomerativo
+    ctx.setdefault('rotulos', {})['agglomerativo'] = executar_aglomerativo(ctx['estados'])
+    return {'robos': ctx['n']}
+
+
+def etapa_aglomerativo_conectividade(ctx):
+    from cluster_baselines.aglomerativo import executar_aglomerativo
+    executar_aglomerativo(ctx['estados'], modo='conectividade', A=ctx['A'])
+    return {'robos': ctx['n'], 'arestas': ctx['A'].nnz // 2}
+
+
+def etapa_aglomerativo_birch(ctx):
+    from cluster_baselines.aglomerativo import executar_aglomerativo
+    executar_aglomerativo(ctx['estados'], modo='birch')
+    return {'robos': ctx['n']}
+
+
+def etapa_louvain(ctx):
+    from cluster_baselines.louvain import executar_louvain
+    ctx.setdefault('rotulos', {})['louvain'] = executar_louvain(ctx['A'])
+    return {'nos': ctx['n'], 'arestas': ctx['A'].nnz // 2}
+
+
+def etapa_spectral(ctx):
+    from cluster_baselines.spectral import executar_spectral
+    ctx.setdefault('rotulos', {})['spectral'] = executar_spectral(ctx['A'])
+    return {'nos': ctx['n'], 'arestas': ctx['A'].nnz // 2}
+
+
+def etapa_guloso_fo1(ctx):
+    from heuristics.guloso_fo1 import guloso_clusterizacao_csr
+    A = ctx['A']
+    rot = guloso_clusterizacao_csr(A.indptr, A.indices, ctx['estados'][:, 2])
+    ctx.setdefault('rotulos', {})['guloso_fo1'] = rot
+    return {'nos': ctx['n'], 'clusters': int(rot.max()) + 1}
+
+
+def etapa_coocorrencia(ctx):
+    from consensus.construir_coocorrencia import coocorrencia_esparsa
+    rotulos = list(ctx.get('rotulos', {}).values())
+    if not rotulos:
+        raise RuntimeError("nenhuma clusterização disponível para a coocorrência")
+    C = coocorrencia_esparsa(rotulos)
+    return {'metodos': len(rotulos), 'pares': C.nnz}
+
+
+ETAPAS = {
+    'geracao': etapa_geracao,
+    'epsilon_fixo': etapa_epsilon_fixo,
+    'epsilon_exato': etapa_epsilon_exato,
+    'epsilon': etapa_epsilon,  # por último: as etapas seguintes usam este grafo
+    'kmeans': etapa_kmeans,
+    'aglomerativo': etapa_aglomerativo,
+    'aglomerativo_conectividade': etapa_aglomerativo_conectividade,
+    'aglomerativo_birch': etapa_aglomerativo_birch,
+    'louvain': etapa_louvain,
+    'spectral': etapa_spectral,
+    'guloso_fo1': etapa_guloso_fo1,
+    'coocorrencia': etapa_coocorrencia,
+}
+
+
+# =====================================================
+# Medição
+# =====================================================
+def _uso_filhos():
+    """(CPU s, pico de RSS MB) acumulados dos processos filhos já encerrados."""
+    if resource is None:
+        return 0.0, None
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # Linux reporta ru_maxrss em KiB; macOS em bytes
+    rss = uso.ru_maxrss / 2**20 if sys.platform == 'darwin' else uso.ru_maxrss / 2**10
+    return uso.ru_utime + uso.ru_stime, rss
+
+
+def medir(func, ctx, repeticoes=3, memoria=True):
+    """
+    Roda `func(ctx)` `repeticoes` vezes medindo parede e CPU (process_time
+    mais o CPU dos filhos via RUSAGE_CHILDREN, que só conta filhos já
+    aguardados, como os de um pool encerrado) e, numa passada extra sob
+    tracemalloc (que distorce o tempo), o pico de memória do processo.
+    ru_maxrss dos filhos é um máximo desde o início do processo, então o
+    pico dos workers só é registrado quando esta etapa o eleva.
+    """
+    wall, cpu, cpu_filhos = [], [], []
+    itens = None
+    _, rss0 = _uso_filhos()
+    for _ in range(repeticoes):
+        f0, _ = _uso_filhos()
+        w0, c0 = time.perf_counter(), time.process_time()
+        itens = func(ctx)
+        wall.append(time.perf_counter() - w0)
+        c1 = time.process_time() - c0
+        f1, _ = _uso_filhos()
+        cpu_filhos.append(f1 - f0)
+        cpu.append(c1 + f1 - f0)
+
+    res = {
+        'wall': wall,
+        'cpu': cpu,
+        'wall_mediana': statistics.median(wall),
+        'cpu_mediana': statistics.median(cpu),
+        'cpu_filhos_mediana': statistics.median(cpu_filhos),
+        'itens': itens,
+    }
+    if memoria:
+        tracemalloc.start()
+        try:
+            func(ctx)
+            res['pico_mem_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+        _, rss1 = _uso_filhos()
+        if rss1 is not None and rss1 > rss0:
+            res['pico_rss_filhos_mb'] = rss1
+    return res
+
+
+def rodar_instancia(nome, n, lado, etapas, repeticoes=3, seed=SEED, raio=RAIO_COMUNICACAO,
+                    memoria=True):
+    ctx = {'nome': nome, 'n': n, 'lado': lado, 'seed': seed, 'raio': raio}
+    resultados = {}
+    for etapa in etapas:
+        if n > LIMITE_N.get(etapa, float('inf')):
+            resultados[etapa] = {'pulado': f"n > {LIMITE_N[etapa]}"}
+            print(f"[benchmark] {nome:>10} | {etapa:<26} | pulado (n > {LIMITE_N[etapa]})")
+            continue
+        try:
+            r = medir(ETAPAS[etapa], ctx, repeticoes=repeticoes, memoria=memoria)
+        except Exception as e:  # registra e segue para as próximas etapas
+            resultados[etapa] = {'erro': f"{type(e).__name__}: {e}"}
+            print(f"[benchmark] {nome:>10} | {etapa:<26} | erro: {e}")
+            continue
+        resultados[etapa] = r
+        mem = f"{r['pico_mem_mb']:.1f} MB" if 'pico_mem_mb' in r else "-"
+        if 'pico_rss_filhos_mb' in r:
+            mem += f" (filhos {r['pico_rss_filhos_mb']:.1f} MB RSS)"
+        print(f"[benchmark] {nome:>10} | {etapa:<26} | parede {r['wall_mediana']:.3f} s "
+              f"| cpu {r['cpu_mediana']:.3f} s | pico {mem}")
+    return resultados
+
+
+# =====================================================
+# Comparação com baseline
+# =====================================================
+def comparar(atual, baseline, tolerancia=0.2):
+    """
+    Lista de regressões: etapas que passaram a falhar (métrica 'erro') ou
+    cuja mediana de parede (ou pico de memória) cresceu mais que
+    `tolerancia` em relação ao baseline.
+    """
+    regressoes = []
+    for inst, etapas in atual['resultados'].items():
+        base_inst = baseline.get('resultados', {}).get(inst, {})
+        for etapa, r in etapas.items():
+            b = base_inst.get(etapa)
+            if b and 'erro' in r and 'erro' not in b:
+                regressoes.append({'instancia': inst, 'etapa': etapa, 'metrica': 'erro',
+                                   'baseline': None, 'atual': r['erro'], 'razao': None})
+                continue
+            if not b or 'wall_mediana' not in r or 'wall_mediana' not in b:
+                continue
+            for chave in ('wall_mediana', 'pico_mem_mb', 'pico_rss_filhos_mb'):
+                if chave in r and chave in b and b[chave] > 0:
+                    razao = r[chave] / b[chave]
+                    if razao > 1 + tolerancia:
+                        regressoes.append({'instancia': inst, 'etapa': etapa, 'metrica': chave,
+                                           'baseline': b[chave], 'atual': r[chave], 'razao': razao})
+    return regressoes
+
+
+def parse_tamanho(texto):
+    """'N:LADO' -> (nome, N, LADO)."""
+    n, lado = (int(x) for x in texto.split(':'))
+    return f"n{n}", n, lado
+
+
+def executar_benchmark(instancias=None, tamanhos=(), etapas=None, repeticoes=3, seed=SEED,
+                       raio=RAIO_COMUNICACAO, memoria=True, saida=None, baseline=None,
+                       tolerancia=0.2):
+    instancias = list(NUM_ROBOS) if instancias is None else list(instancias)
+    etapas = list(ETAPAS) if etapas is None else list(etapas)
+    alvos = [(nome, NUM_ROBOS[nome], TAMANHO_AREA[nome]) for nome in instancias]
+    alvos += [parse_tamanho(t) for t in tamanhos]
+
+    relatorio = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'maquina': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': seed,
+            'raio': raio,
+            'repeticoes': repeticoes,
+        },
+        'instancias': {nome: {'n': n, 'lado': lado} for nome, n, lado in alvos},
+        'resultados': {},
+    }
+    for nome, n, lado in alvos:
+        relatorio['resultados'][nome] = rodar_instancia(nome, n, lado, etapas, repeticoes=repeticoes,
+                                                        seed=seed, raio=raio, memoria=memoria)
+
+    if saida is None:
+        saida = os.path.join(ROOT_DIR, 'data', 'benchmark',
+                             f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+
+    regressoes = []
+    if baseline:
+        with open(baseline, encoding='utf-8') as f:
+            regressoes = comparar(relatorio, json.load(f), tolerancia=tolerancia)
+        relatorio['regressoes'] = regressoes
+        for r in regressoes:
+            if r['metrica'] == 'erro':
+                print(f"[REGRESSÃO] {r['instancia']} / {r['etapa']}: passou a falhar ({r['atual']})")
+                continue
+            print(f"[REGRESSÃO] {r['instancia']} / {r['etapa']} / {r['metrica']}: "
+                  f"{r['baseline']:.3f} -> {r['atual']:.3f} (x{r['razao']:.2f})")
+        if not regressoes:
+            print("[benchmark] Nenhuma regressão em relação ao baseline.")
+
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"[OK] Resultados salvos em {saida}")
+    return relatorio, regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de escalabilidade por etapa')
+    parser.add_argument('--instancias', nargs='*', choices=list(NUM_ROBOS), default=list(NUM_ROBOS))
+    parser.add_argument('--tamanho', action='append', default=[], metavar='N:LADO',
+                        help='Instância extra, ex.: 100000:10000 (pode repetir)')
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--raio', type=float, default=RAIO_COMUNICACAO)
+    parser.add_argument('--sem-memoria', action='store_true', help='Não mede pico de memória')
+    parser.add_argument('--saida', default=None, help='JSON de saída')
+    parser.add_argument('--baseline', default=None, help='JSON de referência para comparação')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='Aumento relativo tolerado antes de sinalizar regressão')
+    args = parser.parse_args()
+
+    _, regressoes = executar_benchmark(args.instancias, args.tamanho, args.etapas,
+                                       repeticoes=args.repeticoes, seed=args.seed, raio=args.raio,
+                                       memoria=not args.sem_memoria, saida=args.saida,
+                                       baseline=args.baseline, tolerancia=args.tolerancia)
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == '__main__':
+    main()
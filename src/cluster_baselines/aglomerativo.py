@@ -1,39 +1,91 @@
 import os
+import sys
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.cluster import AgglomerativeClustering
+from scipy.sparse import csr_matrix
+from sklearn.cluster import AgglomerativeClustering, Birch
+from sklearn.preprocessing import StandardScaler
 
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+from graph.grafo_binario import carregar_grafo
+import renderizacao
+
 dados_path = os.path.join(base_dir, 'data', 'sinteticos', 'robos.npy')
-saida_dir = os.path.join(base_dir, 'data', 'cluster', 'aglomerativo')
-os.makedirs(saida_dir, exist_ok=True)
-
-robos = np.load(dados_path)
-X = robos  # usa todas as 5 features: x, y, v, θ, bateria
-
-n_clusters = 5
-modelo = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward')
-labels = modelo.fit_predict(X)
-
-np.save(os.path.join(saida_dir, 'agglomerativo_labels.npy'), labels)
-
-plt.figure(figsize=(8, 6))
-scatter = plt.scatter(robos[:, 0], robos[:, 1], c=labels, cmap='tab10', s=30)
-plt.colorbar(scatter, label='Cluster Agglomerativo')
-plt.xlabel('Posição X')
-plt.ylabel('Posição Y')
-plt.title(f'Agglomerativo - Clusterização dos Robôs (k={n_clusters})')
-plt.grid(True)
-plt.tight_layout()
-plt.savefig(os.path.join(saida_dir, 'agglomerativo_clusters.png'))
-plt.close()
-
-with open(os.path.join(saida_dir, 'agglomerativo_resumo.txt'), 'w', encoding='utf-8') as f:
-    f.write("Clusterização Aglomerativa - Dados Sintéticos\n\n")
-    f.write(f"Número de robôs: {len(robos)}\n")
-    f.write(f"Número de clusters: {n_clusters}\n")
-    unique, counts = np.unique(labels, return_counts=True)
-    for u, c in zip(unique, counts):
-        f.write(f"Cluster {u}: {c} elementos\n")
-
-print("Clusterização aglomerativa concluída e arquivos salvos.")
+# mesmo nome de pasta/arquivo lido por consensus/construir_coocorrencia.py
+saida_dir = os.path.join(base_dir, 'data', 'cluster', 'agglomerativo')
+
+
+MODOS = ('ward', 'conectividade', 'birch')
+
+
+def executar_aglomerativo(X, n_clusters=5, modo='ward', A=None, limiar_birch=0.5):
+    """
+    Rótulos Ward sobre X (todas as 5 features: x, y, v, θ, bateria).
+    - 'ward': linkage sem restrição (memória/tempo quadráticos em n)
+    - 'conectividade': só funde clusters ligados por arestas do grafo ε-ball
+      `A`, então robôs que não se comunicam não são unidos diretamente e a
+      memória fica proporcional ao número de arestas
+    - 'birch': resume os pontos numa CF-tree (features padronizadas,
+      raio de subcluster `limiar_birch`) e aplica Ward só aos centróides
+      dos subclusters; cada robô herda o rótulo do seu subcluster
+    """
+    if modo == 'ward':
+        modelo = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward')
+        return modelo.fit_predict(X)
+    if modo == 'conectividade':
+        if A is None:
+            raise ValueError("modo 'conectividade' requer a adjacência do grafo ε-ball")
+        # só o padrão de esparsidade importa; pesos 1 evitam zeros explícitos
+        conect = csr_matrix((np.ones(len(A.indices)), A.indices, A.indptr), shape=A.shape)
+        modelo = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward', connectivity=conect)
+        return modelo.fit_predict(X)
+    if modo == 'birch':
+        Z = StandardScaler().fit_transform(X)
+        global_ = AgglomerativeClustering(n_clusters=n_clusters, linkage='ward')
+        modelo = Birch(threshold=limiar_birch, n_clusters=global_)
+        return modelo.fit_predict(Z)
+    raise ValueError(f"modo desconhecido: {modo}")
+
+
+def salvar_resultados(robos, labels, n_clusters, saida_dir=saida_dir, desenhar=True, modo='ward'):
+    os.makedirs(saida_dir, exist_ok=True)
+    np.save(os.path.join(saida_dir, 'agglomerativo_labels.npy'), labels)
+
+    if desenhar:
+        renderizacao.agendar(renderizacao.figura_dispersao, os.path.join(saida_dir, 'agglomerativo_clusters.png'),
+                             robos[:, 0], robos[:, 1], labels, titulo=f'Agglomerativo - Clusterização dos Robôs (k={n_clusters})',
+                             rotulo_barra='Cluster Agglomerativo')
+
+    with open(os.path.join(saida_dir, 'agglomerativo_resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write("Clusterização Aglomerativa - Dados Sintéticos\n\n")
+        f.write(f"Número de robôs: {len(robos)}\n")
+        f.write(f"Modo: {modo}\n")
+        f.write(f"Número de clusters: {n_clusters}\n")
+        unique, counts = np.unique(labels, return_counts=True)
+        for u, c in zip(unique, counts):
+            f.write(f"Cluster {u}: {c} elementos\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baseline aglomerativo (Ward) sobre os estados dos robôs")
+    parser.add_argument("--modo", choices=MODOS, default='ward')
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dados", default=dados_path, help="robos.npy")
+    parser.add_argument("--grafo-dir", default=None,
+                        help="Pasta do grafo ε-ball (obrigatória no modo conectividade)")
+    args = parser.parse_args()
+
+    robos = np.load(args.dados)
+    A = None
+    if args.modo == 'conectividade':
+        if args.grafo_dir is None:
+            parser.error("--grafo-dir é obrigatório com --modo conectividade")
+        A, _ = carregar_grafo(args.grafo_dir)
+    labels = executar_aglomerativo(robos, n_clusters=args.k, modo=args.modo, A=A)
+    salvar_resultados(robos, labels, args.k, modo=args.modo)
+    print("Clusterização aglomerativa concluída e arquivos salvos.")
+
+
+if __name__ == '__main__':
+    main()
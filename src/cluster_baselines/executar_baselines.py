@@ -0,0 +1,106 @@
+"""
+Execução concorrente dos quatro baselines sobre as mesmas entradas.
+
+Os estados dos robôs e a adjacência CSR são carregados uma única vez pelo
+processo principal e entregues a cada worker no inicializador do pool;
+cada tarefa devolve só (método, rótulos, tempo), e os rótulos são gravados
+à medida que as tarefas terminam.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+
+cluster_root = os.path.join(base_dir, 'data', 'cluster')
+
+# nome do método (= pasta de saída) -> entrada usada
+# 'agglomerativo' segue a grafia lida por consensus/construir_coocorrencia.py
+BASELINES = {
+    'kmeans': 'estados',
+    'agglomerativo': 'estados',
+    'louvain': 'grafo',
+    'spectral': 'grafo',
+}
+
+_ENTRADAS = {}
+
+
+def _iniciar_worker(estados, A):
+    _ENTRADAS['estados'] = estados
+    _ENTRADAS['A'] = A
+
+
+def rodar_baseline(metodo, estados, A, k=5, seed=42, modo_aglomerativo='ward'):
+    """Rótulos de um baseline a partir das entradas já carregadas."""
+    if metodo == 'kmeans':
+        from cluster_baselines.kmeans import executar_kmeans
+        return executar_kmeans(estados, n_clusters=k, seed=seed)
+    if metodo == 'agglomerativo':
+        from cluster_baselines.aglomerativo import executar_aglomerativo
+        return executar_aglomerativo(estados, n_clusters=k, modo=modo_aglomerativo, A=A)
+    if metodo == 'louvain':
+        from cluster_baselines.louvain import executar_louvain
+        return executar_louvain(A, seed=seed)
+    if metodo == 'spectral':
+        from cluster_baselines.spectral import executar_spectral
+        return executar_spectral(A, n_clusters=k, seed=seed, estados=estados)
+    raise ValueError(f"baseline desconhecido: {metodo}")
+
+
+def _tarefa(metodo, k, seed, modo_aglomerativo):
+    t0 = time.perf_counter()
+    labels = rodar_baseline(metodo, _ENTRADAS['estados'], _ENTRADAS['A'], k=k, seed=seed,
+                            modo_aglomerativo=modo_aglomerativo)
+    return metodo, np.asarray(labels), time.perf_counter() - t0
+
+
+def salvar_baseline(metodo, labels, estados, A, k, saida_root=cluster_root, desenhar=True,
+                    modo_aglomerativo='ward'):
+    """Grava rótulos/resumo (e figura) na pasta usual de cada baseline."""
+    saida_dir = os.path.join(saida_root, metodo)
+    if metodo == 'kmeans':
+        from cluster_baselines.kmeans import salvar_resultados
+        salvar_resultados(estados, labels, k, saida_dir=saida_dir, desenhar=desenhar)
+    elif metodo == 'agglomerativo':
+        from cluster_baselines.aglomerativo import salvar_resultados
+        salvar_resultados(estados, labels, k, saida_dir=saida_dir, desenhar=desenhar,
+                          modo=modo_aglomerativo)
+    elif metodo == 'louvain':
+        from cluster_baselines.louvain import salvar_resultados
+        salvar_resultados(A, estados, labels, saida_dir=saida_dir, desenhar=desenhar)
+    else:
+        from cluster_baselines.spectral import salvar_resultados
+        salvar_resultados(A, estados, labels, k, saida_dir=saida_dir, desenhar=desenhar)
+    return saida_dir
+
+
+def executar_baselines(estados, A, metodos=None, k=5, seed=42, workers=None,
+                       saida_root=cluster_root, desenhar=True, modo_aglomerativo='ward'):
+    """
+    Roda `metodos` (padrão: os quatro) em paralelo e grava os rótulos de cada
+    um assim que fica pronto. Retorna {método: (rótulos, tempo em s)}.
+    """
+    metodos = list(metodos or BASELINES)
+    for m in metodos:
+        if m not in BASELINES:
+            raise ValueError(f"baseline desconhecido: {m}")
+    workers = workers or min(len(metodos), os.cpu_count() or 1)
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                             initargs=(estados, A)) as pool:
+        futuros = [pool.submit(_tarefa, m, k, seed, modo_aglomerativo) for m in metodos]
+        for fut in as_completed(futuros):
+            metodo, labels, tempo = fut.result()
+            saida_dir = salvar_baseline(metodo, labels, estados, A, k,
+                                        saida_root=saida_root, desenhar=desenhar,
+                                        modo_aglomerativo=modo_aglomerativo)
+            resultados[metodo] = (labels, tempo)
+            print(f"[baselines] {metodo}: {len(np.unique(labels))} clusters "
+                  f"em {tempo:.2f}s -> {saida_dir}")
+    return resultados
@@ -1,39 +1,238 @@
 import os
+import sys
+import json
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
+from numpy.lib.format import open_memmap
+from sklearn.cluster import KMeans, kmeans_plusplus
 
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+import renderizacao
+
 dados_path = os.path.join(base_dir, 'data', 'sinteticos', 'robos.npy')
 saida_dir = os.path.join(base_dir, 'data', 'cluster', 'kmeans')
-os.makedirs(saida_dir, exist_ok=True)
-
-robos = np.load(dados_path)
-X = robos  # todas as 5 features: x, y, v, θ, bateria
-
-n_clusters = 5
-modelo = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto')
-labels = modelo.fit_predict(X)
-
-np.save(os.path.join(saida_dir, 'kmeans_labels.npy'), labels)
-
-plt.figure(figsize=(8, 6))
-scatter = plt.scatter(robos[:, 0], robos[:, 1], c=labels, cmap='tab10', s=30)
-plt.colorbar(scatter, label='Cluster KMeans')
-plt.xlabel('Posição X')
-plt.ylabel('Posição Y')
-plt.title(f'KMeans - Clusterização dos Robôs (k={n_clusters})')
-plt.grid(True)
-plt.tight_layout()
-plt.savefig(os.path.join(saida_dir, 'kmeans_clusters.png'))
-plt.close()
-
-with open(os.path.join(saida_dir, 'kmeans_resumo.txt'), 'w', encoding='utf-8') as f:
-    f.write(f"Clusterização KMeans - Dados Sintéticos\n\n")
-    f.write(f"Número de robôs: {len(robos)}\n")
-    f.write(f"Número de clusters: {n_clusters}\n")
+
+
+def executar_kmeans(X, n_clusters=5, seed=42):
+    """Rótulos KMeans sobre X (todas as 5 features: x, y, v, θ, bateria)."""
+    modelo = KMeans(n_clusters=n_clusters, random_state=seed, n_init='auto')
+    return modelo.fit_predict(X)
+
+
+# =====================================================
+# Modo streaming: mini-batches lidos do .npy via mmap
+# =====================================================
+class EstatisticasCorrentes:
+    """
+    Média e variância por feature acumuladas bloco a bloco (Welford, com a
+    combinação de Chan et al. para juntar um bloco inteiro de uma vez).
+    """
+
+    def __init__(self, d):
+        self.n = 0
+        self.media = np.zeros(d)
+        self.m2 = np.zeros(d)
+
+    def atualizar(self, bloco):
+        bloco = np.asarray(bloco, dtype=np.float64)
+        nb = len(bloco)
+        if nb == 0:
+            return
+        media_b = bloco.mean(axis=0)
+        m2_b = ((bloco - media_b) ** 2).sum(axis=0)
+        delta = media_b - self.media
+        n = self.n + nb
+        self.media = self.media + delta * nb / n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * nb / n
+        self.n = n
+
+    @property
+    def desvio(self):
+        if self.n < 2:
+            return np.ones_like(self.media)
+        d = np.sqrt(self.m2 / (self.n - 1))
+        return np.where(d > 0, d, 1.0)
+
+    def padronizar(self, bloco):
+        return (np.asarray(bloco, dtype=np.float64) - self.media) / self.desvio
+
+
+class KMeansStreaming:
+    """
+    KMeans mini-batch (atualização de Sculley: cada centróide é a média
+    corrente dos pontos já atribuídos a ele) no espaço padronizado.
+    Os centróides são guardados em unidades originais, então novas leituras
+    que mudem média/desvio não invalidam o estado.
+    """
+
+    def __init__(self, k=5, d=5, seed=42, tamanho_lote=4096):
+        self.k = k
+        self.tamanho_lote = tamanho_lote
+        self.rng = np.random.default_rng(seed)
+        self.estatisticas = EstatisticasCorrentes(d)
+        self.centros = None             # (k, d) em unidades originais
+        self.contagens = np.zeros(k)
+        self.lotes = 0
+
+    def _atribuir(self, Z, C):
+        d2 = (Z ** 2).sum(axis=1)[:, None] - 2 * Z @ C.T + (C ** 2).sum(axis=1)[None, :]
+        return np.argmin(d2, axis=1)
+
+    def _ajustar_lote(self, Z):
+        C = self.estatisticas.padronizar(self.centros)
+        rotulos = self._atribuir(Z, C)
+        m = np.bincount(rotulos, minlength=self.k).astype(np.float64)
+        somas = np.zeros_like(C)
+        np.add.at(somas, rotulos, Z)
+        ativos = m > 0
+        total = self.contagens + m
+        C[ativos] = (self.contagens[ativos, None] * C[ativos] + somas[ativos]) / total[ativos, None]
+        self.contagens = total
+        self.centros = C * self.estatisticas.desvio + self.estatisticas.media
+        self.lotes += 1
+
+    def partial_fit(self, bloco, atualizar_estatisticas=True):
+        """
+        Consome um bloco de estados (n_b, d): atualiza média/desvio (se
+        pedido) e os centróides, em mini-batches embaralhados.
+        """
+        bloco = np.asarray(bloco, dtype=np.float64)
+        if atualizar_estatisticas:
+            self.estatisticas.atualizar(bloco)
+        Z = self.estatisticas.padronizar(bloco[self.rng.permutation(len(bloco))])
+        if self.centros is None:
+            if len(Z) < self.k:
+                raise ValueError(f"primeiro bloco com {len(Z)} linhas < k={self.k}")
+            lote = Z[:self.tamanho_lote]
+            C, _ = kmeans_plusplus(lote, self.k, random_state=int(self.rng.integers(2**31)))
+            self.centros = C * self.estatisticas.desvio + self.estatisticas.media
+        for ini in range(0, len(Z), self.tamanho_lote):
+            self._ajustar_lote(Z[ini:ini + self.tamanho_lote])
+        return self
+
+    def predict(self, bloco):
+        Z = self.estatisticas.padronizar(bloco)
+        return self._atribuir(Z, self.estatisticas.padronizar(self.centros))
+
+    def salvar(self, caminho):
+        """Estado completo (estatísticas, centróides, contagens) em .npz."""
+        np.savez(caminho, k=self.k, tamanho_lote=self.tamanho_lote, n=self.estatisticas.n,
+                 media=self.estatisticas.media, m2=self.estatisticas.m2,
+                 centros=self.centros, contagens=self.contagens, lotes=self.lotes,
+                 rng=np.array(json.dumps(self.rng.bit_generator.state)))
+
+    @classmethod
+    def carregar(cls, caminho):
+        z = np.load(caminho)
+        modelo = cls(k=int(z['k']), d=len(z['media']), tamanho_lote=int(z['tamanho_lote']))
+        modelo.estatisticas.n = int(z['n'])
+        modelo.estatisticas.media = z['media']
+        modelo.estatisticas.m2 = z['m2']
+        modelo.centros = z['centros']
+        modelo.contagens = z['contagens']
+        modelo.lotes = int(z['lotes'])
+        modelo.rng.bit_generator.state = json.loads(str(z['rng']))
+        return modelo
+
+
+def blocos_mmap(caminho, tamanho_bloco=65536):
+    """Itera sobre as linhas de um .npy aberto em mmap, sem carregá-lo inteiro."""
+    X = np.load(caminho, mmap_mode='r')
+    for ini in range(0, len(X), tamanho_bloco):
+        yield np.asarray(X[ini:ini + tamanho_bloco], dtype=np.float64)
+
+
+def executar_kmeans_streaming(caminho, n_clusters=5, seed=42, tamanho_bloco=65536,
+                              tamanho_lote=4096, epocas=1, modelo=None):
+    """
+    Ajusta (ou, com `modelo`, atualiza) o KMeans streaming sobre o .npy em
+    `caminho`. Num ajuste do zero, uma primeira passada fixa média/desvio
+    antes dos centróides; numa atualização, as estatísticas acompanham os
+    novos blocos.
+    """
+    if modelo is None:
+        d = np.load(caminho, mmap_mode='r').shape[1]
+        modelo = KMeansStreaming(k=n_clusters, d=d, seed=seed, tamanho_lote=tamanho_lote)
+        for bloco in blocos_mmap(caminho, tamanho_bloco):
+            modelo.estatisticas.atualizar(bloco)
+        for _ in range(epocas):
+            for bloco in blocos_mmap(caminho, tamanho_bloco):
+                modelo.partial_fit(bloco, atualizar_estatisticas=False)
+    else:
+        for bloco in blocos_mmap(caminho, tamanho_bloco):
+            modelo.partial_fit(bloco)
+    return modelo
+
+
+def rotular_streaming(modelo, caminho, saida_labels, tamanho_bloco=65536):
+    """Grava os rótulos de todas as linhas de `caminho` em .npy, bloco a bloco."""
+    n = np.load(caminho, mmap_mode='r').shape[0]
+    labels = open_memmap(saida_labels, mode='w+', dtype=np.int32, shape=(n,))
+    ini = 0
+    for bloco in blocos_mmap(caminho, tamanho_bloco):
+        labels[ini:ini + len(bloco)] = modelo.predict(bloco)
+        ini += len(bloco)
+    labels.flush()
+    return labels
+
+
+def salvar_resultados(robos, labels, n_clusters, saida_dir=saida_dir, desenhar=True):
+    os.makedirs(saida_dir, exist_ok=True)
+    np.save(os.path.join(saida_dir, 'kmeans_labels.npy'), labels)
+
+    if desenhar:
+        renderizacao.agendar(renderizacao.figura_dispersao, os.path.join(saida_dir, 'kmeans_clusters.png'),
+                             robos[:, 0], robos[:, 1], labels, titulo=f'KMeans - Clusterização dos Robôs (k={n_clusters})',
+                             rotulo_barra='Cluster KMeans')
+
+    with open(os.path.join(saida_dir, 'kmeans_resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write(f"Clusterização KMeans - Dados Sintéticos\n\n")
+        f.write(f"Número de robôs: {len(robos)}\n")
+        f.write(f"Número de clusters: {n_clusters}\n")
+        unique, counts = np.unique(labels, return_counts=True)
+        for u, c in zip(unique, counts):
+            f.write(f"Cluster {u}: {c} elementos\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baseline KMeans sobre os estados dos robôs")
+    parser.add_argument("--modo", choices=["batch", "streaming"], default="batch")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dados", default=dados_path, help="robos.npy")
+    parser.add_argument("--bloco", type=int, default=65536, help="Linhas lidas por vez (streaming)")
+    parser.add_argument("--lote", type=int, default=4096, help="Tamanho do mini-batch (streaming)")
+    parser.add_argument("--epocas", type=int, default=1)
+    parser.add_argument("--estado", default=None,
+                        help="Estado .npz do streaming: se existir, atualiza os centróides com --dados; é regravado ao final")
+    args = parser.parse_args()
+
+    if args.modo == "batch":
+        robos = np.load(args.dados)
+        labels = executar_kmeans(robos, n_clusters=args.k)
+        salvar_resultados(robos, labels, args.k)
+        print("KMeans concluído e arquivos salvos.")
+        return
+
+    modelo = None
+    if args.estado and os.path.exists(args.estado):
+        modelo = KMeansStreaming.carregar(args.estado)
+        print(f"[KMeans] Atualizando estado {args.estado} ({modelo.estatisticas.n} robôs já vistos)")
+    modelo = executar_kmeans_streaming(args.dados, n_clusters=args.k, tamanho_bloco=args.bloco,
+                                       tamanho_lote=args.lote, epocas=args.epocas, modelo=modelo)
+    os.makedirs(saida_dir, exist_ok=True)
+    labels = rotular_streaming(modelo, args.dados, os.path.join(saida_dir, 'kmeans_labels.npy'), args.bloco)
+    modelo.salvar(args.estado or os.path.join(saida_dir, 'kmeans_estado.npz'))
     unique, counts = np.unique(labels, return_counts=True)
-    for u, c in zip(unique, counts):
-        f.write(f"Cluster {u}: {c} elementos\n")
+    with open(os.path.join(saida_dir, 'kmeans_resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write("Clusterização KMeans (streaming) - Dados Sintéticos\n\n")
+        f.write(f"Número de robôs: {len(labels)}\n")
+        f.write(f"Número de clusters: {modelo.k}\n")
+        f.write(f"Mini-batches: {modelo.lotes}\n")
+        for u, c in zip(unique, counts):
+            f.write(f"Cluster {u}: {c} elementos\n")
+    print("KMeans streaming concluído e arquivos salvos.")
+
 
-print("KMeans concluído e arquivos salvos.")
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,110 @@
 import os
+import sys
+import argparse
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
-from community import community_louvain  # pip install python-louvain
+from scipy.sparse import csr_matrix, load_npz
 
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-grafo_path = os.path.join(base_dir, 'data', 'grafo', 'grafo_area_maior.graphml')
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+from graph.grafo_binario import carregar_grafo
+from graph.grafo_csr import arestas_csr
+from cluster_baselines.louvain_csr import louvain_csr, simetrizar
+import renderizacao
+
+grafo_dir = os.path.join(base_dir, 'data', 'grafo')
+grafo_path = os.path.join(grafo_dir, 'grafo_area_maior.graphml')
 saida_dir = os.path.join(base_dir, 'data', 'cluster', 'louvain')
-os.makedirs(saida_dir, exist_ok=True)
-
-G = nx.read_graphml(grafo_path)
-G = nx.convert_node_labels_to_integers(G)  # garante nós numerados de 0 a N-1
-
-# Louvain
-print("[Louvain] Rodando detecção de comunidades...")
-partition = community_louvain.best_partition(G)
-labels = np.array([partition[i] for i in range(len(partition))])
-
-np.save(os.path.join(saida_dir, 'louvain_labels.npy'), labels)
-
-pos = {i: (float(G.nodes[i]['x']), float(G.nodes[i]['y'])) for i in G.nodes}
-plt.figure(figsize=(10, 8))
-nx.draw(G, pos, node_color=labels, node_size=25, cmap='tab10', with_labels=False, edge_color='lightgray')
-plt.title("Louvain - Clusterização dos Robôs (grafo de conectividade)")
-plt.tight_layout()
-plt.savefig(os.path.join(saida_dir, 'louvain_clusters.png'))
-plt.close()
-
-with open(os.path.join(saida_dir, 'louvain_resumo.txt'), 'w', encoding='utf-8') as f:
-    f.write("Clusterização Louvain - Grafo dos Robôs\n\n")
-    f.write(f"Nós: {G.number_of_nodes()}\n")
-    f.write(f"Arestas: {G.number_of_edges()}\n")
-    unique, counts = np.unique(labels, return_counts=True)
-    for u, c in zip(unique, counts):
-        f.write(f"Cluster {u}: {c} nós\n")
-
-print("[Louvain] Concluído e arquivos salvos.")
+coocorrencia_path = os.path.join(base_dir, 'data', 'coocorrencia', 'matriz_coocorrencia.npz')
+
+
+def matriz_pesos(A, pesos='distancia', C=None):
+    """
+    Adjacência ponderada para o Louvain:
+      - 'distancia': A.data (distância ε-ball, como o atributo `weight` do GraphML)
+      - 'binario': 1 em cada aresta
+      - 'coocorrencia': matriz de coocorrência `C` (triangular, de
+        consensus/construir_coocorrencia.py), simetrizada
+    """
+    if pesos == 'distancia':
+        return A
+    if pesos == 'binario':
+        return csr_matrix((np.ones(len(A.indices)), A.indices, A.indptr), shape=A.shape)
+    if pesos == 'coocorrencia':
+        if C is None:
+            raise ValueError("pesos='coocorrencia' requer a matriz de coocorrência")
+        return simetrizar(C)
+    raise ValueError(f"pesos desconhecido: {pesos}")
+
+
+def executar_louvain(A, seed=42, motor='csr', workers=1):
+    """
+    Rótulos Louvain sobre a adjacência CSR `A` (pesos = A.data).
+    motor='csr': implementação nativa vetorizada (louvain_csr.py);
+    motor='python-louvain': community_louvain.best_partition via networkx.
+    """
+    if motor == 'csr':
+        labels, _, _ = louvain_csr(A, seed=seed, workers=workers)
+        return labels
+    if motor == 'python-louvain':
+        from community import community_louvain  # pip install python-louvain
+        G = nx.from_scipy_sparse_array(A)
+        partition = community_louvain.best_partition(G, random_state=seed)
+        return np.array([partition[i] for i in range(len(partition))])
+    raise ValueError(f"motor desconhecido: {motor}")
+
+
+def salvar_resultados(A, estados, labels, saida_dir=saida_dir, desenhar=True):
+    os.makedirs(saida_dir, exist_ok=True)
+    np.save(os.path.join(saida_dir, 'louvain_labels.npy'), labels)
+
+    if desenhar:
+        i, j, _ = arestas_csr(A)
+        renderizacao.agendar(renderizacao.figura_grafo, os.path.join(saida_dir, 'louvain_clusters.png'),
+                             estados[:, :2], i, j, cores=labels, cmap='tab10', tamanho_no=25,
+                             titulo="Louvain - Clusterização dos Robôs (grafo de conectividade)",
+                             figsize=(10, 8))
+
+    with open(os.path.join(saida_dir, 'louvain_resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write("Clusterização Louvain - Grafo dos Robôs\n\n")
+        f.write(f"Nós: {A.shape[0]}\n")
+        f.write(f"Arestas: {A.nnz // 2}\n")
+        unique, counts = np.unique(labels, return_counts=True)
+        for u, c in zip(unique, counts):
+            f.write(f"Cluster {u}: {c} nós\n")
+
+
+def pasta_grafo(args):
+    """--grafo-dir, senão o grafo ε-ball da instância (data/grafo/epsilon_...), senão o GraphML antigo."""
+    if args.grafo_dir:
+        return args.grafo_dir
+    if args.num_robos:
+        return os.path.join(base_dir, 'data', 'grafo', f"epsilon_{args.raio:.1f}_{args.num_robos}_seed{args.seed}")
+    return grafo_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baseline Louvain sobre o grafo dos robôs")
+    parser.add_argument("--motor", choices=["csr", "python-louvain"], default="csr")
+    parser.add_argument("--pesos", choices=["distancia", "binario", "coocorrencia"], default="distancia")
+    parser.add_argument("--grafo-dir", default=None,
+                        help="Pasta do grafo (padrão: a de --num-robos/--raio/--seed, como em pipeline baselines)")
+    parser.add_argument("--num-robos", type=int, default=None)
+    parser.add_argument("--raio", type=float, default=50.0)
+    parser.add_argument("--coocorrencia", default=coocorrencia_path, help="matriz_coocorrencia.npz")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    A, estados = carregar_grafo(pasta_grafo(args), graphml=os.path.basename(grafo_path))
+    C = load_npz(args.coocorrencia) if args.pesos == 'coocorrencia' else None
+    W = matriz_pesos(A, args.pesos, C)
+
+    print(f"[Louvain] Rodando detecção de comunidades (motor {args.motor}, pesos {args.pesos})...")
+    labels = executar_louvain(W, seed=args.seed, motor=args.motor, workers=args.workers)
+    salvar_resultados(A, estados, labels)
+    print("[Louvain] Concluído e arquivos salvos.")
+
+
+if __name__ == '__main__':
+    main()
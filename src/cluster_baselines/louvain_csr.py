@@ -0,0 +1,241 @@
+"""
+Louvain nativo sobre adjacência CSR (sem networkx / python-louvain).
+
+Cada nível alterna:
+  1. movimentos locais vetorizados: para todos os nós de uma vez, soma os
+     pesos para cada comunidade vizinha (agrupando as arestas pela chave
+     nó·C + comunidade) e escolhe a de maior ganho de modularidade;
+     como os movimentos são síncronos, só um subconjunto aleatório dos
+     nós com ganho positivo se move por rodada (evita que pares de nós
+     troquem de comunidade indefinidamente), e a rodada só é aceita se a
+     modularidade subir;
+  2. agregação: cada comunidade vira um nó, W' = Pᵀ W P.
+O sorteio do subconjunto usa um gerador com semente fixa, então o
+resultado é determinístico (e independe do número de workers).
+"""
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import csr_matrix
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+sys.path.insert(0, base_dir)
+
+from config import SEED
+from graph.memoria_compartilhada import compartilhar_arrays, anexar_arrays, liberar
+
+# Abaixo deste número de nós o nível roda no processo principal
+MIN_NOS_PARALELO = 200000
+
+# Anexos de memória compartilhada do worker: {nome do bloco: (blocos, arrays)}
+_ANEXOS = {}
+
+
+def simetrizar(C):
+    """CSR simétrica a partir de uma matriz triangular (ex.: coocorrência i < j)."""
+    C = csr_matrix(C)
+    S = (C + C.T).tocsr()
+    S.sort_indices()
+    return S
+
+
+def modularidade(indptr, indices, pesos, rotulos, resolucao=1.0, src=None, graus=None):
+    """
+    Modularidade de `rotulos` no grafo ponderado simétrico (indptr, indices, pesos).
+    `src` (nó de origem de cada aresta) e `graus` podem ser passados já prontos.
+    """
+    n = len(indptr) - 1
+    m2 = float(pesos.sum())
+    if m2 == 0:
+        return 0.0
+    if src is None:
+        src = np.repeat(np.arange(n), np.diff(indptr))
+    if graus is None:
+        graus = np.bincount(src, weights=pesos, minlength=n)
+    interno = float(pesos[rotulos[src] == rotulos[indices]].sum())
+    tot = np.bincount(rotulos, weights=graus)
+    return interno / m2 - resolucao * float(((tot / m2) ** 2).sum())
+
+
+def _melhores_movimentos(indptr, indices, pesos, graus, c, tot, m2, ini, fim, resolucao):
+    """
+    Para os nós ini..fim-1: melhor comunidade vizinha e o ganho de sair da
+    comunidade atual para ela (ganho em unidades de peso: 2m·ΔQ/2).
+    Devolve só os nós com ganho positivo, como (nos, destinos, ganhos).
+    """
+    a, b = indptr[ini], indptr[fim]
+    nos = np.repeat(np.arange(ini, fim), np.diff(indptr[ini:fim + 1]))
+    viz = indices[a:b]
+    # laços (só existem após a agregação) não contam como ligação a comunidades
+    w = np.where(nos == viz, 0.0, pesos[a:b])
+
+    # K[i, C] = soma dos pesos de i para a comunidade C: mesma estrutura de
+    # linhas da CSR, colunas = comunidade do vizinho, duplicatas somadas
+    K = csr_matrix((w, c[viz], indptr[ini:fim + 1] - a), shape=(fim - ini, len(tot)))
+    K.sum_duplicates()
+    linhas = np.repeat(np.arange(fim - ini), np.diff(K.indptr))
+    no_ch = linhas + ini
+    com_ch = K.indices
+    k_in = K.data
+
+    # ficar: k_i,a - γ k_i (tot_a - k_i) / 2m
+    k = graus[ini:fim]
+    ficar = -resolucao * k * (tot[c[ini:fim]] - k) / m2
+    mesma = com_ch == c[no_ch]
+    ficar[linhas[mesma]] += k_in[mesma]
+
+    # ir para b: k_i,b - γ k_i tot_b / 2m
+    score = k_in - resolucao * graus[no_ch] * tot[com_ch] / m2
+    score[mesma] = -np.inf
+    com_linhas = np.flatnonzero(np.diff(K.indptr) > 0)
+    if len(com_linhas) == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio.copy(), np.empty(0)
+
+    # melhor por nó; colunas ordenadas, então o primeiro máximo é o de menor
+    # rótulo (desempate determinístico)
+    maximo = np.full(fim - ini, -np.inf)
+    maximo[com_linhas] = np.maximum.reduceat(score, K.indptr[com_linhas])
+    cand = np.flatnonzero(score == maximo[linhas])
+    primeiro = cand[np.r_[True, linhas[cand][1:] != linhas[cand][:-1]]]
+    nos_m = no_ch[primeiro]
+    ganhos = score[primeiro] - ficar[linhas[primeiro]]
+
+    pos = ganhos > 1e-12 * max(m2, 1.0)
+    return nos_m[pos], com_ch[primeiro][pos], ganhos[pos]
+
+
+def _anexo(descritor):
+    chave = tuple(sorted(v[0] for v in descritor.values()))
+    if chave not in _ANEXOS:
+        for blocos, _ in _ANEXOS.values():
+            liberar(blocos)
+        _ANEXOS.clear()
+        _ANEXOS[chave] = anexar_arrays(descritor)
+    return _ANEXOS[chave][1]
+
+
+def _tarefa_movimentos(descritor, m2, ini, fim, resolucao):
+    g = _anexo(descritor)
+    return _melhores_movimentos(g['indptr'], g['indices'], g['pesos'], g['graus'],
+                                g['c'], g['tot'], m2, ini, fim, resolucao)
+
+
+def _faixas(indptr, partes):
+    """Divide os nós em `partes` faixas contíguas com nº de arestas parecido."""
+    n = len(indptr) - 1
+    alvo = np.linspace(0, indptr[-1], partes + 1)
+    cortes = np.unique(np.concatenate([[0], np.searchsorted(indptr, alvo[1:-1]), [n]]))
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def mover_nos(indptr, indices, pesos, rng, resolucao=1.0, max_rodadas=200, tol=1e-7,
+              pool=None, workers=1):
+    """
+    Fase de movimentos locais de um nível, partindo de singletons.
+    Retorna (rotulos compactos, modularidade, houve_melhora).
+    """
+    n = len(indptr) - 1
+    m2 = float(pesos.sum())
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    graus = np.bincount(src, weights=pesos, minlength=n)
+    c = np.arange(n)
+    q = modularidade(indptr, indices, pesos, c, resolucao, src, graus)
+    q_inicial = q
+
+    blocos = None
+    if pool is not None and n >= MIN_NOS_PARALELO:
+        blocos, descritor = compartilhar_arrays(indptr=indptr, indices=indices, pesos=pesos,
+                                                graus=graus, c=c, tot=graus)
+        # views de escrita do pai sobre c e tot (os workers só leem)
+        nomes = list(descritor)
+        c_sh = np.ndarray(n, dtype=c.dtype, buffer=blocos[nomes.index('c')].buf)
+        tot_sh = np.ndarray(n, dtype=np.float64, buffer=blocos[nomes.index('tot')].buf)
+        faixas = _faixas(indptr, workers * 4)
+
+    p = 1.0
+    try:
+        for _ in range(max_rodadas):
+            tot = np.bincount(c, weights=graus, minlength=n)
+            if blocos is None:
+                nos, destinos, ganhos = _melhores_movimentos(indptr, indices, pesos, graus, c, tot,
+                                                             m2, 0, n, resolucao)
+            else:
+                c_sh[:] = c
+                tot_sh[:] = tot
+                partes = list(pool.map(_tarefa_movimentos, *zip(*[
+                    (descritor, m2, ini, fim, resolucao) for ini, fim in faixas])))
+                nos = np.concatenate([r[0] for r in partes])
+                destinos = np.concatenate([r[1] for r in partes])
+            if len(nos) == 0:
+                break
+
+            # subconjunto aleatório dos candidatos; se a rodada piorar, reduz a fração
+            while p >= 1 / 64:
+                sorteio = rng.random(len(nos)) < p
+                if not sorteio.any():
+                    sorteio[rng.integers(len(nos))] = True
+                novo = c.copy()
+                novo[nos[sorteio]] = destinos[sorteio]
+                q_novo = modularidade(indptr, indices, pesos, novo, resolucao, src, graus)
+                if q_novo > q + tol:
+                    break
+                p /= 2
+            else:
+                break
+            c, q = novo, q_novo
+            p = min(1.0, p * 2)
+    finally:
+        if blocos is not None:
+            liberar(blocos, remover=True)
+
+    _, rotulos = np.unique(c, return_inverse=True)
+    return rotulos, q, q > q_inicial + tol
+
+
+def agregar(W, rotulos):
+    """Grafo das comunidades: W' = Pᵀ W P (P = indicadora n × C)."""
+    n = W.shape[0]
+    C = int(rotulos.max()) + 1
+    P = csr_matrix((np.ones(n), (np.arange(n), rotulos)), shape=(n, C))
+    Wc = (P.T @ W @ P).tocsr()
+    Wc.sort_indices()
+    return Wc
+
+
+def louvain_csr(A, seed=SEED, resolucao=1.0, workers=1, max_niveis=20, max_rodadas=200, tol=1e-7):
+    """
+    Louvain sobre a CSR simétrica `A` (pesos = A.data).
+    `workers > 1` distribui o cálculo dos movimentos dos níveis com pelo
+    menos MIN_NOS_PARALELO nós entre processos (grafo em memória
+    compartilhada). Retorna (rotulos, modularidade, niveis).
+    """
+    W = csr_matrix(A, dtype=np.float64, copy=True)
+    W.sort_indices()
+    n = W.shape[0]
+    rng = np.random.default_rng(seed)
+    rotulos = np.arange(n)
+    q = modularidade(W.indptr, W.indices, W.data, rotulos, resolucao)
+    niveis = 0
+    if W.data.sum() == 0:
+        return rotulos, q, niveis
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while niveis < max_niveis:
+            r, q_nivel, melhorou = mover_nos(W.indptr, W.indices, W.data, rng, resolucao,
+                                             max_rodadas, tol, pool, workers)
+            if not melhorou:
+                break
+            rotulos = r[rotulos]
+            q = q_nivel
+            niveis += 1
+            if r.max() + 1 == W.shape[0]:
+                break
+            W = agregar(W, r)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return rotulos, q, niveis
@@ -1,39 +1,145 @@
 import os
+import sys
+import argparse
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
-from sklearn.cluster import SpectralClustering
+from scipy.sparse import csr_matrix, diags
+from scipy.sparse.linalg import eigsh, lobpcg
+from sklearn.cluster import KMeans
 
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-grafo_path = os.path.join(base_dir, 'data', 'grafo', 'grafo_area_maior.graphml')
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+from graph.grafo_binario import carregar_grafo
+from graph.grafo_csr import arestas_csr
+import renderizacao
+
+grafo_dir = os.path.join(base_dir, 'data', 'grafo')
+grafo_path = os.path.join(grafo_dir, 'grafo_area_maior.graphml')
 saida_dir = os.path.join(base_dir, 'data', 'cluster', 'spectral')
-os.makedirs(saida_dir, exist_ok=True)
 
-G = nx.read_graphml(grafo_path)
-G = nx.convert_node_labels_to_integers(G)
-adj_matrix = nx.to_numpy_array(G)
 
-n_clusters = 5
-modelo = SpectralClustering(n_clusters=n_clusters, affinity='precomputed', assign_labels='kmeans', random_state=42)
-labels = modelo.fit_predict(adj_matrix)
+def afinidade_esparsa(A, estados=None, pesos='distancia', sigma_d=None, sigma_v=None):
+    """
+    Afinidade W com o mesmo padrão de esparsidade do grafo ε-ball `A`
+    (A.data = distâncias):
+      - 'binario': w = 1 em cada aresta
+      - 'distancia': w = exp(-d² / 2σ_d²)
+      - 'distancia_velocidade': w = exp(-d² / 2σ_d²) · exp(-Δv² / 2σ_v²)
+    σ_d e σ_v, se omitidos, são as medianas de d e |Δv| nas arestas.
+    """
+    n = A.shape[0]
+    indptr = np.asarray(A.indptr)
+    indices = np.asarray(A.indices)
+    w = np.ones(len(indices), dtype=np.float64)
+
+    if pesos in ('distancia', 'distancia_velocidade'):
+        d = np.asarray(A.data, dtype=np.float64)
+        sigma_d = sigma_d or (float(np.median(d)) if len(d) else 1.0) or 1.0
+        w *= np.exp(-d ** 2 / (2 * sigma_d ** 2))
+    if pesos == 'distancia_velocidade':
+        if estados is None:
+            raise ValueError("pesos='distancia_velocidade' requer a tabela de estados")
+        vel = np.asarray(estados[:, 2], dtype=np.float64)
+        linhas = np.repeat(np.arange(n), np.diff(indptr))
+        dv = np.abs(vel[linhas] - vel[indices])
+        sigma_v = sigma_v or (float(np.median(dv)) if len(dv) else 1.0) or 1.0
+        w *= np.exp(-dv ** 2 / (2 * sigma_v ** 2))
+    elif pesos not in ('binario', 'distancia'):
+        raise ValueError(f"pesos desconhecido: {pesos}")
+
+    return csr_matrix((w, indices, indptr), shape=(n, n))
+
+
+def embedding_espectral(W, n_clusters, seed=42, solver='eigsh', tol=1e-5, max_iter=500):
+    """
+    Os `n_clusters` autovetores dominantes de M = D^-1/2 W D^-1/2 (os menores
+    do Laplaciano normalizado), sem densificar W.
+    Chute inicial: sqrt(grau), autovetor exato de M para o autovalor 1 em
+    grafos conexos. No lobpcg ele é a primeira coluna do bloco inicial; no
+    eigsh (Lanczos) entra perturbado por ruído de semente fixa, já que partir
+    de um autovetor exato esgota o subespaço de Krylov na primeira iteração.
+    """
+    n = W.shape[0]
+    grau = np.asarray(W.sum(axis=1)).ravel()
+    inv_sqrt = np.zeros(n)
+    inv_sqrt[grau > 0] = 1.0 / np.sqrt(grau[grau > 0])
+    M = diags(inv_sqrt) @ W @ diags(inv_sqrt)
+
+    rng = np.random.default_rng(seed)
+    chute = np.sqrt(grau)
+    chute /= np.linalg.norm(chute) or 1.0
+
+    # lobpcg precisa de n bem maior que o bloco; grafos pequenos vão de eigsh
+    if solver == 'eigsh' or n < 5 * (n_clusters + 1):
+        v0 = chute * (1.0 + 0.5 * rng.standard_normal(n))
+        _, U = eigsh(M, k=n_clusters, which='LA', v0=v0, tol=tol)
+        return U
+    if solver != 'lobpcg':
+        raise ValueError(f"solver desconhecido: {solver}")
+
+    X0 = rng.standard_normal((n, n_clusters))
+    X0[:, 0] = chute
+    _, U = lobpcg(M, X0, largest=True, tol=tol, maxiter=max_iter)
+    return U
+
+
+def executar_spectral(A, n_clusters=5, seed=42, estados=None, pesos='distancia', solver='eigsh'):
+    """
+    Spectral clustering (Ng-Jordan-Weiss) sobre a afinidade esparsa do grafo
+    ε-ball: embedding pelos autovetores de D^-1/2 W D^-1/2, linhas
+    normalizadas e KMeans. Memória O(n·k + arestas).
+    """
+    W = afinidade_esparsa(A, estados=estados, pesos=pesos)
+    U = embedding_espectral(W, n_clusters, seed=seed, solver=solver)
+    normas = np.linalg.norm(U, axis=1, keepdims=True)
+    U = U / np.where(normas > 0, normas, 1.0)
+    return KMeans(n_clusters=n_clusters, random_state=seed, n_init='auto').fit_predict(U)
+
+
+def salvar_resultados(A, estados, labels, n_clusters, saida_dir=saida_dir, desenhar=True):
+    os.makedirs(saida_dir, exist_ok=True)
+    np.save(os.path.join(saida_dir, 'spectral_labels.npy'), labels)
+
+    if desenhar:
+        i, j, _ = arestas_csr(A)
+        renderizacao.agendar(renderizacao.figura_grafo, os.path.join(saida_dir, 'spectral_clusters.png'),
+                             estados[:, :2], i, j, cores=labels, cmap='tab10', tamanho_no=25,
+                             titulo=f"Spectral Clustering - Robôs com base no grafo (k={n_clusters})",
+                             figsize=(10, 8))
+
+    with open(os.path.join(saida_dir, 'spectral_resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write("Clusterização Spectral - Grafo dos Robôs\n\n")
+        f.write(f"Nós: {A.shape[0]}\n")
+        f.write(f"Arestas: {A.nnz // 2}\n")
+        unique, counts = np.unique(labels, return_counts=True)
+        for u, c in zip(unique, counts):
+            f.write(f"Cluster {u}: {c} nós\n")
+
+
+def pasta_grafo(args):
+    """--grafo-dir, senão o grafo ε-ball da instância (data/grafo/epsilon_...), senão o GraphML antigo."""
+    if args.grafo_dir:
+        return args.grafo_dir
+    if args.num_robos:
+        return os.path.join(base_dir, 'data', 'grafo', f"epsilon_{args.raio:.1f}_{args.num_robos}_seed{args.seed}")
+    return grafo_dir
 
-np.save(os.path.join(saida_dir, 'spectral_labels.npy'), labels)
 
-pos = {i: (float(G.nodes[i]['x']), float(G.nodes[i]['y'])) for i in G.nodes}
+def main():
+    parser = argparse.ArgumentParser(description="Baseline Spectral sobre o grafo dos robôs")
+    parser.add_argument("--grafo-dir", default=None,
+                        help="Pasta do grafo (padrão: a de --num-robos/--raio/--seed, como em pipeline baselines)")
+    parser.add_argument("--num-robos", type=int, default=None)
+    parser.add_argument("--raio", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--k", type=int, default=5, help="Número de clusters")
+    args = parser.parse_args()
 
-plt.figure(figsize=(10, 8))
-nx.draw(G, pos, node_color=labels, node_size=25, cmap='tab10', with_labels=False, edge_color='lightgray')
-plt.title(f"Spectral Clustering - Robôs com base no grafo (k={n_clusters})")
-plt.tight_layout()
-plt.savefig(os.path.join(saida_dir, 'spectral_clusters.png'))
-plt.close()
+    A, estados = carregar_grafo(pasta_grafo(args), graphml=os.path.basename(grafo_path))
+    n_clusters = args.k
+    labels = executar_spectral(A, n_clusters=n_clusters, seed=args.seed)
+    salvar_resultados(A, estados, labels, n_clusters)
+    print("Clusterização Spectral concluída e arquivos salvos.")
 
-with open(os.path.join(saida_dir, 'spectral_resumo.txt'), 'w', encoding='utf-8') as f:
-    f.write("Clusterização Spectral - Grafo dos Robôs\n\n")
-    f.write(f"Nós: {G.number_of_nodes()}\n")
-    f.write(f"Arestas: {G.number_of_edges()}\n")
-    unique, counts = np.unique(labels, return_counts=True)
-    for u, c in zip(unique, counts):
-        f.write(f"Cluster {u}: {c} nós\n")
 
-print("Clusterização Spectral concluída e arquivos salvos.")
+if __name__ == '__main__':
+    main()
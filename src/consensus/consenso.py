@@ -0,0 +1,247 @@
+"""
+Partição de consenso a partir de várias clusterizações base.
+
+A coocorrência é mantida como contagens (nº de rodadas com i e j no mesmo
+cluster) e cresce uma rodada por vez: cada novo vetor de rótulos só soma
+1 aos pares que ele co-clusteriza, sem reler as rodadas anteriores. O
+estado (contagens + nomes das rodadas já somadas) vai para um .npz, então
+dá para acrescentar dezenas de execuções (seeds, k) ao longo do tempo.
+Cada rodada é identificada pelo arquivo de origem mais um hash da partição
+(ou por --nome): somar de novo o mesmo arquivo só é ignorado se o conteúdo
+não mudou, e arquivos diferentes com a mesma partição (seeds que convergem
+para o mesmo agrupamento, métodos que concordam) contam um voto cada.
+
+Dois modos:
+  - completo: todos os pares co-clusterizados (triângulo superior, CSR);
+  - arestas: só os pares (i, j) fixados na criação (ex.: arestas ε-ball).
+
+Consenso: componentes conexas dos pares com frequência >= limiar, ou
+Louvain nativo (cluster_baselines/louvain_csr.py) sobre as frequências.
+"""
+import os
+import sys
+import hashlib
+import argparse
+import numpy as np
+from scipy.sparse import csr_matrix, coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+from consensus.construir_coocorrencia import (
+    matriz_indicadora, triu_produto, carregar_arestas_epsilon, salvar_coocorrencia,
+    cluster_base, metodos,
+)
+from cluster_baselines.louvain_csr import louvain_csr, simetrizar
+
+estado_path = os.path.join(base_dir, 'data', 'coocorrencia', 'consenso_estado.npz')
+saida_dir = os.path.join(cluster_base, 'consenso')
+
+PARTICOES = ('limiar', 'louvain')
+
+
+def hash_particao(labels):
+    """
+    SHA-1 da partição: os rótulos são renumerados pela ordem da primeira
+    ocorrência, então a mesma partição com outros números de cluster tem
+    o mesmo hash.
+    """
+    _, primeiro, codigos = np.unique(np.asarray(labels).ravel(), return_index=True,
+                                     return_inverse=True)
+    canonico = np.argsort(np.argsort(primeiro))[codigos.ravel()].astype(np.int64)
+    return hashlib.sha1(canonico.tobytes()).hexdigest()
+
+
+def nome_rodada(caminho, labels):
+    """Nome padrão de uma rodada: caminho absoluto do arquivo + hash da partição."""
+    return f"{os.path.abspath(caminho)}@sha1:{hash_particao(labels)}"
+
+
+class CoocorrenciaIncremental:
+    """
+    Contagens de coocorrência acumuladas rodada a rodada.
+    No modo completo cada rodada só guarda seus pares (blocos COO do
+    triângulo superior); a soma com as contagens acumuladas é feita uma
+    vez, quando `C` é lida (pesos/salvar), e não a cada rodada.
+    """
+
+    def __init__(self, n, i=None, j=None):
+        self.n = n
+        self.rodadas = []
+        if i is None:
+            self.i = self.j = None
+            self._C = csr_matrix((n, n), dtype=np.int32)
+            self._pendentes = []
+        else:
+            self.i = np.asarray(i, dtype=np.int64)
+            self.j = np.asarray(j, dtype=np.int64)
+            self.contagens = np.zeros(len(self.i), dtype=np.int32)
+
+    @property
+    def m(self):
+        return len(self.rodadas)
+
+    @property
+    def C(self):
+        """Contagens do triângulo superior em CSR (soma os blocos pendentes)."""
+        if self._pendentes:
+            blocos = [self._C.tocoo()] + self._pendentes
+            self._C = coo_matrix((np.concatenate([b.data for b in blocos]),
+                                  (np.concatenate([b.row for b in blocos]),
+                                   np.concatenate([b.col for b in blocos]))),
+                                 shape=(self.n, self.n)).tocsr()
+            self._pendentes = []
+        return self._C
+
+    @C.setter
+    def C(self, C):
+        self._C = C
+        self._pendentes = []
+
+    def adicionar(self, labels, nome=None):
+        """
+        Soma uma clusterização. Rodadas com `nome` já presente são ignoradas
+        (retorna False), para que reexecutar o script não conte em dobro.
+        """
+        labels = np.asarray(labels).ravel()
+        if len(labels) != self.n:
+            raise ValueError(f"rótulos com {len(labels)} nós; esperado {self.n}")
+        nome = nome or f"rodada_{self.m}"
+        if nome in self.rodadas:
+            return False
+        if self.i is None:
+            H = matriz_indicadora(labels)
+            self._pendentes.append(triu_produto(H).tocoo().astype(np.int32))
+        else:
+            self.contagens += labels[self.i] == labels[self.j]
+        self.rodadas.append(nome)
+        return True
+
+    def pesos(self):
+        """(i, j, frequência) dos pares com contagem > 0, i < j."""
+        if self.i is None:
+            C = self.C.tocoo()
+            return C.row.astype(np.int64), C.col.astype(np.int64), C.data / max(self.m, 1)
+        mask = self.contagens > 0
+        return self.i[mask], self.j[mask], self.contagens[mask] / max(self.m, 1)
+
+    def matriz(self, limiar=0.0):
+        """Frequências como CSR simétrica, só pares com frequência >= limiar."""
+        i, j, w = self.pesos()
+        mask = w >= limiar
+        return simetrizar(csr_matrix((w[mask], (i[mask], j[mask])), shape=(self.n, self.n)))
+
+    def salvar(self, caminho):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        comum = dict(n=self.n, rodadas=np.array(self.rodadas, dtype=str))
+        if self.i is None:
+            self.C.sort_indices()
+            np.savez(caminho, modo='completo', indptr=self.C.indptr, indices=self.C.indices,
+                     contagens=self.C.data, **comum)
+        else:
+            np.savez(caminho, modo='arestas', i=self.i, j=self.j, contagens=self.contagens, **comum)
+
+    @classmethod
+    def carregar(cls, caminho):
+        z = np.load(caminho)
+        n = int(z['n'])
+        if str(z['modo']) == 'completo':
+            co = cls(n)
+            co.C = csr_matrix((z['contagens'], z['indices'], z['indptr']), shape=(n, n))
+        else:
+            co = cls(n, z['i'], z['j'])
+            co.contagens = z['contagens']
+        co.rodadas = z['rodadas'].tolist()
+        return co
+
+
+def consenso_limiar(co, limiar=0.5):
+    """Componentes conexas dos pares co-clusterizados em >= limiar das rodadas."""
+    _, rotulos = connected_components(co.matriz(limiar), directed=False)
+    return rotulos
+
+
+def consenso_louvain(co, limiar=0.0, seed=42, resolucao=1.0, workers=1):
+    """Louvain sobre as frequências de coocorrência (pares abaixo do limiar descartados)."""
+    rotulos, _, _ = louvain_csr(co.matriz(limiar), seed=seed, resolucao=resolucao, workers=workers)
+    return rotulos
+
+
+def particao_consenso(co, particao='limiar', limiar=0.5, seed=42, resolucao=1.0, workers=1):
+    if particao == 'limiar':
+        return consenso_limiar(co, limiar)
+    if particao == 'louvain':
+        return consenso_louvain(co, limiar, seed=seed, resolucao=resolucao, workers=workers)
+    raise ValueError(f"partição desconhecida: {particao}")
+
+
+def salvar_resultados(labels, co, particao, limiar, saida_dir=saida_dir):
+    os.makedirs(saida_dir, exist_ok=True)
+    np.save(os.path.join(saida_dir, 'consenso_labels.npy'), labels)
+    with open(os.path.join(saida_dir, 'consenso_resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write("Partição de consenso (coocorrência)\n\n")
+        f.write(f"Nós: {co.n}\n")
+        f.write(f"Rodadas somadas: {co.m}\n")
+        f.write(f"Partição: {particao} (limiar {limiar})\n")
+        f.write(f"Total de clusters: {len(np.unique(labels))}\n")
+        for nome in co.rodadas:
+            f.write(f"  - {nome}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Coocorrência incremental e partição de consenso')
+    parser.add_argument('--estado', default=estado_path, help='.npz com as contagens acumuladas')
+    parser.add_argument('--rotulos', nargs='*', default=[],
+                        help='Arquivos .npy de rótulos a somar (cada um conta uma rodada)')
+    parser.add_argument('--nome', nargs='*', default=None,
+                        help='Nome de cada rodada, na ordem dos arquivos (padrão: arquivo + hash da partição)')
+    parser.add_argument('--metodos', nargs='*', default=None,
+                        help=f'Soma data/cluster/<metodo>/<metodo>_labels.npy (padrão sem --rotulos: {metodos})')
+    parser.add_argument('--grafo-dir', default=None,
+                        help='Ao criar o estado: restringe os pares às arestas deste grafo ε-ball')
+    parser.add_argument('--novo', action='store_true', help='Descarta o estado existente')
+    parser.add_argument('--particao', choices=PARTICOES, default='limiar')
+    parser.add_argument('--limiar', type=float, default=0.5)
+    parser.add_argument('--resolucao', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--exportar', action='store_true',
+                        help='Também grava matriz_coocorrencia.npz / CSV (entrada de louvain --pesos coocorrencia)')
+    args = parser.parse_args()
+
+    arquivos = list(args.rotulos)
+    for metodo in (args.metodos if args.metodos is not None else ([] if arquivos else metodos)):
+        arquivos.append(os.path.join(cluster_base, metodo, f'{metodo}_labels.npy'))
+    if args.nome is not None and len(args.nome) != len(arquivos):
+        parser.error(f"--nome recebeu {len(args.nome)} nomes para {len(arquivos)} arquivos de rótulos")
+
+    co = None
+    if os.path.exists(args.estado) and not args.novo:
+        co = CoocorrenciaIncremental.carregar(args.estado)
+    for k, caminho in enumerate(arquivos):
+        labels = np.load(caminho)
+        if co is None:
+            i = j = None
+            if args.grafo_dir:
+                i, j = carregar_arestas_epsilon(args.grafo_dir)
+            co = CoocorrenciaIncremental(len(labels), i, j)
+        nome = args.nome[k] if args.nome is not None else nome_rodada(caminho, labels)
+        if co.adicionar(labels, nome):
+            print(f"[consenso] somado: {caminho} ({nome})")
+        else:
+            print(f"[consenso] já somado: {caminho} ({nome})")
+    if co is None:
+        raise SystemExit("[consenso] nenhum estado nem rótulos para somar")
+    co.salvar(args.estado)
+
+    labels = particao_consenso(co, args.particao, args.limiar, seed=args.seed,
+                               resolucao=args.resolucao, workers=args.workers)
+    salvar_resultados(labels, co, args.particao, args.limiar)
+    if args.exportar:
+        i, j, w = co.pesos()
+        salvar_coocorrencia(co.n, i, j, w)
+    print(f"[consenso] {co.m} rodadas, {len(np.unique(labels))} clusters -> {saida_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,71 +1,175 @@
 import os
+import sys
+import argparse
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+from scipy.sparse import csr_matrix, coo_matrix, hstack, vstack, triu, save_npz
 
 # Diretórios
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, os.path.join(base_dir, 'src'))
+from graph.grafo_binario import existe_grafo_binario, carregar_grafo_binario
+
 cluster_base = os.path.join(base_dir, 'data', 'cluster')
 saida_dir = os.path.join(base_dir, 'data', 'coocorrencia')
-os.makedirs(saida_dir, exist_ok=True)
 
 # Métodos usados
 metodos = ['kmeans', 'agglomerativo', 'louvain', 'spectral']
 
-# Carrega rótulos
-rotulos = []
-for metodo in metodos:
-    caminho = os.path.join(cluster_base, metodo, f'{metodo}_labels.npy')
-    rotulos.append(np.load(caminho))
-
-# Número de nós
-n = len(rotulos[0])
-m = len(rotulos)
-
-# Inicializa matriz de coocorrência
-cooc = np.zeros((n, n), dtype=np.float32)
-
-# Para cada método, incrementa os pares (i, j) que aparecem juntos
-for labels in rotulos:
-    for cluster_id in np.unique(labels):
-        indices = np.where(labels == cluster_id)[0]
-        for i in indices:
-            for j in indices:
-                if i != j:
-                    cooc[i, j] += 1
-
-# Normaliza
-cooc /= m
-
-# Constrói o grafo
-G = nx.Graph()
-for i in range(n):
-    G.add_node(i)
-
-for i in range(n):
-    for j in range(i + 1, n):
-        if cooc[i, j] > 0:
-            G.add_edge(i, j, weight=cooc[i, j])
-
-# Salva grafo
-nx.write_graphml(G, os.path.join(saida_dir, 'grafo_coocorrencia.graphml'))
-np.save(os.path.join(saida_dir, 'matriz_coocorrencia.npy'), cooc)
-
-# CSV das arestas
-with open(os.path.join(saida_dir, 'grafo_coocorrencia_arestas.csv'), 'w', encoding='utf-8') as f:
-    f.write('source,target,peso\n')
-    for u, v, d in G.edges(data=True):
-        f.write(f'{u},{v},{d["weight"]:.3f}\n')
-
-# Visualização
-plt.figure(figsize=(10, 8))
-edges, weights = zip(*nx.get_edge_attributes(G, 'weight').items())
-pos = nx.spring_layout(G, seed=42, k=0.15)
-nx.draw(G, pos, node_size=15, node_color='skyblue', edge_color=weights,
-        edge_cmap=plt.cm.plasma, width=1.5, with_labels=False)
-plt.title('Grafo de Coocorrência (baseado em 4 clusterizações)')
-plt.tight_layout()
-plt.savefig(os.path.join(saida_dir, 'grafo_coocorrencia.png'))
-plt.close()
-
-print(f"Grafo de coocorrência salvo com {G.number_of_nodes()} nós e {G.number_of_edges()} arestas.")
+# Linhas de H·Hᵀ calculadas por vez (só o triângulo superior de cada bloco é guardado)
+BLOCO_LINHAS = 8192
+
+
+def carregar_rotulos(metodos, cluster_base=cluster_base):
+    """Carrega `<metodo>_labels.npy` de cada método."""
+    rotulos = []
+    for metodo in metodos:
+        caminho = os.path.join(cluster_base, metodo, f'{metodo}_labels.npy')
+        rotulos.append(np.load(caminho))
+    return rotulos
+
+
+def matriz_indicadora(labels):
+    """Matriz esparsa n×k com 1 em (i, cluster de i) — tabela de contingência nó×cluster."""
+    _, codigos = np.unique(labels, return_inverse=True)
+    n = len(labels)
+    return csr_matrix((np.ones(n, dtype=np.float32), (np.arange(n), codigos.ravel())),
+                      shape=(n, codigos.max() + 1))
+
+
+def triu_produto(H, bloco=BLOCO_LINHAS):
+    """
+    Triângulo superior estrito de H·Hᵀ em CSR, calculado por blocos de
+    linhas: o bloco [a, b) só é multiplicado pelas linhas >= a de H e o
+    triângulo inferior do bloco é descartado na hora, então nunca se
+    materializa a matriz simétrica inteira.
+    """
+    n = H.shape[0]
+    blocos = []
+    for a in range(0, n, bloco):
+        b = min(a + bloco, n)
+        T = triu(H[a:b] @ H[a:].T, k=1, format='csr')
+        blocos.append(csr_matrix((T.data, T.indices + a, T.indptr), shape=(b - a, n)))
+    if not blocos:
+        return csr_matrix((n, n), dtype=H.dtype)
+    return vstack(blocos, format='csr')
+
+
+def coocorrencia_esparsa(rotulos, limiar=0.0):
+    """
+    Coocorrência normalizada C[i, j] = (# métodos com i e j no mesmo cluster) / m,
+    montada como H·Hᵀ, onde H empilha as matrizes indicadoras de todos os
+    métodos. Retorna só o triângulo superior (i < j) em CSR; a memória é
+    proporcional ao número de pares co-clusterizados.
+    - limiar: mantém apenas pares com C[i, j] >= limiar
+    """
+    m = len(rotulos)
+    H = hstack([matriz_indicadora(l) for l in rotulos], format='csr')
+    C = triu_produto(H)
+    C.data /= m
+    if limiar > 0:
+        C.data[C.data < limiar] = 0
+        C.eliminate_zeros()
+    return C
+
+
+def coocorrencia_em_arestas(rotulos, i, j, limiar=0.0):
+    """
+    Coocorrência restrita aos pares (i, j) fornecidos (ex.: arestas do ε-ball).
+    Custa O(m·E) e nunca materializa pares fora da lista.
+    Retorna (i, j, pesos) já filtrados por `limiar` e sem pesos nulos.
+    """
+    contagem = np.zeros(len(i), dtype=np.float32)
+    for labels in rotulos:
+        contagem += labels[i] == labels[j]
+    contagem /= len(rotulos)
+    mask = (contagem > 0) & (contagem >= limiar)
+    return i[mask], j[mask], contagem[mask]
+
+
+def carregar_arestas_epsilon(grafo_dir):
+    """Lê (source, target) do artefato binário (ou do edges.csv) de construir_grafo."""
+    if existe_grafo_binario(grafo_dir):
+        A, _ = carregar_grafo_binario(grafo_dir)
+        coo = A.tocoo()
+        mask = coo.row < coo.col
+        return coo.row[mask], coo.col[mask]
+    arestas = np.loadtxt(os.path.join(grafo_dir, 'edges.csv'), delimiter=',',
+                         skiprows=1, usecols=(0, 1), dtype=np.int64, ndmin=2)
+    return arestas[:, 0], arestas[:, 1]
+
+
+def salvar_coocorrencia(n, i, j, pesos, saida_dir=saida_dir):
+    """Escreve a matriz esparsa (.npz) e o CSV de arestas em bloco."""
+    os.makedirs(saida_dir, exist_ok=True)
+    C = coo_matrix((pesos, (i, j)), shape=(n, n)).tocsr()
+    save_npz(os.path.join(saida_dir, 'matriz_coocorrencia.npz'), C)
+    np.savetxt(os.path.join(saida_dir, 'grafo_coocorrencia_arestas.csv'),
+               np.column_stack((i, j, pesos)), fmt=('%d', '%d', '%.3f'),
+               delimiter=',', header='source,target,peso', comments='',
+               encoding='utf-8')
+    return C
+
+
+def salvar_matriz_densa(n, i, j, pesos, saida_dir=saida_dir):
+    """Formato antigo: matriz_coocorrencia.npy densa e simétrica (n×n float32)."""
+    cooc = np.zeros((n, n), dtype=np.float32)
+    cooc[i, j] = pesos
+    cooc[j, i] = pesos
+    np.save(os.path.join(saida_dir, 'matriz_coocorrencia.npy'), cooc)
+
+
+def salvar_graphml_e_figura(n, i, j, pesos, m, saida_dir=saida_dir, desenhar=True):
+    """GraphML e figura (spring layout) — só viável em instâncias pequenas."""
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_weighted_edges_from(zip(i.tolist(), j.tolist(), pesos.tolist()))
+    nx.write_graphml(G, os.path.join(saida_dir, 'grafo_coocorrencia.graphml'))
+    if not desenhar or G.number_of_edges() == 0:
+        return
+
+    plt.figure(figsize=(10, 8))
+    edges, weights = zip(*nx.get_edge_attributes(G, 'weight').items())
+    pos = nx.spring_layout(G, seed=42, k=0.15)
+    nx.draw(G, pos, node_size=15, node_color='skyblue', edge_color=weights,
+            edge_cmap=plt.cm.plasma, width=1.5, with_labels=False)
+    plt.title(f'Grafo de Coocorrência (baseado em {m} clusterizações)')
+    plt.tight_layout()
+    plt.savefig(os.path.join(saida_dir, 'grafo_coocorrencia.png'))
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Grafo de coocorrência (esparso)')
+    parser.add_argument('--metodos', nargs='+', default=metodos)
+    parser.add_argument('--limiar', type=float, default=0.0,
+                        help='Mantém apenas pares com coocorrência >= limiar (0 a 1)')
+    parser.add_argument('--grafo-dir', default=None,
+                        help='Pasta do grafo ε-ball; restringe os pares às suas arestas')
+    parser.add_argument('--legado', action='store_true',
+                        help='Também grava os artefatos antigos: matriz_coocorrencia.npy densa '
+                             'e simétrica, GraphML e figura (só instâncias pequenas)')
+    args = parser.parse_args()
+
+    rotulos = carregar_rotulos(args.metodos)
+    n = len(rotulos[0])
+    m = len(rotulos)
+
+    if args.grafo_dir:
+        i, j = carregar_arestas_epsilon(args.grafo_dir)
+        i, j, pesos = coocorrencia_em_arestas(rotulos, i, j, limiar=args.limiar)
+    else:
+        C = coocorrencia_esparsa(rotulos, limiar=args.limiar).tocoo()
+        i, j, pesos = C.row, C.col, C.data
+
+    salvar_coocorrencia(n, i, j, pesos)
+    if args.legado:
+        salvar_matriz_densa(n, i, j, pesos)
+        salvar_graphml_e_figura(n, i, j, pesos, m)
+
+    print(f"Grafo de coocorrência salvo com {n} nós e {len(i)} arestas.")
+
+
+if __name__ == '__main__':
+    main()
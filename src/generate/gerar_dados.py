@@ -1,13 +1,111 @@
 #!/usr/bin/env python3
 import numpy as np
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from tools.io_utils import gerar_nome_pasta
-from noise import pnoise2
-import matplotlib.pyplot as plt
+from perfil import etapa
+import renderizacao
 
-def gerar_densidade_perlin(tamanho, escala, octaves, seed):
+# Gradientes do Perlin "improved" (as mesmas 16 direções do noise.pnoise2). A
+# permutação, porém, vem de RandomState(seed) (_permutacao), não da tabela fixa
+# do pnoise2: o campo não é o do pnoise2, e a mesma seed gera um conjunto de
+# dados diferente do gerado pela versão com pnoise2.
+_GRAD2 = np.array([
+    (1, 1), (-1, 1), (1, -1), (-1, -1), (1, 0), (-1, 0), (1, 0), (-1, 0),
+    (0, 1), (0, -1), (0, 1), (0, -1), (1, 1), (0, -1), (-1, 1), (0, -1),
+], dtype=np.float64)
+
+# Células avaliadas por bloco (limita a memória temporária de cada worker)
+CELULAS_POR_BLOCO = 1 << 20
+
+def _permutacao(seed):
+    perm = np.random.RandomState(seed).permutation(256)
+    return np.concatenate([perm, perm])
+
+def _fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+def _ruido2(x, y, perm, periodo_x, periodo_y):
+    """Perlin 2D em grade: x (linhas) e y (colunas) são vetores 1D; retorna len(x)×len(y)."""
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    xf = (x - x0)[:, None]
+    yf = (y - y0)[None, :]
+    xi0 = np.mod(x0, periodo_x).astype(np.int64)
+    yi0 = np.mod(y0, periodo_y).astype(np.int64)
+    xi1 = np.mod(xi0 + 1, periodo_x) & 255
+    yi1 = np.mod(yi0 + 1, periodo_y) & 255
+    xi0 &= 255
+    yi0 &= 255
+
+    def grad(xi, yi, dx, dy):
+        g = _GRAD2[perm[perm[xi][:, None] + yi[None, :]] & 15]
+        return g[..., 0] * dx + g[..., 1] * dy
+
+    u = _fade(xf)
+    v = _fade(yf)
+    n00 = grad(xi0, yi0, xf, yf)
+    n10 = grad(xi1, yi0, xf - 1, yf)
+    n01 = grad(xi0, yi1, xf, yf - 1)
+    n11 = grad(xi1, yi1, xf - 1, yf - 1)
+    nx0 = n00 + u * (n10 - n00)
+    nx1 = n01 + u * (n11 - n01)
+    return nx0 + v * (nx1 - nx0)
+
+def _perlin_bloco(args):
+    """Avalia as linhas [i0, i1) da grade com todas as oitavas (roda no worker)."""
+    i0, i1, tamanho, escala, octaves, seed, periodo, persistencia, lacunaridade = args
+    perm = _permutacao(seed)
+    x = np.arange(i0, i1, dtype=np.float64) / escala
+    y = np.arange(tamanho, dtype=np.float64) / escala
+    total = np.zeros((i1 - i0, tamanho))
+    freq, amp, amp_total = 1.0, 1.0, 0.0
+    for _ in range(octaves):
+        p = max(1, int(round(periodo * freq)))
+        total += amp * _ruido2(x * freq, y * freq, perm, p, p)
+        amp_total += amp
+        freq *= lacunaridade
+        amp *= persistencia
+    return (total / amp_total).astype(np.float32)
+
+def gerar_densidade_perlin(tamanho, escala, octaves, seed, workers=None,
+                           persistencia=0.5, lacunaridade=2.0, periodo=None):
+    """
+    Campo de densidade Perlin tamanho×tamanho em [0, 1] (float32), vetorizado.
+    - escala, octaves: como em pnoise2(i/escala, j/escala, octaves=...)
+    - periodo: período da grade de gradientes (padrão = tamanho, como o
+      repeatx/repeaty usado antes); escalado por oitava
+    - workers: processos para avaliar os blocos de linhas (None = todos os
+      núcleos). O resultado depende só da seed, não do número de workers.
+    """
+    periodo = tamanho if periodo is None else periodo
+    linhas = max(1, CELULAS_POR_BLOCO // tamanho)
+    blocos = [(i0, min(i0 + linhas, tamanho), tamanho, escala, octaves, seed,
+               periodo, persistencia, lacunaridade)
+              for i0 in range(0, tamanho, linhas)]
+    workers = os.cpu_count() if workers is None else workers
+
+    dens = np.empty((tamanho, tamanho), dtype=np.float32)
+    executor = None
+    if workers > 1 and len(blocos) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(blocos)))
+    with executor or nullcontext():
+        resultados = executor.map(_perlin_bloco, blocos) if executor else map(_perlin_bloco, blocos)
+        for (i0, i1, *_), bloco in zip(blocos, resultados):
+            dens[i0:i1] = bloco
+
+    dens -= dens.min()
+    dens /= dens.max()
+    return dens
+
+def gerar_densidade_perlin_pnoise2(tamanho, escala, octaves, seed):
+    """Implementação de referência (uma chamada a pnoise2 por célula)."""
+    from noise import pnoise2
     np.random.seed(seed)
     dens = np.zeros((tamanho, tamanho))
     for i in range(tamanho):
@@ -19,35 +117,70 @@ def gerar_densidade_perlin(tamanho, escala, octaves, seed):
     dens /= dens.max()
     return dens
 
-def amostrar_por_densidade(densidade, n_amostras, seed=42):
+def _sortear_celulas(densidade, acum_linhas, n):
+    """
+    Sorteia n índices planos com probabilidade proporcional à densidade,
+    em dois níveis: linha pela CDF das somas por linha e coluna pela CDF da
+    própria linha (calculada só para as linhas sorteadas).
+    """
+    lado_j = densidade.shape[1]
+    r = np.random.uniform(0, acum_linhas[-1], size=n)
+    linhas = np.minimum(np.searchsorted(acum_linhas, r, side='right'), len(acum_linhas) - 1)
+    resto = r - np.concatenate(([0.0], acum_linhas[:-1]))[linhas]
+    colunas = np.empty(n, dtype=np.int64)
+    ordem = np.argsort(linhas, kind='stable')
+    ls = linhas[ordem]
+    cortes = np.flatnonzero(np.r_[True, ls[1:] != ls[:-1], True])
+    for a, b in zip(cortes[:-1], cortes[1:]):
+        acum = np.cumsum(densidade[ls[a]], dtype=np.float64)
+        sel = ordem[a:b]
+        colunas[sel] = np.searchsorted(acum, resto[sel], side='right')
+    np.minimum(colunas, lado_j - 1, out=colunas)
+    return linhas * lado_j + colunas
+
+def amostrar_por_densidade(densidade, n_amostras, seed=42, replace=False):
+    """
+    Sorteia n_amostras células da grade com probabilidade proporcional à
+    densidade e devolve coordenadas contínuas (célula + jitter uniforme).
+    Nunca materializa a grade de coordenadas: os índices planos vêm de CDFs
+    acumuladas e viram (i, j) por divmod. Sem reposição, sorteia em lotes e
+    mantém a primeira ocorrência de cada célula na ordem do sorteio, o que
+    equivale ao sorteio sequencial sem reposição de np.random.choice.
+    """
     np.random.seed(seed)
-    tamanho = densidade.shape[0]
-    coords = np.array([(i, j) for i in range(tamanho) for j in range(tamanho)])
-    probs = densidade.flatten()
-    probs /= probs.sum()
-    idx = np.random.choice(len(coords), size=n_amostras, replace=False, p=probs)
-    selecionados = coords[idx] + np.random.uniform(0, 1, size=(n_amostras, 2))
+    lado_j = densidade.shape[1]
+    acum_linhas = np.cumsum(densidade.sum(axis=1, dtype=np.float64))
+    if not replace and n_amostras > np.count_nonzero(densidade):
+        raise ValueError("Menos células com densidade > 0 do que amostras pedidas")
+
+    if replace:
+        idx = _sortear_celulas(densidade, acum_linhas, n_amostras)
+    else:
+        idx = np.empty(0, dtype=np.int64)
+        while len(idx) < n_amostras:
+            faltam = n_amostras - len(idx)
+            lote = _sortear_celulas(densidade, acum_linhas, max(2 * faltam, 1024))
+            _, primeiros = np.unique(lote, return_index=True)
+            novos = lote[np.sort(primeiros)]
+            novos = novos[~np.isin(novos, idx)]
+            idx = np.concatenate([idx, novos[:faltam]])
+
+    i, j = np.divmod(idx, lado_j)
+    selecionados = np.column_stack((i, j)) + np.random.uniform(0, 1, size=(n_amostras, 2))
     return selecionados
 
-def gerar_dados_robos(seed, tamanho, lado):
+def gerar_estados(seed, tamanho, lado):
     """
-    Gera:
-     - dados em data/sinteticos/<nome>/
-     - robos.npy, quatro PNGs (scatter, hist velo, hist bat, heatmap densidade)
-     - resumo.txt
+    Gera a densidade Perlin e os estados dos robôs, sem gravar nada.
+    Retorna (estados, densidade); estados tem colunas x, y, v, θ, bateria.
     """
     np.random.seed(seed)
 
-    # ==== nome e pasta ====
-    base_dir = Path("data") / "sinteticos"
-    base_dir.mkdir(parents=True, exist_ok=True)
-    base_nome = f"robos_{tamanho}"
-    pasta_str = gerar_nome_pasta(str(base_dir), base_nome, seed)
-    path = Path(pasta_str)
-
     # ==== gerar densidade e posições ====
-    densidade = gerar_densidade_perlin(lado, escala=30, octaves=4, seed=seed)
-    posicoes = amostrar_por_densidade(densidade, n_amostras=tamanho, seed=seed)
+    with etapa("densidade", celulas=lado * lado):
+        densidade = gerar_densidade_perlin(lado, escala=30, octaves=4, seed=seed)
+    with etapa("amostragem", robos=tamanho, celulas=lado * lado):
+        posicoes = amostrar_por_densidade(densidade, n_amostras=tamanho, seed=seed)
 
     # ==== velocidades correlacionadas com densidade ====
     # índice inteiro para lookup
@@ -66,48 +199,46 @@ def gerar_dados_robos(seed, tamanho, lado):
     direcoes = np.random.uniform(0, 2 * np.pi, size=tamanho)
 
     estados = np.column_stack((posicoes, velocidades, direcoes, baterias))
-    np.save(path / "robos.npy", estados)
-
-    # ==== visualizações ====
-    x, y = posicoes[:, 0], posicoes[:, 1]
-
-    # scatter posição vs velocidade
-    plt.figure(figsize=(8, 6))
-    sc = plt.scatter(x, y, c=velocidades, cmap='viridis', s=10)
-    plt.colorbar(sc, label="Velocidade")
-    plt.title("Posições coloridas por velocidade")
-    plt.xlabel("X"); plt.ylabel("Y")
-    plt.tight_layout()
-    plt.savefig(path / "posicoes_velocidade.png")
-    plt.close()
-
-    # histograma de velocidades
-    plt.figure(figsize=(6, 4))
-    plt.hist(velocidades, bins=30, edgecolor='black')
-    plt.title("Histograma de velocidades")
-    plt.xlabel("Velocidade"); plt.ylabel("Frequência")
-    plt.tight_layout()
-    plt.savefig(path / "hist_velocidade.png")
-    plt.close()
-
-    # histograma de bateria
-    plt.figure(figsize=(6, 4))
-    plt.hist(baterias, bins=30, edgecolor='black', color='green')
-    plt.title("Histograma de bateria")
-    plt.xlabel("Bateria"); plt.ylabel("Frequência")
-    plt.tight_layout()
-    plt.savefig(path / "hist_bateria.png")
-    plt.close()
-
-    # heatmap de densidade
-    plt.figure(figsize=(6, 6))
-    im = plt.imshow(densidade, origin='lower', cmap='inferno')
-    plt.colorbar(im, label="Densidade")
-    plt.title("Heatmap da densidade (Perlin)")
-    plt.xlabel("X"); plt.ylabel("Y")
-    plt.tight_layout()
-    plt.savefig(path / "heatmap_densidade.png")
-    plt.close()
+    return estados, densidade
+
+def gerar_dados_robos(seed, tamanho, lado):
+    """
+    Gera:
+     - dados em data/sinteticos/<nome>/
+     - robos.npy, quatro PNGs (scatter, hist velo, hist bat, heatmap densidade)
+     - resumo.txt
+    """
+    # ==== nome e pasta ====
+    base_dir = Path("data") / "sinteticos"
+    base_dir.mkdir(parents=True, exist_ok=True)
+    base_nome = f"robos_{tamanho}"
+    pasta_str = gerar_nome_pasta(str(base_dir), base_nome, seed)
+    path = Path(pasta_str)
+
+    estados, densidade = gerar_estados(seed, tamanho, lado)
+    with etapa("salvar", robos=tamanho):
+        np.save(path / "robos.npy", estados)
+    posicoes = estados[:, :2]
+    velocidades = estados[:, 2]
+    baterias = estados[:, 4]
+
+    # ==== visualizações (no worker de fundo, se configurado) ====
+    if renderizacao.ativo():
+        with etapa("plots", robos=tamanho, celulas=lado * lado):
+            x, y = posicoes[:, 0], posicoes[:, 1]
+            renderizacao.agendar(renderizacao.figura_dispersao, str(path / "posicoes_velocidade.png"),
+                                 x, y, velocidades, cmap='viridis', tamanho=10,
+                                 titulo="Posições coloridas por velocidade", rotulo_barra="Velocidade",
+                                 xlabel="X", ylabel="Y")
+            renderizacao.agendar(renderizacao.figura_histograma, str(path / "hist_velocidade.png"),
+                                 velocidades, bins=30, xlabel="Velocidade", ylabel="Frequência",
+                                 titulo="Histograma de velocidades")
+            renderizacao.agendar(renderizacao.figura_histograma, str(path / "hist_bateria.png"),
+                                 baterias, bins=30, xlabel="Bateria", ylabel="Frequência",
+                                 titulo="Histograma de bateria", cor='green')
+            renderizacao.agendar(renderizacao.figura_imagem, str(path / "heatmap_densidade.png"),
+                                 densidade, cmap='inferno', titulo="Heatmap da densidade (Perlin)",
+                                 rotulo_barra="Densidade", xlabel="X", ylabel="Y")
 
     # ==== resumo.txt ====
     with open(path / "resumo.txt", "w", encoding="utf-8") as f:
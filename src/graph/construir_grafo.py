@@ -1,12 +1,55 @@
 import os
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
 from scipy.spatial import KDTree
-from matplotlib.colors import Normalize
-from matplotlib import cm
 
-def construir_grafo_epsilon_ball(num_robos, seed, raio, raio_max=200, passo=1.1):
+from graph.grafo_csr import (
+    pares_epsilon, montar_csr, numero_componentes, maior_componente,
+    salvar_edges_csv, csr_para_networkx, raio_minimo_conexo,
+)
+from graph.grafo_binario import salvar_grafo_binario
+from perfil import etapa
+import renderizacao
+
+def ajustar_raio(posicoes, raio, raio_max=200, passo=1.1, modo="varredura", itens=None):
+    """
+    Ajuste de ε usado por construir_grafo_epsilon_ball, sem E/S.
+    Devolve (A, (i, j, dist), ε final, nº de componentes, curva), onde
+    curva = (raios, componentes) no modo "exato" e None na varredura.
+    `itens` (dict opcional) recebe iteracoes/arestas/componentes.
+    """
+    itens = {} if itens is None else itens
+    n = len(posicoes)
+    tree = KDTree(posicoes)
+    curva = None
+    if modo == "exato":
+        i, j, dist = pares_epsilon(tree, posicoes, max(raio, raio_max))
+        itens["pares_candidatos"] = len(i)
+        eps_min, raios, componentes = raio_minimo_conexo(n, i, j, dist)
+        atual = max(raio, raio_max) if eps_min is None else max(raio, eps_min)
+        mask = dist <= atual
+        i, j, dist = i[mask], j[mask], dist[mask]
+        A = montar_csr(n, i, j, dist)
+        comps = numero_componentes(A)
+        curva = (raios, componentes)
+        itens["iteracoes"] = 1
+    else:
+        atual = raio
+        itens["iteracoes"] = 0
+        while True:
+            i, j, dist = pares_epsilon(tree, posicoes, atual)
+            A = montar_csr(n, i, j, dist)
+            comps = numero_componentes(A)
+            itens["iteracoes"] += 1
+            if comps == 1 or atual >= raio_max:
+                break
+            atual *= passo  # aumenta raio em 10%
+    itens.update(arestas=len(i), componentes=comps)
+    return A, (i, j, dist), atual, comps, curva
+
+def construir_grafo_epsilon_ball(num_robos, seed, raio, raio_max=200, passo=1.1,
+                                 exportar=("graphml", "csv"), desenhar=True,
+                                 modo="varredura"):
     """
     Constrói um grafo de visibilidade ε-ball com ajuste automático de raio.
     - num_robos: número de robôs (para montar paths)
@@ -14,6 +57,14 @@ def construir_grafo_epsilon_ball(num_robos, seed, raio, raio_max=200, passo=1.1)
     - raio: valor inicial de ε
     - raio_max: valor máximo que ε pode alcançar
     - passo: fator de multiplicação de ε a cada iteração (ex: 1.1 = +10%)
+    - exportar: formatos texto gerados a partir dos arrays ("graphml", "csv")
+    - desenhar: gera as figuras (via renderizacao; respeita o modo --plots)
+    - modo: "varredura" (multiplica ε por `passo` até conectar) ou "exato"
+      (menor ε >= raio que conecta, via aresta gargalo da floresta geradora
+      mínima dos pares até raio_max, numa única consulta à KDTree)
+
+    O grafo é mantido como adjacência CSR (pesos = distâncias); o nx.Graph
+    só é montado se GraphML for pedido.
     """
     # 1) Paths
     pasta_base = f"data/sinteticos/robos_{num_robos}_seed{seed}"
@@ -21,44 +72,39 @@ def construir_grafo_epsilon_ball(num_robos, seed, raio, raio_max=200, passo=1.1)
     os.makedirs(grafo_dir, exist_ok=True)
 
     # 2) Carrega estados
-    estados = np.load(os.path.join(pasta_base, "robos.npy"))
-    posicoes = estados[:, :2]
-    velocidades = estados[:, 2]  # coluna de velocidade
+    with etapa("carregar", nos=num_robos):
+        estados = np.load(os.path.join(pasta_base, "robos.npy"))
+        posicoes = estados[:, :2]
+        velocidades = estados[:, 2]  # coluna de velocidade
 
     # 3) Ajusta raio até conectar (ou atingir raio_max)
-    tree = KDTree(posicoes)
-    atual = raio
-    while True:
-        pares = tree.query_pairs(r=atual)
-        G = nx.Graph()
-        G.add_nodes_from(range(num_robos))
-        # atributos de nó
-        for i in range(num_robos):
-            x, y, v, theta, bat = estados[i]
-            G.nodes[i].update(x=x, y=y, vel=v, theta=theta, bat=bat)
-        # arestas
-        for i, j in pares:
-            d = np.linalg.norm(posicoes[i] - posicoes[j])
-            G.add_edge(i, j, weight=d)
+    with etapa("raio", nos=num_robos) as itens:
+        A, (i, j, dist), atual, comps, curva = ajustar_raio(posicoes, raio, raio_max=raio_max,
+                                                           passo=passo, modo=modo, itens=itens)
+        if curva is not None:
+            np.savetxt(os.path.join(grafo_dir, "componentes_por_raio.csv"),
+                       np.column_stack(curva),
+                       fmt=("%.4f", "%d"), delimiter=",",
+                       header="raio,componentes", comments="")
 
-        comps = nx.number_connected_components(G)
-        if comps == 1 or atual >= raio_max:
-            break
-        atual *= passo  # aumenta raio em 10%
-
-    # 4) Salva grafo e arestas
-    nx.write_graphml(G, os.path.join(grafo_dir, "grafo.graphml"))
-    with open(os.path.join(grafo_dir, "edges.csv"), "w") as f:
-        f.write("source,target,weight\n")
-        for u, v, d in G.edges(data=True):
-            f.write(f"{u},{v},{d['weight']:.4f}\n")
+    # 4) Salva grafo (binário sempre; texto só se pedido)
+    with etapa("salvar_binario", arestas=len(i)):
+        salvar_grafo_binario(grafo_dir, A, estados)
+    if "graphml" in exportar:
+        with etapa("graphml", arestas=len(i)):
+            G = csr_para_networkx(A, estados)
+            nx.write_graphml(G, os.path.join(grafo_dir, "grafo.graphml"))
+    if "csv" in exportar:
+        with etapa("edges_csv", arestas=len(i)):
+            salvar_edges_csv(os.path.join(grafo_dir, "edges.csv"), i, j, dist)
 
     # 5) Estatísticas
-    graus = [d for _, d in G.degree()]
-    maior_comp = max(len(c) for c in nx.connected_components(G))
+    with etapa("estatisticas", nos=num_robos):
+        graus = np.diff(A.indptr)
+        maior_comp = maior_componente(A)
     with open(os.path.join(grafo_dir, "stats.txt"), "w") as f:
         f.write(f"n_nodes: {num_robos}\n")
-        f.write(f"n_edges: {G.number_of_edges()}\n")
+        f.write(f"n_edges: {len(i)}\n")
         f.write(f"final_ε: {atual:.4f}\n")
         f.write(f"components: {comps}\n")
         f.write(f"largest_component_size: {maior_comp}\n")
@@ -66,67 +112,32 @@ def construir_grafo_epsilon_ball(num_robos, seed, raio, raio_max=200, passo=1.1)
         f.write(f"min_degree: {np.min(graus)}\n")
         f.write(f"max_degree: {np.max(graus)}\n")
 
-    # 6) Desenhos e visualizações
-    pos_dict = {i: (estados[i,0], estados[i,1]) for i in range(num_robos)}
-
-    # 6A) Amostra de 1k nós com arestas
-    amostra = list(G.nodes)[:1000]
-    Gs = G.subgraph(amostra)
-    pos_s = {i: pos_dict[i] for i in amostra}
-    plt.figure(figsize=(8,6))
-    nx.draw(Gs, pos_s, node_size=5, edge_color="gray", width=0.2, alpha=0.4)
-    plt.title("Grafo ε-ball (amostra 1k nós)")
-    plt.tight_layout()
-    plt.savefig(os.path.join(grafo_dir, "grafo_amostra.png"), dpi=300)
-    plt.close()
+    if not (desenhar and renderizacao.ativo()):
+        print(f"[construir_grafo] grafo em `{grafo_dir}`")
+        return A
 
-    # 6B) Grafo completo com nós coloridos por velocidade
-    norm = Normalize(vmin=np.min(velocidades), vmax=np.max(velocidades))
-    cmap = cm.viridis
-    node_colors = [cmap(norm(G.nodes[i]["vel"])) for i in G.nodes]
+    # 6) Desenhos e visualizações (no worker de fundo, se configurado)
+    with etapa("plots", nos=num_robos, arestas=len(i)):
+        # 6A) Amostra de 1k nós com arestas
+        k = min(1000, num_robos)
+        sub = (i < k) & (j < k)
+        renderizacao.agendar(renderizacao.figura_grafo, os.path.join(grafo_dir, "grafo_amostra.png"),
+                             estados[:k, :2], i[sub], j[sub], titulo="Grafo ε-ball (amostra 1k nós)")
 
-    fig, ax = plt.subplots(figsize=(8,6))
-    nx.draw(
-        G, pos_dict,
-        node_size=5,
-        node_color=node_colors,
-        edge_color="gray",
-        alpha=0.05,
-        width=0.01,
-        ax=ax
-    )
-    # agora associamos o colorbar ao próprio axes
-    sm = cm.ScalarMappable(cmap=cmap, norm=norm)
-    sm.set_array([])
-    fig.colorbar(sm, ax=ax, label="Velocidade")
-    plt.title("Grafo ε-ball — nós coloridos por velocidade")
-    plt.tight_layout()
-    plt.savefig(os.path.join(grafo_dir, "grafo_velocidade.png"), dpi=300)
-    plt.close(fig)
+        # 6B) Grafo completo com nós coloridos por velocidade
+        renderizacao.agendar(renderizacao.figura_grafo, os.path.join(grafo_dir, "grafo_velocidade.png"),
+                             posicoes, i, j, cores=velocidades, largura=0.01, alpha=0.05,
+                             titulo="Grafo ε-ball — nós coloridos por velocidade",
+                             rotulo_barra="Velocidade")
 
-    # 6C) Heatmap de densidade de arestas
-    midx, midy = [], []
-    for u, v in G.edges():
-        x1, y1 = pos_dict[u]
-        x2, y2 = pos_dict[v]
-        midx.append((x1+x2)/2)
-        midy.append((y1+y2)/2)
-    plt.figure(figsize=(6,6))
-    plt.hist2d(midx, midy, bins=150, cmap="hot")
-    plt.colorbar(label="contagem de arestas")
-    plt.title("Heatmap de densidade de arestas")
-    plt.tight_layout()
-    plt.savefig(os.path.join(grafo_dir, "heatmap_arestas.png"), dpi=300)
-    plt.close()
+        # 6C) Heatmap de densidade de arestas
+        renderizacao.agendar(renderizacao.figura_heatmap_arestas,
+                             os.path.join(grafo_dir, "heatmap_arestas.png"), posicoes, i, j)
 
-    # 6D) Histograma de grau
-    plt.figure(figsize=(6,4))
-    plt.hist(graus, bins=30, edgecolor="black")
-    plt.xlabel("Grau")
-    plt.ylabel("Número de nós")
-    plt.title("Histograma de Grau")
-    plt.tight_layout()
-    plt.savefig(os.path.join(grafo_dir, "grau_hist.png"))
-    plt.close()
+        # 6D) Histograma de grau
+        renderizacao.agendar(renderizacao.figura_histograma, os.path.join(grafo_dir, "grau_hist.png"),
+                             graus, bins=30, xlabel="Grau", ylabel="Número de nós",
+                             titulo="Histograma de Grau")
 
     print(f"[construir_grafo] grafo e visuais em `{grafo_dir}`")
+    return A
@@ -0,0 +1,427 @@
+"""
+Grafo ε-ball dinâmico: os robôs andam (x += v·dt·cos θ, y += v·dt·sin θ)
+e as arestas são atualizadas só em torno de quem se moveu.
+
+Estruturas:
+  - grade uniforme de células de lado ε + δ (dict célula -> conjunto de
+    robôs): os robôs a distância <= ε + δ de um robô estão nas 3×3 células
+    ao redor;
+  - adjacência como lista de conjuntos (um por robô);
+  - pares de fronteira: pares cuja distância, na última consulta, caiu em
+    (ε - δ, ε + δ], com o estado atual (aresta ou não) de cada um.
+
+Folga δ: um robô só é reavaliado (consulta nas 3×3 células) quando o
+caminho percorrido desde a última reavaliação chega a δ/2. Enquanto dois
+robôs andaram menos que δ/2 cada, um par que estava a <= ε - δ continua
+aresta e um par que estava a > ε + δ continua fora do grafo; só os pares
+de fronteira podem mudar, e esses têm a distância conferida a cada passo
+(vetorizado sobre o array de pares). O grafo é sempre exatamente o ε-ball
+das posições atuais; δ só troca reavaliações por pares de fronteira.
+Mudar de célula só atualiza a grade, não força reavaliação.
+
+A clusterização gulosa (heuristics/guloso_fo1.py) é reparada localmente,
+propagando em ordem de velocidade só a partir das pontas das arestas
+compatíveis alteradas; o resultado é o mesmo da gulosa refeita do zero.
+"""
+import os
+import sys
+import csv
+import time
+import heapq
+from itertools import chain
+import numpy as np
+from scipy.spatial import KDTree
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ROOT_DIR = os.path.abspath(os.path.join(SRC_DIR, '..'))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from config import DELTA_V
+from graph.grafo_csr import pares_epsilon, montar_csr
+from heuristics.guloso_fo1 import guloso_clusterizacao_csr, calcular_fo1_rotulos
+from perfil import etapa
+
+# Intervalo de tempo de um passo (velocidades em unidades de área por unidade de tempo)
+DT = 0.1
+# Folga padrão δ como fração de ε (ver docstring do módulo)
+FRACAO_FOLGA = 0.2
+# Acima desta fração da frota reavaliada no passo, as vizinhanças saem de um
+# índice de células ordenado (NumPy) em vez do laço sobre o dict da grade
+FRACAO_VETORIZADA = 0.01
+
+
+def _chave_celula(cx, cy):
+    """Chave inteira única de uma célula (coordenadas até ±2²⁰ células)."""
+    return ((cx + (1 << 20)) << 21) | (cy + (1 << 20))
+
+
+def _chaves_unicas(u, v, n):
+    """Chaves min·n + max ordenadas e sem repetição (sort + máscara; mais rápido que np.unique)."""
+    chaves = np.sort(np.minimum(u, v) * n + np.maximum(u, v))
+    return chaves[np.r_[True, chaves[1:] != chaves[:-1]]] if len(chaves) else chaves
+
+
+class GrafoDinamico:
+    """ε-ball mantido incrementalmente sobre uma grade de células de lado ε + δ."""
+
+    def __init__(self, estados, raio, dt=DT, folga=None, lado=None):
+        self.estados = np.array(estados, dtype=np.float64)
+        self.raio = float(raio)
+        self.folga = FRACAO_FOLGA * self.raio if folga is None else float(folga)
+        self.alcance = self.raio + self.folga
+        self.dt = dt
+        self.lado = lado
+        n = len(self.estados)
+        pos = self.estados[:, :2]
+
+        self.celula = np.floor(pos / self.alcance).astype(np.int64)
+        self.grade = {}
+        for r, c in enumerate(map(tuple, self.celula.tolist())):
+            self.grade.setdefault(c, set()).add(r)
+
+        i, j, _ = pares_epsilon(KDTree(pos), pos, self.alcance)
+        i, j = i.astype(np.int64), j.astype(np.int64)
+        d2 = ((pos[i] - pos[j]) ** 2).sum(axis=1)
+        aresta = d2 <= self.raio ** 2
+        faixa = d2 > max(self.raio - self.folga, 0.0) ** 2
+        self.banda_u, self.banda_v, self.banda_aresta = i[faixa], j[faixa], aresta[faixa]
+        i, j = i[aresta], j[aresta]
+        self.adj = [set() for _ in range(n)]
+        for u, v in zip(i.tolist(), j.tolist()):
+            self.adj[u].add(v)
+            self.adj[v].add(u)
+        # as mesmas arestas como chaves u·n + v ordenadas; as alterações de cada
+        # passo ficam pendentes e só são aplicadas quando alguém lê `chaves()`
+        self._chaves = np.sort(i * n + j)
+        self._pendentes = []
+        self.acumulado = np.zeros(n)
+
+    @property
+    def n(self):
+        return len(self.estados)
+
+    def _mover(self):
+        """Avança as posições um passo; com `lado`, reflete nas bordas do quadrado."""
+        x, y, v, theta = (self.estados[:, k] for k in range(4))
+        d = v * self.dt
+        x += d * np.cos(theta)
+        y += d * np.sin(theta)
+        if self.lado is not None:
+            for eixo, refletir in ((x, lambda t: np.pi - t), (y, lambda t: -t)):
+                fora = (eixo < 0) | (eixo > self.lado)
+                if fora.any():
+                    e = np.abs(eixo[fora])
+                    eixo[fora] = np.where(e > self.lado, 2 * self.lado - e, e)
+                    theta[fora] = refletir(theta[fora])
+            np.mod(theta, 2 * np.pi, out=theta)
+        self.acumulado += np.abs(d)
+
+    def chaves(self):
+        """Arestas atuais como chaves u·n + v (u < v), ordenadas."""
+        if self._pendentes:
+            ops = np.concatenate([k for k, _ in self._pendentes])
+            entra = np.concatenate([np.full(len(k), e) for k, e in self._pendentes])
+            # vale a última operação sobre cada chave
+            ordem = np.lexsort((np.arange(len(ops)), ops))
+            ops, entra = ops[ordem], entra[ordem]
+            ultima = np.r_[ops[1:] != ops[:-1], True]
+            ops, entra = ops[ultima], entra[ultima]
+            base = np.setdiff1d(self._chaves, ops, assume_unique=True)
+            self._chaves = np.sort(np.concatenate([base, ops[entra]]))
+            self._pendentes = []
+        return self._chaves
+
+    def _pares_indice_ordenado(self, robos, pos):
+        """
+        Pares dirigidos (u, v), u em `robos`, v != u, a distância <= ε + δ,
+        nas 3×3 células ao redor de u: todas as células ordenadas por chave e
+        um searchsorted por deslocamento (para lotes grandes).
+        """
+        chaves = _chave_celula(self.celula[:, 0], self.celula[:, 1])
+        ordem = np.argsort(chaves, kind='stable')
+        ordenadas = chaves[ordem]
+        cx, cy = self.celula[robos, 0], self.celula[robos, 1]
+        r2 = self.alcance ** 2
+        us, vs = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                alvo = _chave_celula(cx + dx, cy + dy)
+                ini = np.searchsorted(ordenadas, alvo, side='left')
+                cont = np.searchsorted(ordenadas, alvo, side='right') - ini
+                total = int(cont.sum())
+                if total == 0:
+                    continue
+                u = np.repeat(robos, cont)
+                v = ordem[np.repeat(ini - np.cumsum(cont) + cont, cont) + np.arange(total)]
+                manter = (((pos[u] - pos[v]) ** 2).sum(axis=1) <= r2) & (u != v)
+                us.append(u[manter])
+                vs.append(v[manter])
+        if not us:
+            vazio = np.empty(0, dtype=np.int64)
+            return vazio, vazio.copy()
+        return np.concatenate(us), np.concatenate(vs)
+
+    def _pares_grade(self, robos, pos):
+        """
+        Mesmos pares de `_pares_indice_ordenado`, sobre o dict da grade (lotes
+        pequenos): robôs agrupados por célula, uma matriz de distâncias por
+        célula contra os candidatos das 3×3 células.
+        """
+        if len(robos) == 0:
+            vazio = np.empty(0, dtype=np.int64)
+            return vazio, vazio.copy()
+        cel = self.celula[robos]
+        ordem = np.lexsort((cel[:, 1], cel[:, 0]))
+        robos, cel = robos[ordem], cel[ordem]
+        inicios = np.flatnonzero(np.r_[True, (np.diff(cel, axis=0) != 0).any(axis=1)])
+        fins = np.r_[inicios[1:], len(robos)]
+        r2 = self.alcance ** 2
+        us, vs = [], []
+        for a, b in zip(inicios.tolist(), fins.tolist()):
+            cx, cy = cel[a].tolist()
+            candidatos = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    s = self.grade.get((cx + dx, cy + dy))
+                    if s:
+                        candidatos.extend(s)
+            candidatos = np.array(candidatos, dtype=np.int64)
+            grupo = robos[a:b]
+            d2 = ((pos[grupo][:, None, :] - pos[candidatos][None, :, :]) ** 2).sum(axis=2)
+            gi, ci = np.nonzero(d2 <= r2)
+            u, v = grupo[gi], candidatos[ci]
+            manter = u != v
+            us.append(u[manter])
+            vs.append(v[manter])
+        if not us:
+            vazio = np.empty(0, dtype=np.int64)
+            return vazio, vazio.copy()
+        return np.concatenate(us), np.concatenate(vs)
+
+    def avancar(self):
+        """
+        Um passo de tempo. Retorna (adicionadas, removidas, reavaliados):
+        arrays (k, 2) de arestas (u, v) com u < v e o array dos robôs reavaliados.
+        """
+        self._mover()
+        pos = self.estados[:, :2]
+        nova_celula = np.floor(pos / self.alcance).astype(np.int64)
+        mudou = np.flatnonzero((nova_celula != self.celula).any(axis=1))
+        for r in mudou.tolist():
+            antiga = tuple(self.celula[r].tolist())
+            self.grade[antiga].discard(r)
+            if not self.grade[antiga]:
+                del self.grade[antiga]
+            self.grade.setdefault(tuple(nova_celula[r].tolist()), set()).add(r)
+        self.celula[mudou] = nova_celula[mudou]
+
+        # com δ = 0, todo robô que se moveu é reavaliado
+        reavaliar = (self.acumulado >= self.folga / 2) & (self.acumulado > 0)
+        reavaliados = np.flatnonzero(reavaliar)
+        self.acumulado[reavaliados] = 0.0
+        n = self.n
+        r2 = self.raio ** 2
+
+        # pares de fronteira entre robôs não reavaliados: distância conferida agora
+        fora = ~(reavaliar[self.banda_u] | reavaliar[self.banda_v])
+        bu, bv, antes = self.banda_u[fora], self.banda_v[fora], self.banda_aresta[fora]
+        agora = ((pos[bu] - pos[bv]) ** 2).sum(axis=1) <= r2
+        entrou = agora & ~antes
+        saiu = antes & ~agora
+
+        # arestas incidentes aos reavaliados, antes e depois, como chaves u·n + v (u < v)
+        if len(reavaliados) > FRACAO_VETORIZADA * n:
+            chaves = self.chaves()
+            antigas = chaves[reavaliar[chaves // n] | reavaliar[chaves % n]]
+            novos_u, novos_v = self._pares_indice_ordenado(reavaliados, pos)
+        else:
+            graus = np.fromiter((len(self.adj[u]) for u in reavaliados.tolist()), dtype=np.int64,
+                                count=len(reavaliados))
+            antigos_v = np.fromiter(chain.from_iterable(self.adj[u] for u in reavaliados.tolist()),
+                                    dtype=np.int64, count=int(graus.sum()))
+            antigas = _chaves_unicas(np.repeat(reavaliados, graus), antigos_v, n)
+            novos_u, novos_v = self._pares_grade(reavaliados, pos)
+        candidatos = _chaves_unicas(novos_u, novos_v, n)
+        cu, cv = np.divmod(candidatos, n)
+        d2 = ((pos[cu] - pos[cv]) ** 2).sum(axis=1)
+        novas = candidatos[d2 <= r2]
+        faixa = d2 > max(self.raio - self.folga, 0.0) ** 2
+        self.banda_u = np.concatenate([bu, cu[faixa]])
+        self.banda_v = np.concatenate([bv, cv[faixa]])
+        self.banda_aresta = np.concatenate([agora, d2[faixa] <= r2])
+
+        # as duas partes de cada concatenação são disjuntas (com/sem ponta reavaliada)
+        adicionadas = np.sort(np.concatenate([np.setdiff1d(novas, antigas, assume_unique=True),
+                                              bu[entrou] * n + bv[entrou]]))
+        removidas = np.sort(np.concatenate([np.setdiff1d(antigas, novas, assume_unique=True),
+                                            bu[saiu] * n + bv[saiu]]))
+        self._pendentes += [(adicionadas, True), (removidas, False)]
+        adicionadas = np.column_stack(np.divmod(adicionadas, n))
+        removidas = np.column_stack(np.divmod(removidas, n))
+
+        for u, v in adicionadas.tolist():
+            self.adj[u].add(v)
+            self.adj[v].add(u)
+        for u, v in removidas.tolist():
+            self.adj[u].discard(v)
+            self.adj[v].discard(u)
+        return adicionadas, removidas, reavaliados
+
+    def matriz(self):
+        """Snapshot da adjacência como CSR simétrica (pesos = distâncias atuais)."""
+        i, j = np.divmod(self.chaves(), self.n)
+        pos = self.estados[:, :2]
+        return montar_csr(self.n, i, j, np.sqrt(((pos[i] - pos[j]) ** 2).sum(axis=1)))
+
+
+class GulosoIncremental:
+    """
+    Rótulos da heurística gulosa FO1 mantidos sobre um GrafoDinamico.
+    A regra é a de `guloso_clusterizacao_csr`: em ordem decrescente de
+    velocidade, cada nó livre vira semente e absorve os vizinhos livres com
+    |Δv| <= delta_v. Equivalentemente, um nó é semente sse nenhum vizinho
+    compatível anterior (na ordem) é semente, e um não-semente pertence à
+    primeira semente compatível anterior; a decisão de um nó só depende
+    dos vizinhos compatíveis que vêm antes dele.
+    """
+
+    def __init__(self, grafo, delta_v=DELTA_V):
+        self.grafo = grafo
+        self.delta_v = delta_v
+        self.vel = grafo.estados[:, 2].copy()
+        self.posto = np.empty(grafo.n, dtype=np.int64)
+        self.posto[np.argsort(-self.vel, kind='stable')] = np.arange(grafo.n)
+        self._refazer()
+
+    def _refazer(self):
+        """Gulosa completa (versão CSR) sobre o grafo atual."""
+        A = self.grafo.matriz()
+        self.rotulos = guloso_clusterizacao_csr(A.indptr, A.indices, self.vel, self.delta_v)
+        self.membros = {}
+        for r, c in enumerate(self.rotulos.tolist()):
+            self.membros.setdefault(c, set()).add(r)
+        # a semente de cada cluster é o membro que vem primeiro na ordem
+        primeiro = np.full(len(self.membros), self.grafo.n, dtype=np.int64)
+        np.minimum.at(primeiro, self.rotulos, self.posto)
+        self.semente = self.posto == primeiro[self.rotulos]
+        self.proximo = int(self.rotulos.max()) + 1 if self.grafo.n else 0
+
+    def _compativel(self, u, v):
+        return abs(self.vel[u] - self.vel[v]) <= self.delta_v
+
+    def reparar(self, adicionadas, removidas):
+        """
+        Reaplica a regra gulosa só onde ela pode mudar: cada aresta
+        compatível alterada marca a ponta posterior na ordem; os marcados são
+        refeitos em ordem (heap por posto) e, quando um nó ganha ou perde o
+        papel de semente, seus vizinhos compatíveis posteriores são marcados
+        também. Nós fora dessa propagação não são tocados.
+        Retorna o número de nós reatribuídos.
+        """
+        posto = self.posto
+        heap = []
+        for u, v in chain(adicionadas.tolist(), removidas.tolist()):
+            if self._compativel(u, v):
+                w = u if posto[u] > posto[v] else v
+                heapq.heappush(heap, (int(posto[w]), w))
+        adj = self.grafo.adj
+        reatribuidos = 0
+        ultimo = -1
+        while heap:
+            p, no = heapq.heappop(heap)
+            if p == ultimo:
+                continue
+            ultimo = p
+            dono = None
+            for viz in adj[no]:
+                if self.semente[viz] and posto[viz] < p and self._compativel(no, viz):
+                    if dono is None or posto[viz] < posto[dono]:
+                        dono = viz
+            era_semente = bool(self.semente[no])
+            antigo = int(self.rotulos[no])
+            if dono is not None:
+                novo = int(self.rotulos[dono])
+            elif era_semente:
+                novo = antigo
+            else:
+                novo = self.proximo
+                self.proximo += 1
+            self.semente[no] = dono is None
+            if novo != antigo:
+                reatribuidos += 1
+                self.rotulos[no] = novo
+                self.membros[antigo].discard(no)
+                if not self.membros[antigo]:
+                    del self.membros[antigo]
+                self.membros.setdefault(novo, set()).add(no)
+            if era_semente != (dono is None):
+                for viz in adj[no]:
+                    if posto[viz] > p and self._compativel(no, viz):
+                        heapq.heappush(heap, (int(posto[viz]), viz))
+        return reatribuidos
+
+    def rotulos_compactos(self):
+        _, compactos = np.unique(self.rotulos, return_inverse=True)
+        return compactos
+
+    def fo1(self):
+        return calcular_fo1_rotulos(self.rotulos, self.vel)
+
+
+def simular(estados, raio, passos, dt=DT, folga=None, lado=None, delta_v=DELTA_V):
+    """
+    Roda `passos` passos de movimento com atualização incremental do grafo
+    e reparo local da clusterização gulosa. Retorna (grafo, guloso, historico),
+    com uma linha por passo no histórico.
+    """
+    with etapa("dinamico:inicial", nos=len(estados)):
+        grafo = GrafoDinamico(estados, raio, dt=dt, folga=folga, lado=lado)
+        guloso = GulosoIncremental(grafo, delta_v=delta_v)
+    historico = []
+    for passo in range(1, passos + 1):
+        t0 = time.perf_counter()
+        adicionadas, removidas, reavaliados = grafo.avancar()
+        t1 = time.perf_counter()
+        reatribuidos = guloso.reparar(adicionadas, removidas)
+        t2 = time.perf_counter()
+        historico.append({
+            'passo': passo,
+            'reavaliados': len(reavaliados),
+            'fronteira': len(grafo.banda_u),
+            'adicionadas': len(adicionadas),
+            'removidas': len(removidas),
+            'reatribuidos': reatribuidos,
+            'clusters': len(guloso.membros),
+            'tempo_grafo_ms': (t1 - t0) * 1000,
+            'tempo_reparo_ms': (t2 - t1) * 1000,
+        })
+    return grafo, guloso, historico
+
+
+def executar_simulacao(num_robos, seed, passos, raio, dt=DT, folga=None, lado=None,
+                       delta_v=DELTA_V):
+    """
+    Simula a instância data/sinteticos/robos_{n}_seed{seed} e grava em
+    data/dinamico/robos_{n}_seed{seed}/ o histórico por passo (CSV), os
+    rótulos gulosos finais e as posições finais.
+    """
+    estados = np.load(os.path.join(ROOT_DIR, 'data', 'sinteticos', f'robos_{num_robos}_seed{seed}', 'robos.npy'))
+    grafo, guloso, historico = simular(estados, raio, passos, dt=dt, folga=folga,
+                                       lado=lado, delta_v=delta_v)
+
+    pasta = os.path.join(ROOT_DIR, 'data', 'dinamico', f'robos_{num_robos}_seed{seed}')
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, 'historico.csv'), 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=list(historico[0]) if historico else ['passo'])
+        escritor.writeheader()
+        escritor.writerows(historico)
+    np.save(os.path.join(pasta, 'guloso_labels.npy'), guloso.rotulos_compactos())
+    np.save(os.path.join(pasta, 'estados_finais.npy'), grafo.estados)
+
+    if historico:
+        ms = np.array([[h['tempo_grafo_ms'], h['tempo_reparo_ms']] for h in historico])
+        print(f"[dinamico] {passos} passos, {len(grafo.chaves())} arestas, "
+              f"{len(guloso.membros)} clusters, FO1 {guloso.fo1():.4f}; "
+              f"grafo {ms[:, 0].mean():.1f} ms/passo, reparo {ms[:, 1].mean():.1f} ms/passo -> {pasta}")
+    return grafo, guloso, historico
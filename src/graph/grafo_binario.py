@@ -0,0 +1,81 @@
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Formato binário do grafo: uma pasta com um .npy por array, para que
+# todos possam ser abertos com np.load(..., mmap_mode='r') sem cópia.
+#   indptr.npy, indices.npy, pesos.npy  -> adjacência CSR simétrica
+#   estados.npy                          -> tabela (n, 5): x, y, vel, theta, bat
+#   <extra>.npy                          -> arrays auxiliares (ex.: ids originais)
+PASTA_CSR = "csr"
+
+
+def pasta_binaria(grafo_dir):
+    """Pasta do artefato binário dentro da pasta de um grafo."""
+    return os.path.join(grafo_dir, PASTA_CSR)
+
+
+def existe_grafo_binario(grafo_dir):
+    return os.path.exists(os.path.join(pasta_binaria(grafo_dir), "indptr.npy"))
+
+
+def salvar_grafo_binario(grafo_dir, A, estados=None, **extras):
+    """
+    Grava a adjacência CSR `A` (pesos em A.data) e, se fornecida, a tabela
+    de estados dos robôs em `<grafo_dir>/csr/`.
+    """
+    pasta = pasta_binaria(grafo_dir)
+    os.makedirs(pasta, exist_ok=True)
+    np.save(os.path.join(pasta, "indptr.npy"), np.ascontiguousarray(A.indptr))
+    np.save(os.path.join(pasta, "indices.npy"), np.ascontiguousarray(A.indices))
+    np.save(os.path.join(pasta, "pesos.npy"), np.ascontiguousarray(A.data))
+    if estados is not None:
+        np.save(os.path.join(pasta, "estados.npy"), np.ascontiguousarray(estados))
+    for nome, arr in extras.items():
+        np.save(os.path.join(pasta, f"{nome}.npy"), np.ascontiguousarray(arr))
+    return pasta
+
+
+def carregar_grafo_binario(grafo_dir, mmap_mode="r"):
+    """
+    Abre o artefato binário de `grafo_dir`.
+    Retorna (A, estados): A é uma csr_matrix cujos arrays são os próprios
+    memmaps (sem cópia); estados é None se não tiver sido gravado.
+    """
+    pasta = pasta_binaria(grafo_dir)
+    indptr = np.load(os.path.join(pasta, "indptr.npy"), mmap_mode=mmap_mode)
+    indices = np.load(os.path.join(pasta, "indices.npy"), mmap_mode=mmap_mode)
+    pesos = np.load(os.path.join(pasta, "pesos.npy"), mmap_mode=mmap_mode)
+    n = len(indptr) - 1
+    A = csr_matrix((pesos, indices, indptr), shape=(n, n), copy=False)
+
+    caminho_estados = os.path.join(pasta, "estados.npy")
+    estados = None
+    if os.path.exists(caminho_estados):
+        estados = np.load(caminho_estados, mmap_mode=mmap_mode)
+    return A, estados
+
+
+def carregar_extra(grafo_dir, nome, mmap_mode="r"):
+    """Carrega um array auxiliar gravado via `salvar_grafo_binario(**extras)`."""
+    return np.load(os.path.join(pasta_binaria(grafo_dir), f"{nome}.npy"), mmap_mode=mmap_mode)
+
+
+def carregar_grafo(grafo_dir, graphml="grafo.graphml", mmap_mode="r"):
+    """
+    (A, estados) da pasta de um grafo: usa o artefato binário se existir;
+    senão, lê o GraphML uma vez e converte (nós renumerados 0..n-1 na ordem
+    do arquivo, pesos do atributo `weight`).
+    """
+    if existe_grafo_binario(grafo_dir):
+        return carregar_grafo_binario(grafo_dir, mmap_mode=mmap_mode)
+
+    import networkx as nx
+    G = nx.read_graphml(os.path.join(grafo_dir, graphml))
+    G = nx.convert_node_labels_to_integers(G)
+    A = nx.to_scipy_sparse_array(G, nodelist=range(G.number_of_nodes()), format="csr")
+    A = csr_matrix(A)
+    attrs = ("x", "y", "vel", "theta", "bat")
+    estados = np.array([[float(G.nodes[n].get(a, 0.0)) for a in attrs] for n in G.nodes],
+                       dtype=np.float64)
+    return A, estados
@@ -0,0 +1,114 @@
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+
+
+def pares_epsilon(tree, posicoes, raio):
+    """
+    Retorna os pares (i, j), i < j, a distância <= raio e suas distâncias,
+    tudo como arrays (sem laço Python por par).
+    - tree: KDTree já construída sobre `posicoes`
+    - posicoes: array (n, 2)
+    - raio: valor de ε
+    """
+    pares = tree.query_pairs(r=raio, output_type="ndarray")
+    if len(pares) == 0:
+        vazio = np.empty(0, dtype=np.int32)
+        return vazio, vazio.copy(), np.empty(0, dtype=np.float64)
+    i = pares[:, 0].astype(np.int32)
+    j = pares[:, 1].astype(np.int32)
+    dist = np.sqrt(np.sum((posicoes[i] - posicoes[j]) ** 2, axis=1))
+    return i, j, dist
+
+
+def montar_csr(n, i, j, pesos):
+    """
+    Monta a matriz de adjacência simétrica n×n em CSR a partir da lista
+    de arestas (i, j, peso). Cada aresta aparece nas duas direções.
+    """
+    linhas = np.concatenate([i, j])
+    colunas = np.concatenate([j, i])
+    dados = np.concatenate([pesos, pesos])
+    A = csr_matrix((dados, (linhas, colunas)), shape=(n, n))
+    A.sort_indices()
+    return A
+
+
+def numero_componentes(A):
+    """Número de componentes conexas da adjacência CSR."""
+    n_comp, _ = connected_components(A, directed=False)
+    return n_comp
+
+
+def maior_componente(A):
+    """Tamanho da maior componente conexa."""
+    _, rotulos = connected_components(A, directed=False)
+    return int(np.bincount(rotulos).max())
+
+
+def curva_componentes(n, i, j, dist):
+    """
+    Componentes conexas em função de ε, em uma única passada.
+    Calcula a floresta geradora mínima dos pares candidatos (i, j, dist):
+    com as arestas da floresta ordenadas w_1 <= ... <= w_k, o grafo ε-ball
+    tem n - #{w_t <= ε} componentes. Retorna (raios, componentes), onde
+    componentes[t] vale para ε em [raios[t], raios[t+1]).
+    """
+    # A MST só depende da ordem dos pesos: usa a posição 1..m de cada par na
+    # ordem das distâncias (nunca 0, que seria lido como "sem aresta") e
+    # devolve as distâncias originais, sem arredondamento.
+    ordem = np.argsort(dist, kind="stable")
+    posto = np.empty(len(dist), dtype=np.float64)
+    posto[ordem] = np.arange(1, len(dist) + 1)
+    A = csr_matrix((posto, (i, j)), shape=(n, n))
+    floresta = minimum_spanning_tree(A)
+    raios = np.asarray(dist)[ordem[np.sort(floresta.data).astype(np.int64) - 1]]
+    componentes = n - np.arange(1, len(raios) + 1)
+    return raios, componentes
+
+
+def raio_minimo_conexo(n, i, j, dist):
+    """
+    Menor ε que conecta o grafo (aresta gargalo da floresta geradora mínima)
+    considerando apenas os pares candidatos fornecidos.
+    Retorna (ε*, raios, componentes); ε* é None se os candidatos não
+    conectam todos os nós.
+    """
+    raios, componentes = curva_componentes(n, i, j, dist)
+    if n <= 1:
+        return 0.0, raios, componentes
+    if len(raios) < n - 1:
+        return None, raios, componentes
+    return float(raios[-1]), raios, componentes
+
+
+def arestas_csr(A):
+    """Lista de arestas (i < j) e pesos a partir da adjacência simétrica."""
+    coo = A.tocoo()
+    mask = coo.row < coo.col
+    return coo.row[mask], coo.col[mask], coo.data[mask]
+
+
+def salvar_edges_csv(caminho, i, j, pesos):
+    """Escreve `source,target,weight` em bloco, sem laço por aresta."""
+    np.savetxt(caminho, np.column_stack((i, j, pesos)),
+               fmt=("%d", "%d", "%.4f"), delimiter=",",
+               header="source,target,weight", comments="")
+
+
+def csr_para_networkx(A, estados):
+    """
+    Converte a adjacência CSR + tabela de estados em nx.Graph, com os
+    mesmos atributos de nó/aresta do grafo original (x, y, vel, theta, bat, weight).
+    Só deve ser usado quando GraphML ou desenhos forem pedidos.
+    """
+    n = A.shape[0]
+    G = nx.Graph()
+    G.add_nodes_from(
+        (k, {"x": x, "y": y, "vel": v, "theta": t, "bat": b})
+        for k, (x, y, v, t, b) in enumerate(estados[:n].tolist())
+    )
+    i, j, d = arestas_csr(A)
+    G.add_weighted_edges_from(zip(i.tolist(), j.tolist(), d.tolist()))
+    return G
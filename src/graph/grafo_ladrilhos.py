@@ -0,0 +1,307 @@
+"""
+Construção do grafo ε-ball por ladrilhos, fora da memória (instâncias com
+milhões de robôs).
+
+A área é dividida em ladrilhos quadrados de lado >= ε. Cada ladrilho é
+processado por um worker com os seus robôs (núcleo) mais os robôs dos 8
+vizinhos a distância <= ε do ladrilho (halo): uma KDTree local e
+`query_pairs`. Um par (u, v), u < v, só é mantido no ladrilho cujo núcleo
+contém u, então cada aresta sai exatamente uma vez. Os pares de cada
+ladrilho vão para disco (.npy), já ordenados por linha, e a CSR final é
+montada em duas passadas (graus, depois preenchimento) direto em memmaps
+no formato binário de graph/grafo_binario.py.
+
+Nada de tamanho proporcional ao número de arestas fica em RAM; o que é
+proporcional à frota (estados, ordem por ladrilho, indptr, cursores) é
+acessado por memmap. O pico de memória é dado pelo tamanho do ladrilho.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numpy.lib.format import open_memmap
+from scipy.spatial import KDTree
+
+from graph.grafo_binario import pasta_binaria
+from perfil import etapa
+
+# Robôs por ladrilho (em média) quando o lado do ladrilho não é dado
+ROBOS_POR_LADRILHO = 50_000
+# Linhas de estados / entradas da CSR processadas por vez nas passadas sequenciais
+TAMANHO_BLOCO = 4 * 1024 * 1024
+
+
+def _blocos(total, tamanho=TAMANHO_BLOCO):
+    for ini in range(0, total, tamanho):
+        yield ini, min(ini + tamanho, total)
+
+
+class Ladrilhos:
+    """Grade nx × ny de ladrilhos quadrados de lado `lado` a partir de (x0, y0)."""
+
+    def __init__(self, x0, y0, lado, nx, ny):
+        self.x0, self.y0, self.lado, self.nx, self.ny = x0, y0, lado, nx, ny
+
+    @property
+    def total(self):
+        return self.nx * self.ny
+
+    def indice(self, pos):
+        cx = np.clip(((pos[:, 0] - self.x0) // self.lado).astype(np.int64), 0, self.nx - 1)
+        cy = np.clip(((pos[:, 1] - self.y0) // self.lado).astype(np.int64), 0, self.ny - 1)
+        return cx * self.ny + cy
+
+    def retangulo(self, t):
+        cx, cy = divmod(t, self.ny)
+        x0 = self.x0 + cx * self.lado
+        y0 = self.y0 + cy * self.lado
+        return x0, y0, x0 + self.lado, y0 + self.lado
+
+    def vizinhos(self, t):
+        cx, cy = divmod(t, self.ny)
+        return [(cx + dx) * self.ny + cy + dy
+                for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                if (dx or dy) and 0 <= cx + dx < self.nx and 0 <= cy + dy < self.ny]
+
+
+def particionar(estados, raio, lado_ladrilho=None):
+    """
+    Ladrilhos cobrindo a caixa envolvente das posições (uma passada em
+    blocos). Sem `lado_ladrilho`, o lado é escolhido para ~ROBOS_POR_LADRILHO
+    robôs por ladrilho numa distribuição uniforme; nunca menor que ε.
+    """
+    n = len(estados)
+    mins, maxs = np.full(2, np.inf), np.full(2, -np.inf)
+    for a, b in _blocos(n):
+        pos = np.asarray(estados[a:b, :2])
+        mins = np.minimum(mins, pos.min(axis=0))
+        maxs = np.maximum(maxs, pos.max(axis=0))
+    largura = max(float((maxs - mins).max()), 1e-9)
+    if lado_ladrilho is None:
+        lado_ladrilho = largura / max(1.0, np.sqrt(n / ROBOS_POR_LADRILHO))
+    lado = max(float(lado_ladrilho), float(raio))
+    nx = max(1, int(np.ceil((maxs[0] - mins[0]) / lado)))
+    ny = max(1, int(np.ceil((maxs[1] - mins[1]) / lado)))
+    return Ladrilhos(mins[0], mins[1], lado, nx, ny)
+
+
+def ordenar_por_ladrilho(estados, ladrilhos, caminho_ordem):
+    """
+    Índices dos robôs agrupados por ladrilho (crescentes dentro de cada um),
+    gravados em `caminho_ordem`, via contagem em duas passadas. Retorna os
+    inícios de cada ladrilho (tamanho total + 1).
+    """
+    n = len(estados)
+    contagens = np.zeros(ladrilhos.total, dtype=np.int64)
+    for a, b in _blocos(n):
+        contagens += np.bincount(ladrilhos.indice(np.asarray(estados[a:b, :2])),
+                                 minlength=ladrilhos.total)
+    inicios = np.r_[0, np.cumsum(contagens)]
+    cursor = inicios[:-1].copy()
+    ordem = open_memmap(caminho_ordem, mode='w+', dtype=np.int64, shape=(n,))
+    for a, b in _blocos(n):
+        t = ladrilhos.indice(np.asarray(estados[a:b, :2]))
+        perm = np.argsort(t, kind='stable')
+        t = t[perm]
+        corte = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+        rank = np.arange(len(t)) - np.repeat(corte, np.diff(np.r_[corte, len(t)]))
+        ordem[cursor[t] + rank] = a + perm
+        cursor += np.bincount(t, minlength=ladrilhos.total)
+    ordem.flush()
+    del ordem
+    return inicios
+
+
+def _pares_ladrilho(tarefa):
+    """
+    Worker: pares ε do ladrilho `t` com o menor índice no núcleo, nas duas
+    direções e ordenados por (linha, coluna), gravados em <tmp>/arestas_t.npy
+    (2k, 2) e <tmp>/pesos_t.npy. Retorna (t, k).
+    """
+    t, caminho_estados, caminho_ordem, inicios, ladrilhos, raio, tmp = tarefa
+    estados = np.load(caminho_estados, mmap_mode='r')
+    ordem = np.load(caminho_ordem, mmap_mode='r')
+    nucleo = np.asarray(ordem[inicios[t]:inicios[t + 1]])
+    if len(nucleo) == 0:
+        return t, 0
+
+    x0, y0, x1, y1 = ladrilhos.retangulo(t)
+    halo = []
+    for v in ladrilhos.vizinhos(t):
+        ids = np.asarray(ordem[inicios[v]:inicios[v + 1]])
+        if len(ids) == 0:
+            continue
+        p = np.asarray(estados[ids, :2])
+        dx = np.maximum(np.maximum(x0 - p[:, 0], p[:, 0] - x1), 0)
+        dy = np.maximum(np.maximum(y0 - p[:, 1], p[:, 1] - y1), 0)
+        halo.append(ids[dx * dx + dy * dy <= raio * raio])
+    ids = np.concatenate([nucleo] + halo)
+    eh_nucleo = np.zeros(len(ids), dtype=bool)
+    eh_nucleo[:len(nucleo)] = True
+
+    pos = np.asarray(estados[ids, :2], dtype=np.float64)
+    pares = KDTree(pos).query_pairs(r=raio, output_type='ndarray')
+    if len(pares) == 0:
+        return t, 0
+    a, b = pares[:, 0], pares[:, 1]
+    menor = np.where(ids[a] < ids[b], a, b)
+    manter = eh_nucleo[menor]
+    a, b = a[manter], b[manter]
+    dist = np.sqrt(((pos[a] - pos[b]) ** 2).sum(axis=1))
+    linhas = np.concatenate((ids[a], ids[b]))
+    colunas = np.concatenate((ids[b], ids[a]))
+    perm = np.argsort(linhas * len(estados) + colunas)
+    np.save(os.path.join(tmp, f'arestas_{t}.npy'), np.column_stack((linhas[perm], colunas[perm])))
+    np.save(os.path.join(tmp, f'pesos_{t}.npy'), np.concatenate((dist, dist))[perm])
+    return t, len(a)
+
+
+def _ler_arestas(tmp, t):
+    """(linhas, colunas, pesos, início de cada linha, tamanho de cada linha) do ladrilho t."""
+    arestas = np.load(os.path.join(tmp, f'arestas_{t}.npy'))
+    linhas = arestas[:, 0]
+    corte = np.flatnonzero(np.r_[True, linhas[1:] != linhas[:-1]])
+    tamanhos = np.diff(np.r_[corte, len(linhas)])
+    return linhas, arestas[:, 1], np.load(os.path.join(tmp, f'pesos_{t}.npy')), corte, tamanhos
+
+
+def mesclar_csr(n, tmp, ladrilhos_com_pares, pasta, tipo_indices):
+    """
+    Monta a CSR simétrica (indptr, indices, pesos) em `pasta` a partir das
+    arestas por ladrilho: passada 1 conta os graus, passada 2 copia o trecho
+    de cada linha para a posição do seu cursor. Linhas que receberam trechos
+    de mais de um ladrilho (perto das bordas) têm as colunas reordenadas no
+    fim, em blocos. Retorna o número de arestas.
+    """
+    graus = open_memmap(os.path.join(tmp, 'graus.npy'), mode='w+', dtype=np.int64, shape=(n,))
+    origens = open_memmap(os.path.join(tmp, 'origens.npy'), mode='w+', dtype=np.uint8, shape=(n,))
+    for t in ladrilhos_com_pares:
+        linhas, _, _, corte, tamanhos = _ler_arestas(tmp, t)
+        graus[linhas[corte]] += tamanhos
+        origens[linhas[corte]] += 1
+    nnz = 0
+    for a, b in _blocos(n):
+        nnz += int(graus[a:b].sum())
+    tipo_ptr = np.int32 if nnz <= np.iinfo(np.int32).max else np.int64
+
+    indptr = open_memmap(os.path.join(pasta, 'indptr.npy'), mode='w+', dtype=tipo_ptr, shape=(n + 1,))
+    cursor = open_memmap(os.path.join(tmp, 'cursor.npy'), mode='w+', dtype=np.int64, shape=(n,))
+    indptr[0] = acumulado = 0
+    for a, b in _blocos(n):
+        parcial = acumulado + np.cumsum(graus[a:b])
+        indptr[a + 1:b + 1] = parcial
+        cursor[a:b] = parcial - graus[a:b]
+        acumulado = int(parcial[-1]) if len(parcial) else acumulado
+    del graus
+
+    indices = open_memmap(os.path.join(pasta, 'indices.npy'), mode='w+', dtype=tipo_indices, shape=(nnz,))
+    pesos = open_memmap(os.path.join(pasta, 'pesos.npy'), mode='w+', dtype=np.float64, shape=(nnz,))
+    for t in ladrilhos_com_pares:
+        linhas, colunas, w, corte, tamanhos = _ler_arestas(tmp, t)
+        alvo = cursor[linhas] + np.arange(len(linhas)) - np.repeat(corte, tamanhos)
+        indices[alvo] = colunas
+        pesos[alvo] = w
+        cursor[linhas[corte]] += tamanhos
+    del cursor
+
+    # colunas crescentes dentro de cada linha (como montar_csr)
+    a = 0
+    while a < n:
+        b = max(a + 1, int(np.searchsorted(indptr, indptr[a] + TAMANHO_BLOCO, side='right')) - 1)
+        b = min(b, n)
+        mistas = a + np.flatnonzero(origens[a:b] > 1)
+        if len(mistas):
+            ini = np.asarray(indptr[mistas], dtype=np.int64)
+            tamanhos = np.asarray(indptr[mistas + 1], dtype=np.int64) - ini
+            alvo = np.repeat(ini - np.cumsum(tamanhos) + tamanhos, tamanhos) + np.arange(int(tamanhos.sum()))
+            chave = np.repeat(np.arange(len(mistas), dtype=np.int64), tamanhos) * n + indices[alvo]
+            perm = np.argsort(chave)
+            indices[alvo] = indices[alvo][perm]
+            pesos[alvo] = pesos[alvo][perm]
+        a = b
+    del origens
+    for arr in (indptr, indices, pesos):
+        arr.flush()
+    return nnz // 2
+
+
+def construir_grafo_ladrilhos(caminho_estados, grafo_dir, raio, lado_ladrilho=None, workers=None):
+    """
+    Grafo ε-ball (ε fixo) dos robôs em `caminho_estados` (.npy, aberto por
+    memmap), gravado no formato binário em `grafo_dir`. Retorna
+    (n, arestas, ladrilhos).
+    - lado_ladrilho: lado dos ladrilhos (padrão: ~ROBOS_POR_LADRILHO por ladrilho)
+    - workers: processos do pool (None = todos os núcleos)
+    """
+    estados = np.load(caminho_estados, mmap_mode='r')
+    n = len(estados)
+    pasta = pasta_binaria(grafo_dir)
+    os.makedirs(pasta, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='ladrilhos_', dir=grafo_dir)
+    try:
+        with etapa("ladrilhos:particionar", nos=n) as itens:
+            ladrilhos = particionar(estados, raio, lado_ladrilho)
+            caminho_ordem = os.path.join(tmp, 'ordem.npy')
+            inicios = ordenar_por_ladrilho(estados, ladrilhos, caminho_ordem)
+            itens.update(ladrilhos=ladrilhos.total, maior=int(np.diff(inicios).max()))
+
+        with etapa("ladrilhos:pares", ladrilhos=ladrilhos.total) as itens:
+            tarefas = [(t, caminho_estados, caminho_ordem, inicios, ladrilhos, raio, tmp)
+                       for t in range(ladrilhos.total) if inicios[t + 1] > inicios[t]]
+            workers = os.cpu_count() if workers is None else workers
+            if workers <= 1 or len(tarefas) <= 1:
+                resultados = list(map(_pares_ladrilho, tarefas))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(tarefas))) as executor:
+                    resultados = list(executor.map(_pares_ladrilho, tarefas))
+            com_pares = sorted(t for t, k in resultados if k)
+            itens["pares"] = sum(k for _, k in resultados)
+
+        with etapa("ladrilhos:mesclar", nos=n) as itens:
+            tipo_indices = np.int32 if n <= np.iinfo(np.int32).max else np.int64
+            arestas = mesclar_csr(n, tmp, com_pares, pasta, tipo_indices)
+            shutil.copyfile(caminho_estados, os.path.join(pasta, 'estados.npy'))
+            itens["arestas"] = arestas
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return n, arestas, ladrilhos
+
+
+def estatisticas_graus(indptr):
+    """(grau médio, mínimo, máximo) lendo indptr em blocos."""
+    n = len(indptr) - 1
+    soma, minimo, maximo = 0, None, 0
+    for a, b in _blocos(n):
+        g = np.diff(np.asarray(indptr[a:b + 1], dtype=np.int64))
+        soma += int(g.sum())
+        minimo = int(g.min()) if minimo is None else min(minimo, int(g.min()))
+        maximo = max(maximo, int(g.max()))
+    return soma / max(n, 1), minimo or 0, maximo
+
+
+def construir_grafo_epsilon_ball_ladrilhos(num_robos, seed, raio, lado_ladrilho=None, workers=None):
+    """
+    Versão por ladrilhos de construir_grafo.construir_grafo_epsilon_ball:
+    mesmas pastas e formato binário, mas com ε fixo (sem ajuste de raio,
+    que exigiria as componentes do grafo inteiro em memória) e sem
+    exportações texto/figuras.
+    """
+    pasta_base = f"data/sinteticos/robos_{num_robos}_seed{seed}"
+    grafo_dir = f"data/grafo/epsilon_{raio:.1f}_{num_robos}_seed{seed}"
+    os.makedirs(grafo_dir, exist_ok=True)
+
+    n, arestas, ladrilhos = construir_grafo_ladrilhos(os.path.join(pasta_base, "robos.npy"), grafo_dir,
+                                                      raio, lado_ladrilho=lado_ladrilho, workers=workers)
+    indptr = np.load(os.path.join(pasta_binaria(grafo_dir), "indptr.npy"), mmap_mode="r")
+    medio, minimo, maximo = estatisticas_graus(indptr)
+    with open(os.path.join(grafo_dir, "stats.txt"), "w") as f:
+        f.write(f"n_nodes: {n}\n")
+        f.write(f"n_edges: {arestas}\n")
+        f.write(f"final_ε: {raio:.4f}\n")
+        f.write(f"tiles: {ladrilhos.nx}x{ladrilhos.ny} (lado {ladrilhos.lado:.4f})\n")
+        f.write(f"avg_degree: {medio:.4f}\n")
+        f.write(f"min_degree: {minimo}\n")
+        f.write(f"max_degree: {maximo}\n")
+    print(f"[grafo_ladrilhos] {n} nós, {arestas} arestas, {ladrilhos.total} ladrilhos -> `{grafo_dir}`")
+    return n, arestas
@@ -0,0 +1,47 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Compartilhamento somente-leitura de arrays (ex.: CSR + velocidades) entre
+# processos de um pool: o processo pai copia cada array uma vez para um
+# bloco de memória compartilhada e os workers se anexam pelo nome, sem
+# serializar o grafo a cada tarefa.
+
+
+def compartilhar_arrays(**arrays):
+    """
+    Copia cada array para um bloco SharedMemory.
+    Retorna (blocos, descritor): os blocos devem ser liberados pelo pai com
+    `liberar(blocos, remover=True)`; o descritor é pequeno e picklável.
+    """
+    blocos, descritor = [], {}
+    for nome, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        blocos.append(shm)
+        descritor[nome] = (shm.name, arr.shape, arr.dtype.str)
+    return blocos, descritor
+
+
+def anexar_arrays(descritor):
+    """
+    Anexa aos blocos descritos e devolve (blocos, arrays) com views
+    somente-leitura. Os blocos precisam continuar referenciados enquanto
+    as views forem usadas.
+    """
+    blocos, arrays = [], {}
+    for nome, (shm_nome, shape, dtype) in descritor.items():
+        shm = shared_memory.SharedMemory(name=shm_nome)
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        blocos.append(shm)
+        arrays[nome] = arr
+    return blocos, arrays
+
+
+def liberar(blocos, remover=False):
+    """Fecha os blocos; `remover=True` (só no pai) também os apaga do sistema."""
+    for shm in blocos:
+        shm.close()
+        if remover:
+            shm.unlink()
@@ -12,14 +12,23 @@ SRC_DIR = os.path.join(ROOT_DIR, 'src')
 sys.path.insert(0, SRC_DIR)
 sys.path.insert(0, ROOT_DIR)
 
-from config import DELTA_V, SEED, NUM_ROBOS
+from config import DELTA_V, SEED, NUM_ROBOS, RAIO_COMUNICACAO
 from tools.io_utils import gerar_nome_pasta
+from graph.grafo_binario import existe_grafo_binario, carregar_grafo_binario, carregar_grafo
+from graph.grafo_csr import montar_csr, csr_para_networkx
+from perfil import etapa
 
 def carregar_grafo_sintetico(instancia):
     pasta_cluster = os.path.join(ROOT_DIR, 'data', 'cluster', f'guloso_{instancia}')
     robos_path = os.path.join(ROOT_DIR, 'data', 'sinteticos', f"robos_{NUM_ROBOS[instancia]}_seed{SEED}", 'robos.npy')
     edges_path = os.path.join(pasta_cluster, 'edges.csv')
 
+    pasta_saida = os.path.join(ROOT_DIR, 'data', 'cluster', f'guloso_{instancia}')
+    grafo_dir = os.path.join(ROOT_DIR, 'data', 'grafo', f"epsilon_{RAIO_COMUNICACAO:.1f}_{NUM_ROBOS[instancia]}_seed{SEED}")
+    if existe_grafo_binario(grafo_dir):
+        A, estados = carregar_grafo_binario(grafo_dir)
+        return csr_para_networkx(A, estados), pasta_saida
+
     if not os.path.exists(robos_path) or not os.path.exists(edges_path):
         raise FileNotFoundError("Arquivos sintéticos não encontrados. Execute gerar_dados.py e construir_grafo.py.")
 
@@ -33,10 +42,15 @@ def carregar_grafo_sintetico(instancia):
         for linha in f:
             u, v, _ = linha.strip().split(',')
             G.add_edge(int(u), int(v))
-    pasta_saida = os.path.join(ROOT_DIR, 'data', 'cluster', f'guloso_{instancia}')
     return G, pasta_saida
 
 def carregar_grafo_real():
+    pasta_saida = os.path.join(ROOT_DIR, 'data', 'grafo', 'roadnet_ca', 'guloso_fo1')
+    grafo_dir = os.path.join(ROOT_DIR, 'data', 'grafo', 'roadnet_ca')
+    if existe_grafo_binario(grafo_dir):
+        A, estados = carregar_grafo_binario(grafo_dir)
+        return csr_para_networkx(A, estados), pasta_saida
+
     graphml_path = os.path.join(ROOT_DIR, 'data', 'grafo', 'roadnet_ca', 'grafo.graphml')
     if not os.path.exists(graphml_path):
         raise FileNotFoundError(f"Grafo real não encontrado em {graphml_path}. Execute processar_roadnet_ca.py primeiro.")
@@ -47,7 +61,6 @@ def carregar_grafo_real():
         G.nodes[n]['vel']   = float(G.nodes[n]['vel'])
         G.nodes[n]['theta'] = float(G.nodes[n]['theta'])
         G.nodes[n]['bat']   = float(G.nodes[n]['bat'])
-    pasta_saida = os.path.join(ROOT_DIR, 'data', 'grafo', 'roadnet_ca', 'guloso_fo1')
     return G, pasta_saida
 
 def guloso_clusterizacao(G):
@@ -68,16 +81,137 @@ def guloso_clusterizacao(G):
 def calcular_fo1(G, clusters):
     return sum(min(G.nodes[n]['vel'] for n in c) for c in clusters if c)
 
-def salvar_resultados(G, clusters, fo1, tempo_exec, pasta_saida):
+def guloso_clusterizacao_csr(indptr, indices, vel, delta_v=DELTA_V):
+    """
+    Mesma heurística de `guloso_clusterizacao`, sobre arrays:
+    - indptr, indices: adjacência CSR (nós 0..n-1 na ordem de G.nodes)
+    - vel: vetor contíguo de velocidades
+    Retorna um array de rótulos (cluster de cada nó, numerados na ordem
+    em que as sementes são visitadas).
+    """
+    n = len(vel)
+    vel = np.asarray(vel, dtype=np.float64)
+    # filtra uma única vez, por aresta, os vizinhos compatíveis em velocidade
+    linha = np.repeat(np.arange(n), np.diff(indptr))
+    compativel = np.abs(vel[linha] - vel[indices]) <= delta_v
+    viz_ok = np.asarray(indices)[compativel]
+    ptr_ok = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(linha[compativel], minlength=n), out=ptr_ok[1:])
+
+    rotulos = np.full(n, -1, dtype=np.int64)
+    c = 0
+    for node in np.argsort(-vel, kind='stable').tolist():
+        if rotulos[node] >= 0:
+            continue
+        viz = viz_ok[ptr_ok[node]:ptr_ok[node + 1]]
+        rotulos[viz[rotulos[viz] < 0]] = c
+        rotulos[node] = c
+        c += 1
+    return rotulos
+
+def calcular_fo1_rotulos(rotulos, vel):
+    """FO1 (soma das velocidades mínimas por cluster) por redução agrupada."""
+    if len(rotulos) == 0:
+        return 0.0
+    ordem = np.argsort(rotulos, kind='stable')
+    r = rotulos[ordem]
+    inicios = np.flatnonzero(np.r_[True, r[1:] != r[:-1]])
+    return float(np.minimum.reduceat(np.asarray(vel)[ordem], inicios).sum())
+
+def grafo_para_csr(G):
+    """(indptr, indices, vel) de um nx.Graph, preservando a ordem de G.nodes."""
+    A = nx.to_scipy_sparse_array(G, nodelist=list(G.nodes), weight=None, format='csr')
+    vel = np.array([G.nodes[n]['vel'] for n in G.nodes], dtype=np.float64)
+    return A.indptr, A.indices, vel
+
+def carregar_grafo_epsilon(num_robos, seed, raio):
+    """
+    Carrega o grafo ε-ball de `construir_grafo` direto em arrays
+    (indptr, indices, estados), sem passar por networkx. Usa o artefato
+    binário (mmap) se existir; senão, lê o edges.csv.
+    """
+    grafo_dir = os.path.join(ROOT_DIR, 'data', 'grafo', f"epsilon_{raio:.1f}_{num_robos}_seed{seed}")
+    if existe_grafo_binario(grafo_dir):
+        A, estados = carregar_grafo_binario(grafo_dir)
+        return A.indptr, A.indices, estados
+
+    robos_path = os.path.join(ROOT_DIR, 'data', 'sinteticos', f"robos_{num_robos}_seed{seed}", 'robos.npy')
+    edges_path = os.path.join(grafo_dir, 'edges.csv')
+    if not os.path.exists(robos_path) or not os.path.exists(edges_path):
+        raise FileNotFoundError("Arquivos sintéticos não encontrados. Execute gerar_dados.py e construir_grafo.py.")
+
+    estados = np.load(robos_path)
+    arestas = np.loadtxt(edges_path, delimiter=',', skiprows=1, ndmin=2)
+    A = montar_csr(len(estados), arestas[:, 0].astype(np.int32),
+                   arestas[:, 1].astype(np.int32), arestas[:, 2])
+    return A.indptr, A.indices, estados
+
+def carregar_grafo_real_csr():
+    """
+    Versão em arrays de `carregar_grafo_real`: usa o artefato binário se
+    existir; senão, converte o grafo.graphml (mesma ordem de nós).
+    """
+    grafo_dir = os.path.join(ROOT_DIR, 'data', 'grafo', 'roadnet_ca')
+    graphml_path = os.path.join(grafo_dir, 'grafo.graphml')
+    if not existe_grafo_binario(grafo_dir) and not os.path.exists(graphml_path):
+        raise FileNotFoundError(f"Grafo real não encontrado em {grafo_dir}. Execute processar_roadnet_ca.py primeiro.")
+    A, estados = carregar_grafo(grafo_dir)
+    pasta_saida = os.path.join(ROOT_DIR, 'data', 'grafo', 'roadnet_ca', 'guloso_fo1')
+    return A.indptr, A.indices, estados, pasta_saida
+
+def executar_guloso_fo1(num_robos, seed, raio, motor='csr', real=False, pasta=None):
+    """
+    Roda a heurística gulosa sobre o grafo ε-ball da instância e salva em
+    `pasta` (padrão: data/cluster/guloso_fo1/).
+    - motor: 'csr' (arrays) ou 'networkx' (implementação original)
+    - real: usa o grafo do RoadNet-CA (ignora num_robos/seed/raio) e, sem
+      `pasta`, salva em data/grafo/roadnet_ca/guloso_fo1/
+    """
+    with etapa("carregar") as itens:
+        if real:
+            indptr, indices, estados, pasta_real = carregar_grafo_real_csr()
+            pasta = pasta or pasta_real
+        else:
+            indptr, indices, estados = carregar_grafo_epsilon(num_robos, seed, raio)
+        itens.update(nos=len(estados), arestas=len(indices) // 2)
+    vel = estados[:, 2]
+    pasta = pasta or os.path.join(ROOT_DIR, 'data', 'cluster', 'guloso_fo1')
+
+    if motor == 'networkx':
+        from scipy.sparse import csr_matrix
+        with etapa("networkx", nos=len(vel)):
+            A = csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(vel), len(vel)))
+            G = csr_para_networkx(A, estados)
+        with etapa("clusterizar", nos=len(vel)) as itens:
+            t0 = time.time()
+            clusters = guloso_clusterizacao(G)
+            tempo_exec = time.time() - t0
+            itens["clusters"] = len(clusters)
+        rotulos = np.empty(len(vel), dtype=np.int64)
+        for c, membros in enumerate(clusters):
+            rotulos[membros] = c
+    else:
+        with etapa("clusterizar", nos=len(vel)) as itens:
+            t0 = time.time()
+            rotulos = guloso_clusterizacao_csr(indptr, indices, vel)
+            tempo_exec = time.time() - t0
+            itens["clusters"] = int(rotulos.max()) + 1
+
+    with etapa("fo1", nos=len(vel)):
+        fo1 = calcular_fo1_rotulos(rotulos, vel)
+    with etapa("salvar", nos=len(vel)):
+        salvar_resultados_rotulos(rotulos, fo1, tempo_exec, pasta)
+    return rotulos
+
+def _salvar_resumo(n_clusters, sizes, fo1, tempo_exec, pasta_saida):
     os.makedirs(pasta_saida, exist_ok=True)
     resumo = os.path.join(pasta_saida, 'guloso_resumo.txt')
     with open(resumo, 'w') as f:
-        f.write(f"Número de clusters: {len(clusters)}\n")
+        f.write(f"Número de clusters: {n_clusters}\n")
         f.write(f"FO1 = {fo1:.2f}\n")
         f.write(f"Tempo (s) = {tempo_exec:.2f}\n")
     print(f"[OK] Resumo salvo em {resumo}")
 
-    sizes = [len(c) for c in clusters]
     fig, ax = plt.subplots()
     ax.hist(sizes, bins=30, color='purple', edgecolor='black')
     ax.set_xlabel('Tamanho do cluster')
@@ -88,25 +222,30 @@ def salvar_resultados(G, clusters, fo1, tempo_exec, pasta_saida):
     plt.close()
     print(f"[OK] Histograma de tamanhos salvo")
 
+def salvar_resultados(G, clusters, fo1, tempo_exec, pasta_saida):
+    _salvar_resumo(len(clusters), [len(c) for c in clusters], fo1, tempo_exec, pasta_saida)
+
+def salvar_resultados_rotulos(rotulos, fo1, tempo_exec, pasta_saida):
+    sizes = np.bincount(rotulos)
+    _salvar_resumo(len(sizes), sizes, fo1, tempo_exec, pasta_saida)
+    np.save(os.path.join(pasta_saida, 'guloso_labels.npy'), rotulos)
+
 def main():
     parser = argparse.ArgumentParser(description='Heurística Gulosa FO1')
     parser.add_argument('--tipo', choices=['sintetico', 'real'], required=True,
                         help='Tipo de instância: sintetico ou real')
     parser.add_argument('--instancia', choices=list(NUM_ROBOS.keys()), default='small',
                         help='Nome da instância sintética (small, medium, large)')
+    parser.add_argument('--motor', choices=['csr', 'networkx'], default='csr',
+                        help='Implementação: arrays CSR ou networkx original')
     args = parser.parse_args()
 
     if args.tipo == 'sintetico':
-        G, pasta = carregar_grafo_sintetico(args.instancia)
+        pasta = os.path.join(ROOT_DIR, 'data', 'cluster', f'guloso_{args.instancia}')
+        executar_guloso_fo1(NUM_ROBOS[args.instancia], SEED, RAIO_COMUNICACAO,
+                            motor=args.motor, pasta=pasta)
     else:
-        G, pasta = carregar_grafo_real()
-
-    t0 = time.time()
-    clusters = guloso_clusterizacao(G)
-    tempo_exec = time.time() - t0
-    fo1 = calcular_fo1(G, clusters)
-
-    salvar_resultados(G, clusters, fo1, tempo_exec, pasta)
+        executar_guloso_fo1(None, None, None, motor=args.motor, real=True)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import heapq
+import argparse
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from config import DELTA_V, SEED, EPS
+from perfil import etapa
+from heuristics.guloso_fo1 import (
+    carregar_grafo_epsilon, guloso_clusterizacao_csr, calcular_fo1_rotulos,
+)
+
+
+class ParticaoFO1:
+    """
+    Partição com avaliação incremental da FO1 (soma das velocidades mínimas
+    por cluster). Cada cluster guarda um heap de mínimo e um de máximo de
+    velocidade com remoção preguiçosa (entradas cujo nó já saiu do cluster
+    são descartadas ao chegar ao topo), então avaliar mover/trocar um nó
+    custa O(log) por cluster vizinho e O(grau) por nó. Quando as entradas
+    excedentes (obsoletas ou repetidas) de um heap passam do tamanho do
+    cluster, o heap é refeito a partir dos membros vivos, então a memória
+    dos heaps fica O(n) e não cresce com o número de movimentos.
+    """
+
+    def __init__(self, indptr, indices, vel, rotulos, delta_v=DELTA_V):
+        self.indptr = indptr
+        self.indices = indices
+        self.vel = np.asarray(vel, dtype=np.float64)
+        self.delta_v = delta_v
+        self.rotulos = np.array(rotulos, dtype=np.int64)
+        n_clusters = int(self.rotulos.max()) + 1
+        self.tamanho = np.bincount(self.rotulos, minlength=n_clusters).astype(np.int64)
+
+        self.heap_min = [[] for _ in range(n_clusters)]
+        self.heap_max = [[] for _ in range(n_clusters)]
+        for u, (c, v) in enumerate(zip(self.rotulos.tolist(), self.vel.tolist())):
+            self.heap_min[c].append((v, u))
+            self.heap_max[c].append((-v, u))
+        for h in self.heap_min:
+            heapq.heapify(h)
+        for h in self.heap_max:
+            heapq.heapify(h)
+        self.fo1 = calcular_fo1_rotulos(self.rotulos, self.vel)
+
+    # ---- consultas por cluster ----
+    def _compactar(self, c):
+        """Refaz os heaps de c só com os membros vivos se o excedente passar de tamanho[c]."""
+        rot = self.rotulos
+        for heap in (self.heap_min[c], self.heap_max[c]):
+            if len(heap) - self.tamanho[c] > self.tamanho[c]:
+                vivos = {u: chave for chave, u in heap if rot[u] == c}
+                heap[:] = [(chave, u) for u, chave in vivos.items()]
+                heapq.heapify(heap)
+
+    def _limpar(self, heap, c):
+        rot = self.rotulos
+        while heap and rot[heap[0][1]] != c:
+            heapq.heappop(heap)
+
+    def _topo_sem(self, heap, c, u):
+        """Topo do heap do cluster c ignorando o nó u (None se só restar u)."""
+        self._limpar(heap, c)
+        retirados = []
+        while heap and (heap[0][1] == u or self.rotulos[heap[0][1]] != c):
+            item = heapq.heappop(heap)
+            if item[1] == u:
+                retirados.append(item)
+        topo = heap[0][0] if heap else None
+        for item in retirados:
+            heapq.heappush(heap, item)
+        return topo
+
+    def vmin(self, c):
+        self._limpar(self.heap_min[c], c)
+        return self.heap_min[c][0][0]
+
+    def vmax(self, c):
+        self._limpar(self.heap_max[c], c)
+        return -self.heap_max[c][0][0]
+
+    def vmin_sem(self, c, u):
+        return self._topo_sem(self.heap_min[c], c, u)
+
+    def vmax_sem(self, c, u):
+        topo = self._topo_sem(self.heap_max[c], c, u)
+        return None if topo is None else -topo
+
+    # ---- deltas ----
+    def delta_mover(self, u, b):
+        """Variação da FO1 ao mover u para o cluster b (None se viola ΔV)."""
+        a = self.rotulos[u]
+        vu = self.vel[u]
+        min_b = self.vmin(b)
+        novo_min_b = min(min_b, vu)
+        if max(self.vmax(b), vu) - novo_min_b > self.delta_v:
+            return None
+        resto_a = self.vmin_sem(a, u)
+        delta_a = (resto_a if resto_a is not None else 0.0) - self.vmin(a)
+        return delta_a + novo_min_b - min_b
+
+    def delta_trocar(self, u, w):
+        """Variação da FO1 ao trocar u e w de cluster (None se viola ΔV)."""
+        a, b = self.rotulos[u], self.rotulos[w]
+        vu, vw = self.vel[u], self.vel[w]
+        delta = 0.0
+        for c, sai, entra, ve in ((a, u, w, vw), (b, w, u, vu)):
+            mn = self.vmin_sem(c, sai)
+            mx = self.vmax_sem(c, sai)
+            novo_min = ve if mn is None else min(mn, ve)
+            novo_max = ve if mx is None else max(mx, ve)
+            if novo_max - novo_min > self.delta_v:
+                return None
+            delta += novo_min - self.vmin(c)
+        return delta
+
+    # ---- movimentos ----
+    def mover(self, u, b, delta):
+        a = self.rotulos[u]
+        self.rotulos[u] = b
+        self.tamanho[a] -= 1
+        self.tamanho[b] += 1
+        heapq.heappush(self.heap_min[b], (self.vel[u], u))
+        heapq.heappush(self.heap_max[b], (-self.vel[u], u))
+        self._compactar(a)
+        self._compactar(b)
+        self.fo1 += delta
+
+    def trocar(self, u, w, delta):
+        a, b = self.rotulos[u], self.rotulos[w]
+        self.mover(u, b, 0.0)
+        self.mover(w, a, 0.0)
+        self.fo1 += delta
+
+    def melhor_vizinho(self, u):
+        """
+        Melhor movimento de u: mover para um cluster adjacente ou trocar com
+        um vizinho de outro cluster. Retorna (delta, tipo, alvo, avaliados).
+        """
+        a = self.rotulos[u]
+        viz = self.indices[self.indptr[u]:self.indptr[u + 1]]
+        melhor = (0.0, None, None)
+        avaliados = 0
+        vistos = set()
+        for w in viz.tolist():
+            b = self.rotulos[w]
+            if b == a:
+                continue
+            if b not in vistos:
+                vistos.add(b)
+                d = self.delta_mover(u, b)
+                avaliados += 1
+                if d is not None and d > melhor[0]:
+                    melhor = (d, 'mover', b)
+            d = self.delta_trocar(u, w)
+            avaliados += 1
+            if d is not None and d > melhor[0]:
+                melhor = (d, 'trocar', w)
+        return melhor[0], melhor[1], melhor[2], avaliados
+
+    def rotulos_compactos(self):
+        """Rótulos renumerados 0..K-1 (clusters esvaziados são descartados)."""
+        _, r = np.unique(self.rotulos, return_inverse=True)
+        return r.ravel()
+
+
+def busca_local(indptr, indices, vel, rotulos, tempo_max=60.0, max_movimentos=None,
+                seed=SEED, delta_v=DELTA_V):
+    """
+    Busca local de melhor vizinho por nó (mover/trocar entre clusters
+    adjacentes) a partir de `rotulos`, respeitando ΔV.
+    Só ΔV e a FO1 são verificados: os clusters não precisam continuar
+    conexos no grafo ε (retirar o centro de uma estrela do guloso pode
+    partir o cluster de origem em componentes soltos com o mesmo rótulo).
+    Para no orçamento de tempo (s), de movimentos aplicados, ou quando uma
+    passada completa não melhora a FO1.
+    Retorna (rotulos, fo1, estatisticas).
+    """
+    part = ParticaoFO1(indptr, indices, vel, rotulos, delta_v=delta_v)
+    rng = np.random.default_rng(seed)
+    n = len(part.vel)
+    fo1_inicial = part.fo1
+    avaliados = aplicados = passadas = 0
+    t0 = time.perf_counter()
+    esgotou = False
+
+    while not esgotou:
+        passadas += 1
+        melhorou = False
+        for k, u in enumerate(rng.permutation(n).tolist()):
+            if k % 1024 == 0 and tempo_max is not None and time.perf_counter() - t0 >= tempo_max:
+                esgotou = True
+                break
+            delta, tipo, alvo, av = part.melhor_vizinho(u)
+            avaliados += av
+            if tipo is None or delta <= EPS:
+                continue
+            if tipo == 'mover':
+                part.mover(u, alvo, delta)
+            else:
+                part.trocar(u, alvo, delta)
+            aplicados += 1
+            melhorou = True
+            if max_movimentos is not None and aplicados >= max_movimentos:
+                esgotou = True
+                break
+        if not melhorou:
+            break
+
+    tempo = time.perf_counter() - t0
+    rot = part.rotulos_compactos()
+    stats = {
+        'fo1_inicial': fo1_inicial,
+        'passadas': passadas,
+        'avaliados': avaliados,
+        'aplicados': aplicados,
+        'tempo': tempo,
+        'movimentos_por_s': avaliados / tempo if tempo > 0 else float('inf'),
+    }
+    return rot, calcular_fo1_rotulos(rot, part.vel), stats
+
+
+def salvar_resultados(rotulos, fo1, stats, pasta_saida, nome='local_search'):
+    os.makedirs(pasta_saida, exist_ok=True)
+    resumo = os.path.join(pasta_saida, f'{nome}_resumo.txt')
+    with open(resumo, 'w') as f:
+        f.write(f"Número de clusters: {rotulos.max() + 1}\n")
+        f.write(f"FO1 = {fo1:.2f}\n")
+        f.write(f"FO1 inicial (guloso) = {stats['fo1_inicial']:.2f}\n")
+        f.write(f"Tempo (s) = {stats['tempo']:.2f}\n")
+        f.write(f"Passadas: {stats['passadas']}\n")
+        f.write(f"Movimentos avaliados: {stats['avaliados']}\n")
+        f.write(f"Movimentos aplicados: {stats['aplicados']}\n")
+        f.write(f"Movimentos/s: {stats['movimentos_por_s']:.0f}\n")
+    np.save(os.path.join(pasta_saida, f'{nome}_labels.npy'), rotulos)
+    print(f"[OK] Resumo salvo em {resumo}")
+
+
+def executar_local_search(num_robos, seed, raio, tempo_max=60.0, max_movimentos=None):
+    """Guloso FO1 seguido de busca local; salva em data/cluster/local_search/."""
+    with etapa("carregar") as itens:
+        indptr, indices, estados = carregar_grafo_epsilon(num_robos, seed, raio)
+        itens.update(nos=len(estados), arestas=len(indices) // 2)
+    vel = np.asarray(estados[:, 2])
+    with etapa("guloso_inicial", nos=len(vel)):
+        inicial = guloso_clusterizacao_csr(indptr, indices, vel)
+    with etapa("busca_local", nos=len(vel)) as itens:
+        rotulos, fo1, stats = busca_local(indptr, indices, vel, inicial, tempo_max=tempo_max,
+                                          max_movimentos=max_movimentos, seed=seed)
+        itens.update(avaliados=stats['avaliados'], aplicados=stats['aplicados'])
+    print(f"[local_search] FO1 {stats['fo1_inicial']:.2f} -> {fo1:.2f} | "
+          f"{stats['aplicados']} aplicados | {stats['movimentos_por_s']:.0f} movimentos/s")
+    salvar_resultados(rotulos, fo1, stats, os.path.join(ROOT_DIR, 'data', 'cluster', 'local_search'))
+    return rotulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Busca local sobre a solução gulosa (FO1)')
+    parser.add_argument('--num-robos', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--raio', type=float, default=50)
+    parser.add_argument('--tempo-max', type=float, default=60.0, help='Orçamento de tempo (s)')
+    parser.add_argument('--max-movimentos', type=int, default=None, help='Orçamento de movimentos aplicados')
+    args = parser.parse_args()
+    executar_local_search(args.num_robos, args.seed, args.raio,
+                          tempo_max=args.tempo_max, max_movimentos=args.max_movimentos)
+
+
+if __name__ == '__main__':
+    main()
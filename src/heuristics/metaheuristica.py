@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+import os
+import sys
+import math
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from config import DELTA_V, SEED, EPS
+from perfil import etapa
+from graph.memoria_compartilhada import compartilhar_arrays, anexar_arrays, liberar
+from heuristics.guloso_fo1 import (
+    carregar_grafo_epsilon, guloso_clusterizacao_csr, calcular_fo1_rotulos,
+)
+from heuristics.local_search import ParticaoFO1
+
+# Arrays compartilhados, anexados uma vez por worker (ver _iniciar_worker)
+_BLOCOS = None
+_GRAFO = None
+
+
+def _iniciar_worker(descritor):
+    global _BLOCOS, _GRAFO
+    _BLOCOS, _GRAFO = anexar_arrays(descritor)
+
+
+def recozimento_simulado(indptr, indices, vel, rotulos, rng, tempo_max=60.0, max_iter=None,
+                         t_inicial=None, resfriamento=0.99995, delta_v=DELTA_V):
+    """
+    Uma cadeia de simulated annealing sobre a FO1.
+    Vizinhança: sorteia um nó u e um vizinho w de outro cluster e tenta
+    mover u para o cluster de w ou trocar u e w (deltas via ParticaoFO1).
+    Aceita pioras com probabilidade exp(Δ/T), T *= resfriamento por iteração.
+    A melhor partição não é copiada a cada melhora: os movimentos aceitos
+    desde o melhor estado ficam num diário (nó, novo rótulo), reaplicado em
+    `melhor` quando surge um novo melhor. Se o diário passar de n entradas
+    ele é descartado e o próximo melhor é copiado inteiro (O(1) amortizado
+    por movimento).
+    Retorna (melhores_rotulos, melhor_fo1, iteracoes).
+    """
+    part = ParticaoFO1(indptr, indices, vel, rotulos, delta_v=delta_v)
+    n = len(part.vel)
+    graus = np.diff(indptr)
+    if t_inicial is None:
+        # ordem de grandeza das variações típicas da FO1: metade da tolerância ΔV
+        t_inicial = delta_v / 2
+    temp = t_inicial
+    melhor_fo1 = part.fo1
+    melhor = part.rotulos.copy()
+    diario = []
+    estourou = False
+    it = 0
+    t0 = time.perf_counter()
+
+    lote = 4096
+    while True:
+        if max_iter is not None and it >= max_iter:
+            break
+        if tempo_max is not None and time.perf_counter() - t0 >= tempo_max:
+            break
+        nos = rng.integers(0, n, size=lote)
+        sorteios = rng.random((lote, 3))
+        for u, (r_viz, r_tipo, r_aceite) in zip(nos.tolist(), sorteios.tolist()):
+            if max_iter is not None and it >= max_iter:
+                break
+            it += 1
+            g = graus[u]
+            if g == 0:
+                continue
+            w = int(indices[indptr[u] + int(r_viz * g)])
+            b = part.rotulos[w]
+            if b == part.rotulos[u]:
+                continue
+            if r_tipo < 0.5:
+                delta = part.delta_mover(u, b)
+            else:
+                delta = part.delta_trocar(u, w)
+            if delta is None:
+                continue
+            if delta >= 0 or r_aceite < math.exp(delta / temp):
+                if r_tipo < 0.5:
+                    part.mover(u, b, delta)
+                    diario.append((u, b))
+                else:
+                    diario += ((u, b), (w, part.rotulos[u]))
+                    part.trocar(u, w, delta)
+                if part.fo1 > melhor_fo1 + EPS:
+                    melhor_fo1 = part.fo1
+                    if estourou:
+                        melhor = part.rotulos.copy()
+                        estourou = False
+                    else:
+                        for v, c in diario:
+                            melhor[v] = c
+                    diario.clear()
+                elif len(diario) > n:
+                    diario.clear()
+                    estourou = True
+            temp = max(temp * resfriamento, 1e-9)
+
+    _, melhor = np.unique(melhor, return_inverse=True)
+    return melhor.ravel(), calcular_fo1_rotulos(melhor.ravel(), part.vel), it
+
+
+def _executar_cadeia(args):
+    """Tarefa do pool: uma cadeia sobre os arrays compartilhados."""
+    semente, tempo_max, max_iter = args
+    rng = np.random.default_rng(semente)
+    t0 = time.perf_counter()
+    rot, fo1, it = recozimento_simulado(_GRAFO['indptr'], _GRAFO['indices'], _GRAFO['vel'],
+                                        _GRAFO['rotulos'], rng, tempo_max=tempo_max, max_iter=max_iter)
+    return rot, fo1, it, time.perf_counter() - t0
+
+
+def multi_start_sa(indptr, indices, vel, rotulos, n_cadeias=None, workers=None, seed=SEED,
+                   tempo_max=60.0, max_iter=None):
+    """
+    Roda n_cadeias cadeias independentes de SA em um pool de processos.
+    Adjacência, velocidades e partição inicial ficam em memória
+    compartilhada (uma cópia só-leitura para todos os workers); cada cadeia
+    usa uma semente derivada de `seed` via SeedSequence.spawn, então com
+    `max_iter` o resultado não depende do número de workers.
+    Retorna (melhores_rotulos, melhor_fo1, resultados_por_cadeia).
+    """
+    workers = os.cpu_count() if workers is None else workers
+    n_cadeias = workers if n_cadeias is None else n_cadeias
+    sementes = np.random.SeedSequence(seed).spawn(n_cadeias)
+
+    blocos, descritor = compartilhar_arrays(indptr=indptr, indices=indices,
+                                            vel=np.asarray(vel, dtype=np.float64),
+                                            rotulos=rotulos)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                                 initargs=(descritor,)) as pool:
+            resultados = list(pool.map(_executar_cadeia,
+                                       [(s, tempo_max, max_iter) for s in sementes]))
+    finally:
+        liberar(blocos, remover=True)
+
+    k = int(np.argmax([r[1] for r in resultados]))
+    return resultados[k][0], resultados[k][1], resultados
+
+
+def executar_meta(num_robos, seed, raio, n_cadeias=None, workers=None, tempo_max=60.0, max_iter=None):
+    """Multi-start SA a partir do guloso FO1; salva em data/cluster/meta/."""
+    with etapa("carregar") as itens:
+        indptr, indices, estados = carregar_grafo_epsilon(num_robos, seed, raio)
+        itens.update(nos=len(estados), arestas=len(indices) // 2)
+    vel = np.asarray(estados[:, 2], dtype=np.float64)
+    with etapa("guloso_inicial", nos=len(vel)):
+        inicial = guloso_clusterizacao_csr(indptr, indices, vel)
+        fo1_inicial = calcular_fo1_rotulos(inicial, vel)
+
+    with etapa("sa_multi_start", nos=len(vel)) as itens:
+        t0 = time.perf_counter()
+        rotulos, fo1, resultados = multi_start_sa(indptr, indices, vel, inicial, n_cadeias=n_cadeias,
+                                                  workers=workers, seed=seed, tempo_max=tempo_max,
+                                                  max_iter=max_iter)
+        tempo = time.perf_counter() - t0
+        iteracoes = sum(r[2] for r in resultados)
+        itens.update(cadeias=len(resultados), iteracoes=iteracoes)
+
+    pasta = os.path.join(ROOT_DIR, 'data', 'cluster', 'meta')
+    os.makedirs(pasta, exist_ok=True)
+    resumo = os.path.join(pasta, 'meta_resumo.txt')
+    with open(resumo, 'w') as f:
+        f.write(f"Número de clusters: {rotulos.max() + 1}\n")
+        f.write(f"FO1 = {fo1:.2f}\n")
+        f.write(f"FO1 inicial (guloso) = {fo1_inicial:.2f}\n")
+        f.write(f"Tempo (s) = {tempo:.2f}\n")
+        f.write(f"Cadeias: {len(resultados)}\n")
+        f.write(f"Iterações totais: {iteracoes}\n")
+        for k, (_, fo1_k, it_k, t_k) in enumerate(resultados):
+            f.write(f"Cadeia {k}: FO1 = {fo1_k:.2f}, iterações = {it_k}, tempo = {t_k:.2f}\n")
+    np.save(os.path.join(pasta, 'meta_labels.npy'), rotulos)
+    print(f"[meta] FO1 {fo1_inicial:.2f} -> {fo1:.2f} ({len(resultados)} cadeias)")
+    print(f"[OK] Resumo salvo em {resumo}")
+    return rotulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated annealing multi-start (FO1)')
+    parser.add_argument('--num-robos', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--raio', type=float, default=50)
+    parser.add_argument('--cadeias', type=int, default=None, help='Número de cadeias (padrão = workers)')
+    parser.add_argument('--workers', type=int, default=None, help='Processos (padrão = núcleos)')
+    parser.add_argument('--tempo-max', type=float, default=60.0, help='Orçamento por cadeia (s)')
+    parser.add_argument('--max-iter', type=int, default=None, help='Iterações por cadeia')
+    args = parser.parse_args()
+    executar_meta(args.num_robos, args.seed, args.raio, n_cadeias=args.cadeias,
+                  workers=args.workers, tempo_max=args.tempo_max, max_iter=args.max_iter)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Instrumentação por etapa do pipeline (`pipeline.py --profile`).
+
+Os módulos marcam sub-etapas com `with etapa("nome") as itens:` e anotam
+quantidades processadas em `itens` (nós, arestas, pares...). Sem um
+rastreador ativo, `etapa` não mede nada e custa praticamente zero.
+Com `ativar(...)`, cada etapa vira um span com tempo de parede, CPU e pico
+de RSS, gravado em JSON por `finalizar()` (um span por linha, para dar diff
+entre execuções). Opcionalmente grava também um dump do cProfile.
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_ATIVO = None
+
+
+def _rss_pico_mb():
+    """Pico de RSS do processo até agora (None se indisponível)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KiB; macOS em bytes
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 2**10
+
+
+class Rastreador:
+    def __init__(self, saida, cprofile=None):
+        self.saida = saida
+        self.cprofile = cprofile
+        self.spans = []
+        self.pilha = []
+        self.t0 = time.perf_counter()
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+        self.profiler = cProfile.Profile() if cprofile else None
+        if self.profiler:
+            self.profiler.enable()
+
+    @contextmanager
+    def etapa(self, nome, **itens):
+        self.pilha.append(nome)
+        caminho = '/'.join(self.pilha)
+        span = {'nome': caminho, 'profundidade': len(self.pilha) - 1, 'itens': dict(itens)}
+        rss0 = _rss_pico_mb()
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield span['itens']
+        finally:
+            span['inicio_s'] = round(w0 - self.t0, 6)
+            span['wall_s'] = round(time.perf_counter() - w0, 6)
+            span['cpu_s'] = round(time.process_time() - c0, 6)
+            rss1 = _rss_pico_mb()
+            span['rss_pico_mb'] = None if rss1 is None else round(rss1, 2)
+            span['rss_pico_aumento_mb'] = None if rss1 is None else round(rss1 - rss0, 2)
+            span['itens'] = {k: (int(v) if hasattr(v, '__index__') else v)
+                             for k, v in span['itens'].items()}
+            self.spans.append(span)
+            self.pilha.pop()
+
+    def finalizar(self):
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.cprofile)
+            print(f"[perfil] cProfile salvo em {self.cprofile}")
+        pasta = os.path.dirname(os.path.abspath(self.saida))
+        os.makedirs(pasta, exist_ok=True)
+        spans = sorted(self.spans, key=lambda s: s['inicio_s'])
+        with open(self.saida, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f'"meta": {json.dumps({"inicio": self.inicio, "argv": sys.argv}, ensure_ascii=False)},\n')
+            f.write('"spans": [\n')
+            f.write(',\n'.join(json.dumps(s, ensure_ascii=False, sort_keys=True) for s in spans))
+            f.write('\n]\n}\n')
+        print(f"[perfil] Trace salvo em {self.saida} ({len(spans)} spans)")
+
+
+def ativar(saida, cprofile=None):
+    global _ATIVO
+    _ATIVO = Rastreador(saida, cprofile=cprofile)
+    return _ATIVO
+
+
+def finalizar():
+    global _ATIVO
+    if _ATIVO is not None:
+        _ATIVO.finalizar()
+        _ATIVO = None
+
+
+@contextmanager
+def etapa(nome, **itens):
+    """Span de uma sub-etapa; sem rastreador ativo só devolve o dict de itens."""
+    if _ATIVO is None:
+        yield dict(itens)
+        return
+    with _ATIVO.etapa(nome, **itens) as d:
+        yield d
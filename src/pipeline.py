@@ -7,9 +7,25 @@ SRC  = os.path.join(ROOT, "src")
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
 
+from perfil import etapa
+
 @click.group()
-def cli():
-    pass
+@click.option("--profile", "perfil_saida", default=None, metavar="TRACE.json",
+              help="Grava um span (parede/CPU/pico RSS/itens) por sub-etapa neste JSON")
+@click.option("--profile-cprofile", default=None, metavar="SAIDA.prof",
+              help="Também grava um dump do cProfile (requer --profile)")
+@click.option("--plots", type=click.Choice(["none","fast","full"]), default="full", show_default=True,
+              help="Figuras: nenhuma, rasterizadas (dpi 100) ou vetoriais (dpi 300); "
+                   "renderizadas em um processo de fundo enquanto o pipeline segue")
+@click.pass_context
+def cli(ctx, perfil_saida, profile_cprofile, plots):
+    import renderizacao
+    renderizacao.configurar(plots, fundo=True)
+    ctx.call_on_close(renderizacao.aguardar)
+    if perfil_saida:
+        import perfil
+        perfil.ativar(perfil_saida, cprofile=profile_cprofile)
+        ctx.call_on_close(perfil.finalizar)
 
 @cli.command()
 @click.option("--num-robos", required=True, type=int)
@@ -17,78 +33,187 @@ def cli():
 @click.option("--seed", default=42, type=int)
 def generate(num_robos, lado, seed):
     from generate.gerar_dados import gerar_dados_robos
-    gerar_dados_robos(seed=seed, tamanho=num_robos, lado=lado)
+    with etapa("generate", robos=num_robos):
+        gerar_dados_robos(seed=seed, tamanho=num_robos, lado=lado)
 
 @cli.command()
 @click.option("--num-robos", required=True, type=int)
 @click.option("--seed", default=42, type=int)
 @click.option("--raio", required=True, type=float)
-def build_graph(num_robos, seed, raio):
+@click.option("--exportar", multiple=True, type=click.Choice(["graphml","csv"]),
+              default=("graphml","csv"), show_default=True,
+              help="Formatos texto gerados a partir dos arrays CSR")
+@click.option("--desenhar/--sem-desenhar", default=True, show_default=True)
+@click.option("--modo-raio", type=click.Choice(["varredura","exato"]), default="varredura",
+              show_default=True, help="Ajuste de ε: varredura multiplicativa ou raio mínimo exato")
+@click.option("--raio-max", default=200, type=float, show_default=True)
+def build_graph(num_robos, seed, raio, exportar, desenhar, modo_raio, raio_max):
     from graph.construir_grafo import construir_grafo_epsilon_ball
-    construir_grafo_epsilon_ball(num_robos=num_robos, seed=seed, raio=raio)
+    with etapa("build-graph", nos=num_robos):
+        construir_grafo_epsilon_ball(num_robos=num_robos, seed=seed, raio=raio,
+                                     raio_max=raio_max, exportar=exportar,
+                                     desenhar=desenhar, modo=modo_raio)
+
+@cli.command()
+@click.option("--num-robos", required=True, type=int)
+@click.option("--seed", default=42, type=int)
+@click.option("--raio", required=True, type=float)
+@click.option("--lado-ladrilho", default=None, type=float,
+              help="Lado dos ladrilhos (padrão: ~50k robôs por ladrilho; nunca menor que ε)")
+@click.option("--workers", default=None, type=int, help="Processos do pool (padrão: todos os núcleos)")
+def build_graph_tiled(num_robos, seed, raio, lado_ladrilho, workers):
+    """
+    ε-ball com ε fixo por ladrilhos + halo, fora da memória (milhões de robôs).
+
+    Só compensa quando estados e arestas não cabem na RAM: os pares passam
+    pelo disco e a CSR é montada em duas passadas, então para instâncias
+    que cabem em memória o build-graph é mais rápido (e ajusta o raio).
+    """
+    from graph.grafo_ladrilhos import construir_grafo_epsilon_ball_ladrilhos
+    with etapa("build-graph-tiled", nos=num_robos):
+        construir_grafo_epsilon_ball_ladrilhos(num_robos=num_robos, seed=seed, raio=raio,
+                                               lado_ladrilho=lado_ladrilho, workers=workers)
 
 @cli.command()
 @click.option("--method", type=click.Choice(["guloso_fo1","local_search","meta"]), required=True)
 @click.option("--num-robos", type=int, required=True)
 @click.option("--seed", default=42, type=int)
 @click.option("--raio", default=50, type=float)
-def cluster(method, num_robos, seed, raio):
+@click.option("--motor", type=click.Choice(["csr","networkx"]), default="csr", show_default=True,
+              help="Implementação do guloso_fo1: arrays CSR ou networkx original")
+@click.option("--tempo-max", default=60.0, type=float, show_default=True,
+              help="Orçamento de tempo (s) da busca local / metaheurística")
+@click.option("--max-movimentos", default=None, type=int,
+              help="Orçamento de movimentos aplicados da busca local")
+@click.option("--cadeias", default=None, type=int,
+              help="Cadeias de simulated annealing (meta); padrão = núcleos")
+def cluster(method, num_robos, seed, raio, motor, tempo_max, max_movimentos, cadeias):
+    with etapa(f"cluster:{method}", nos=num_robos):
+        _cluster(method, num_robos, seed, raio, motor, tempo_max, max_movimentos, cadeias)
+
+def _cluster(method, num_robos, seed, raio, motor, tempo_max, max_movimentos, cadeias):
     if method == "guloso_fo1":
         from heuristics.guloso_fo1 import executar_guloso_fo1
-        executar_guloso_fo1(num_robos=num_robos, seed=seed, raio=raio)
+        executar_guloso_fo1(num_robos=num_robos, seed=seed, raio=raio, motor=motor)
     elif method == "local_search":
         from heuristics.local_search import executar_local_search
-        executar_local_search(num_robos=num_robos, seed=seed, raio=raio)
+        executar_local_search(num_robos=num_robos, seed=seed, raio=raio,
+                              tempo_max=tempo_max, max_movimentos=max_movimentos)
     else:
         from heuristics.metaheuristica import executar_meta
-        executar_meta(num_robos=num_robos, seed=seed, raio=raio)
+        executar_meta(num_robos=num_robos, seed=seed, raio=raio,
+                      n_cadeias=cadeias, tempo_max=tempo_max)
 
 @cli.command()
-def evaluate():
-    # parse all data/cluster/* folders and print a table
-    import glob, os
-    rows = []
-    for method in os.listdir("data/cluster"):
-        for inst in os.listdir(f"data/cluster/{method}"):
-            resumo = os.path.join("data","cluster",method,inst,"resumo.txt")
-            # open resumo, extract lines, append to rows...
-    # print markdown or CSV
-    pass
+@click.option("--num-robos", type=int, required=True)
+@click.option("--seed", default=42, type=int)
+@click.option("--raio", default=50, type=float)
+@click.option("--k", default=5, type=int, show_default=True, help="Clusters de KMeans/aglomerativo/spectral")
+@click.option("--metodos", multiple=True, type=click.Choice(["kmeans","agglomerativo","louvain","spectral"]),
+              default=None, help="Baselines a rodar (padrão: todos)")
+@click.option("--modo-aglomerativo", type=click.Choice(["ward","conectividade","birch"]), default="ward",
+              show_default=True, help="Ward livre, restrito às arestas ε-ball, ou sobre CF-tree (Birch)")
+@click.option("--workers", default=None, type=int, help="Processos do pool (padrão: um por método)")
+@click.option("--desenhar/--sem-desenhar", default=True, show_default=True)
+def baselines(num_robos, seed, raio, k, metodos, modo_aglomerativo, workers, desenhar):
+    """Roda os baselines em paralelo sobre robos.npy e o grafo ε-ball, carregados uma vez."""
+    import numpy as np
+    from graph.grafo_binario import carregar_grafo
+    from cluster_baselines.executar_baselines import executar_baselines
+
+    with etapa("baselines:carregar", nos=num_robos):
+        estados = np.load(os.path.join("data", "sinteticos", f"robos_{num_robos}_seed{seed}", "robos.npy"))
+        A, _ = carregar_grafo(os.path.join("data", "grafo", f"epsilon_{raio:.1f}_{num_robos}_seed{seed}"))
+        # o pool serializa as entradas: materializa os memmaps uma vez aqui
+        A = A.copy()
+    with etapa("baselines:executar", nos=num_robos, metodos=len(metodos) or 4):
+        executar_baselines(estados, A, metodos=metodos or None, k=k, seed=seed,
+                           workers=workers, desenhar=desenhar, modo_aglomerativo=modo_aglomerativo)
+
+@cli.command()
+@click.option("--num-robos", type=int, required=True)
+@click.option("--seed", default=42, type=int)
+@click.option("--raio", default=50, type=float)
+@click.option("--passos", default=100, type=int, show_default=True)
+@click.option("--dt", default=0.1, type=float, show_default=True, help="Intervalo de tempo de um passo")
+@click.option("--folga", default=None, type=float,
+              help="Folga δ do grafo: um robô é reavaliado após andar δ/2 e só os pares em "
+                   "ε±δ são conferidos a cada passo (padrão: 0.2·raio; o grafo é sempre exato)")
+@click.option("--lado", default=None, type=float, help="Reflete os robôs nas bordas de [0, lado]²")
+def simulate(num_robos, seed, raio, passos, dt, folga, lado):
+    """Movimento dos robôs com grafo ε-ball e clusterização gulosa atualizados incrementalmente."""
+    from graph.dinamico import executar_simulacao
+    with etapa("simulate", nos=num_robos, passos=passos):
+        executar_simulacao(num_robos, seed, passos, raio, dt=dt, folga=folga, lado=lado)
+
+@cli.command()
+@click.option("--instancias", multiple=True, default=None, type=click.Choice(["small","medium","large"]),
+              help="Instâncias de config.NUM_ROBOS (padrão: todas)")
+@click.option("--tamanho", multiple=True, metavar="N:LADO", help="Instância extra, ex.: 100000:10000")
+@click.option("--etapas", multiple=True, default=None, type=click.Choice(["geracao","epsilon_fixo","epsilon_exato","epsilon","kmeans",
+                                                  "aglomerativo","aglomerativo_conectividade",
+                                                  "aglomerativo_birch","louvain","spectral",
+                                                  "guloso_fo1","coocorrencia"]),
+              help="Etapas a medir (padrão: todas)")
+@click.option("--repeticoes", default=3, type=int, show_default=True)
+@click.option("--saida", default=None, help="JSON de saída")
+@click.option("--baseline", default=None, help="JSON de referência para detectar regressões")
+@click.option("--tolerancia", default=0.2, type=float, show_default=True)
+def benchmark(instancias, tamanho, etapas, repeticoes, saida, baseline, tolerancia):
+    from benchmark_escalabilidade import executar_benchmark
+    _, regressoes = executar_benchmark(instancias or None, tamanho, etapas or None,
+                                       repeticoes=repeticoes, saida=saida,
+                                       baseline=baseline, tolerancia=tolerancia)
+    if regressoes:
+        raise SystemExit(1)
 
 @cli.command(name="evaluate")
-def evaluate_command():
+@click.option("--referencia", default=None, metavar="ROTULOS.npy",
+              help="Rótulos verdadeiros: NMI/ARI/VI de cada partição contra eles")
+@click.option("--workers", default=None, type=int, help="Processos do pool (padrão: todos os núcleos)")
+@click.option("--comparar/--sem-comparar", default=True, show_default=True,
+              help="Matrizes NMI/ARI/VI entre todos os *_labels.npy de data/cluster (em data/avaliacao)")
+def evaluate_command(referencia, workers, comparar):
     """Avalia as soluções geradas e imprime um comparativo em Markdown."""
     import os, re
 
-    header = "| Método              | Instância              | #Clusters | FO₁        | Tempo (s) |"
+    header = "| Método              | Resumo                 | #Clusters | FO₁        | Tempo (s) |"
     print(header)
     print("|---------------------|------------------------|-----------|------------|-----------|")
 
     cluster_root = "data/cluster"
-    for method in sorted(os.listdir(cluster_root)):
+    metodos = sorted(os.listdir(cluster_root)) if os.path.isdir(cluster_root) else []
+    if not metodos:
+        print(f"[avaliacao] aviso: nenhuma solução em {cluster_root}; rode `cluster` antes")
+    for method in metodos:
         method_dir = os.path.join(cluster_root, method)
         if not os.path.isdir(method_dir):
             continue
 
-        # Casos com arquivos diretos (sem subpastas por instância)
-        resumo_path = os.path.join(method_dir, "guloso_resumo.txt")
-        if os.path.isfile(resumo_path):
-            with open(resumo_path, "r", encoding="utf-8") as f:
+        # Resumos gravados direto na pasta do método (guloso_resumo.txt, local_search_resumo.txt, ...)
+        for resumo in sorted(f for f in os.listdir(method_dir) if f.endswith("_resumo.txt")):
+            with open(os.path.join(method_dir, resumo), "r", encoding="utf-8") as f:
                 text = f.read()
-            method_label = method
-            inst_label = "robos_10000_seed42"
-        else:
-            continue
 
-        m_clusters = re.search(r"Total de clusters:\s*(\d+)", text)
-        m_fo1      = re.search(r"FO₁.*?:\s*([\d\.]+)", text)
-        m_time     = re.search(r"Tempo de execução:\s*([\d\.]+)", text)
+            m_clusters = re.search(r"(?:Total|Número) de clusters:\s*(\d+)", text)
+            m_fo1      = re.search(r"FO(?:₁|1)[^:=\n]*[:=]\s*(-?[\d\.]+)", text)
+            m_time     = re.search(r"Tempo[^:=\n]*[:=]\s*([\d\.]+)", text)
+
+            n_clusters = m_clusters.group(1) if m_clusters else "-"
+            fo1_val    = m_fo1.group(1)      if m_fo1      else "-"
+            t_exec     = m_time.group(1)     if m_time     else "-"
 
-        n_clusters = m_clusters.group(1) if m_clusters else "-"
-        fo1_val    = m_fo1.group(1)      if m_fo1      else "-"
-        t_exec     = m_time.group(1)     if m_time     else "-"
+            print(f"| {method:<20} | {resumo:<22} | {n_clusters:>9} | {fo1_val:>10} | {t_exec:>9} |")
 
-        print(f"| {method_label:<20} | {inst_label:<22} | {n_clusters:>9} | {fo1_val:>10} | {t_exec:>9} |")
+    if comparar:
+        import avaliacao
+        if referencia is None and not avaliacao.descobrir_rotulos(cluster_root):
+            print(f"[avaliacao] aviso: nenhum *_labels.npy em {cluster_root}; comparação NMI/ARI/VI pulada")
+            return
+        particoes, matrizes = avaliacao.avaliar(cluster_root, referencia, workers=workers)
+        print()
+        print(avaliacao.tabela_markdown(particoes, matrizes))
+        print(f"[avaliacao] {len(particoes.pares())} pares -> {avaliacao.saida_dir}")
 
 
 if __name__ == "__main__":
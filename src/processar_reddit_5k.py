@@ -1,53 +1,72 @@
 import os
+import sys
+import argparse
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
-
-base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-dados_path = os.path.join(base_dir, 'data', 'Reddit', 'processed', 'reddit_5k.npz')
-saida_dir = os.path.join(base_dir, 'data', 'Reddit', 'processed')
-os.makedirs(saida_dir, exist_ok=True)
-
-reddit = np.load(dados_path)
-x = reddit['feature']
-y = reddit['label']
-ids = reddit['node_ids']
-edge_index = reddit['edge_index']
-
-n_nodes = x.shape[0]
-
-G = nx.Graph()
-
-for i in range(n_nodes):
-    G.add_node(i,
-               features=','.join(map(str, x[i])),
-               label=int(y[i]))
-
-for src, dst in zip(edge_index[0], edge_index[1]):
-    G.add_edge(int(src), int(dst))
-
-print(f"Reddit 5k: {G.number_of_nodes()} nós, {G.number_of_edges()} arestas")
-grau_medio = sum(dict(G.degree()).values()) / G.number_of_nodes()
-print(f"Grau médio: {grau_medio:.2f}")
-
-nx.write_graphml(G, os.path.join(saida_dir, 'reddit_5k.graphml'))
-
-with open(os.path.join(saida_dir, 'reddit_5k_arestas.csv'), 'w', encoding='utf-8') as f:
-    f.write("source,target\n")
-    for u, v in G.edges():
-        f.write(f"{u},{v}\n")
-
-subG = G.subgraph(list(G.nodes)[:300])
-plt.figure(figsize=(10, 10))
-nx.draw(subG, node_size=10, node_color='orange', edge_color='gray', with_labels=False)
-plt.title("Subgrafo Reddit (300 nós)")
-plt.tight_layout()
-plt.savefig(os.path.join(saida_dir, 'reddit_5k_subgrafo.png'))
-plt.close()
-
-with open(os.path.join(saida_dir, 'reddit_5k_resumo.txt'), 'w', encoding='utf-8') as f:
-    f.write("Resumo do grafo Reddit 5k\n\n")
-    f.write(f"Nós: {G.number_of_nodes()}\n")
-    f.write(f"Arestas: {G.number_of_edges()}\n")
-    f.write(f"Grau médio: {grau_medio:.2f}\n")
-    f.write(f"Labels (classes únicas): {len(np.unique(y))}\n")
+
+SRC_DIR = os.path.abspath(os.path.dirname(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from graph.grafo_binario import carregar_grafo_binario, carregar_extra
+from graph.grafo_csr import arestas_csr, salvar_edges_csv
+from real.reddit import pasta_subgrafo
+import renderizacao
+
+
+def processar(grafo_dir, graphml=False, desenhar=True):
+    """
+    Resumo, lista de arestas e figura de um subgrafo extraído por real/reddit.py.
+    As features ficam só em features.npy; o GraphML (opcional) leva apenas
+    topologia e label.
+    """
+    A, _ = carregar_grafo_binario(grafo_dir)
+    y = carregar_extra(grafo_dir, 'labels')
+    n_nodes = A.shape[0]
+    i, j, _ = arestas_csr(A)
+
+    print(f"Reddit: {n_nodes} nós, {len(i)} arestas")
+    grau_medio = A.nnz / n_nodes
+    print(f"Grau médio: {grau_medio:.2f}")
+
+    if graphml:
+        G = nx.from_scipy_sparse_array(A)
+        nx.set_node_attributes(G, dict(enumerate(y.tolist())), 'label')
+        nx.write_graphml(G, os.path.join(grafo_dir, 'grafo.graphml'))
+
+    salvar_edges_csv(os.path.join(grafo_dir, 'arestas.csv'), i, j, np.ones(len(i)))
+
+    if desenhar:
+        k = min(300, n_nodes)
+        sub = A[:k][:, :k]
+        pos_dict = nx.spring_layout(nx.from_scipy_sparse_array(sub), seed=42)
+        pos = np.array([pos_dict[v] for v in range(k)])
+        si, sj, _ = arestas_csr(sub)
+        renderizacao.agendar(renderizacao.figura_grafo, os.path.join(grafo_dir, 'subgrafo.png'),
+                             pos, si, sj, tamanho_no=10, largura=1.0, alpha=0.6,
+                             titulo=f"Subgrafo Reddit ({k} nós)", figsize=(10, 10))
+
+    with open(os.path.join(grafo_dir, 'resumo.txt'), 'w', encoding='utf-8') as f:
+        f.write("Resumo do grafo Reddit\n\n")
+        f.write(f"Nós: {n_nodes}\n")
+        f.write(f"Arestas: {len(i)}\n")
+        f.write(f"Grau médio: {grau_medio:.2f}\n")
+        f.write(f"Labels (classes únicas): {len(np.unique(y))}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumo/arestas/figura de um subgrafo Reddit binário")
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--selecao", default="estratificada")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--grafo-dir", default=None, help="Pasta do subgrafo (padrão: derivada de --n/--selecao/--seed)")
+    parser.add_argument("--graphml", action="store_true", help="Também grava GraphML (topologia + label)")
+    parser.add_argument("--sem-desenhar", action="store_true")
+    args = parser.parse_args()
+
+    grafo_dir = args.grafo_dir or pasta_subgrafo(args.n, args.selecao, args.seed)
+    processar(grafo_dir, graphml=args.graphml, desenhar=not args.sem_desenhar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Amostragem de subgrafos sobre adjacência CSR (grafos reais grandes).
+
+Cada estratégia recebe (indptr, indices, alvo, rng) e devolve os índices
+dos nós amostrados na ordem em que foram descobertos (no máximo `alvo`);
+`amostrar` aplica a estratégia e devolve o subgrafo induzido já renumerado.
+Quando a componente em exploração se esgota antes do alvo, todas as
+estratégias recomeçam de um nó ainda não visitado.
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def _vizinhos(indptr, indices, nos):
+    """Concatenação das listas de adjacência de `nos` e a origem de cada entrada."""
+    inicio = indptr[nos]
+    graus = indptr[nos + 1] - inicio
+    total = int(graus.sum())
+    if total == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio.copy()
+    deslocamento = np.repeat(inicio - np.cumsum(graus) + graus, graus)
+    pos = deslocamento + np.arange(total)
+    return indices[pos].astype(np.int64), np.repeat(np.arange(len(nos)), graus)
+
+
+def _unicos_em_ordem(arr):
+    """np.unique preservando a ordem da primeira ocorrência."""
+    _, primeiro = np.unique(arr, return_index=True)
+    return arr[np.sort(primeiro)]
+
+
+class _Reinicios:
+    """Nós em ordem aleatória, percorridos uma vez, para recomeçar a amostragem."""
+
+    def __init__(self, n, rng):
+        self.ordem = rng.permutation(n)
+        self.pos = 0
+
+    def proximo(self, visitado):
+        while visitado[self.ordem[self.pos]]:
+            self.pos += 1
+        return int(self.ordem[self.pos])
+
+    def varios(self, visitado, k):
+        """Até k nós distintos não visitados; o cursor passa de todos eles."""
+        livres = np.flatnonzero(~visitado[self.ordem[self.pos:]])[:k]
+        if len(livres) == 0:
+            return livres
+        escolhidos = self.ordem[self.pos + livres]
+        self.pos += int(livres[-1]) + 1
+        return escolhidos
+
+
+def amostra_bfs(indptr, indices, alvo, rng, sementes=1):
+    """
+    Busca em largura, nível a nível (fronteira inteira expandida de uma vez).
+    Com `sementes > 1`, as buscas partem de vários nós ao mesmo tempo
+    (amostragem multi-semente: cobre regiões distintas do grafo).
+    """
+    n = len(indptr) - 1
+    alvo = min(alvo, n)
+    visitado = np.zeros(n, dtype=bool)
+    reinicios = _Reinicios(n, rng)
+    fronteira = reinicios.ordem[:min(sementes, alvo)].copy()
+    visitado[fronteira] = True
+    ordem = [fronteira]
+    total = len(fronteira)
+    while total < alvo:
+        viz, _ = _vizinhos(indptr, indices, fronteira)
+        novos = _unicos_em_ordem(viz[~visitado[viz]])
+        if len(novos) == 0:
+            novos = np.array([reinicios.proximo(visitado)])
+        novos = novos[:alvo - total]
+        visitado[novos] = True
+        ordem.append(novos)
+        total += len(novos)
+        fronteira = novos
+    return np.concatenate(ordem)[:alvo]
+
+
+def amostra_dfs(indptr, indices, alvo, rng):
+    """Passeio em profundidade com pilha (a amostragem original do RoadNet)."""
+    n = len(indptr) - 1
+    alvo = min(alvo, n)
+    visitado = np.zeros(n, dtype=bool)
+    reinicios = _Reinicios(n, rng)
+    amostra = []
+    pilha = [reinicios.proximo(visitado)]
+    while len(amostra) < alvo:
+        if not pilha:
+            pilha.append(reinicios.proximo(visitado))
+        atual = pilha.pop()
+        if not visitado[atual]:
+            visitado[atual] = True
+            amostra.append(atual)
+            pilha.extend(indices[indptr[atual]:indptr[atual + 1]].tolist())
+    return np.array(amostra, dtype=np.int64)
+
+
+def amostra_random_walk(indptr, indices, alvo, rng, caminhantes=None, p_retorno=0.0,
+                        max_passos_sem_novo=100):
+    """
+    Passeios aleatórios simultâneos (um passo vetorizado para todos os
+    caminhantes; padrão: um por 2000 nós do alvo, no mínimo 64), cada um
+    voltando ao próprio ponto de partida com probabilidade `p_retorno`.
+    Se nenhum nó novo aparece em `max_passos_sem_novo` passos, os
+    caminhantes saltam para nós não visitados.
+    """
+    n = len(indptr) - 1
+    alvo = min(alvo, n)
+    caminhantes = min(caminhantes or max(64, alvo // 2000), n)
+    graus = np.diff(indptr)
+    visitado = np.zeros(n, dtype=bool)
+    reinicios = _Reinicios(n, rng)
+    partida = reinicios.ordem[:caminhantes].copy()
+    atual = partida.copy()
+    ordem = []
+    total = 0
+    sem_novo = 0
+    while True:
+        novos = _unicos_em_ordem(atual[~visitado[atual]])
+        if len(novos):
+            novos = novos[:alvo - total]
+            visitado[novos] = True
+            ordem.append(novos)
+            total += len(novos)
+            sem_novo = 0
+        else:
+            sem_novo += 1
+        if total >= alvo:
+            break
+        if sem_novo >= max_passos_sem_novo:
+            partida = reinicios.varios(visitado, caminhantes)
+            atual = partida.copy()
+            sem_novo = 0
+            continue
+
+        g = graus[atual]
+        passo = indptr[atual] + (rng.random(len(atual)) * np.maximum(g, 1)).astype(np.int64)
+        proximo = np.where(g > 0, indices[np.minimum(passo, len(indices) - 1)], partida)
+        retorna = rng.random(len(atual)) < p_retorno
+        atual = np.where(retorna, partida, proximo)
+    return np.concatenate(ordem)[:alvo]
+
+
+def amostra_forest_fire(indptr, indices, alvo, rng, p_queima=0.7, focos=None):
+    """
+    Forest fire (Leskovec & Faloutsos, 2006), versão não direcionada: cada
+    nó em chamas queima Geom(1 - p_queima) - 1 vizinhos ainda não
+    queimados (média p/(1-p)), escolhidos ao acaso; o fogo avança frente a
+    frente e, quando se apaga, reacende em `focos` nós novos (padrão: um
+    por 20000 nós do alvo).
+    """
+    n = len(indptr) - 1
+    alvo = min(alvo, n)
+    focos = focos or max(1, alvo // 20000)
+    visitado = np.zeros(n, dtype=bool)
+    reinicios = _Reinicios(n, rng)
+    fronteira = reinicios.ordem[:min(focos, alvo)].copy()
+    visitado[fronteira] = True
+    ordem = [fronteira]
+    total = len(fronteira)
+    while total < alvo:
+        viz, origem = _vizinhos(indptr, indices, fronteira)
+        livre = ~visitado[viz]
+        viz, origem = viz[livre], origem[livre]
+        novos = np.empty(0, dtype=np.int64)
+        if len(viz):
+            # ordem aleatória dentro de cada nó de origem; fica com as x primeiras
+            cota = rng.geometric(1 - p_queima, size=len(fronteira)) - 1
+            perm = np.lexsort((rng.random(len(viz)), origem))
+            viz, origem = viz[perm], origem[perm]
+            inicio_grupo = np.r_[0, np.flatnonzero(np.diff(origem)) + 1]
+            rank = np.arange(len(viz)) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, len(viz)]))
+            novos = _unicos_em_ordem(viz[rank < cota[origem]])
+        if len(novos) == 0:
+            novos = []
+            for _ in range(min(focos, alvo - total)):
+                novos.append(reinicios.proximo(visitado))
+                visitado[novos[-1]] = True
+            novos = np.array(novos)
+        novos = novos[:alvo - total]
+        visitado[novos] = True
+        ordem.append(novos)
+        total += len(novos)
+        fronteira = novos
+    return np.concatenate(ordem)[:alvo]
+
+
+def amostra_multi_semente(indptr, indices, alvo, rng, sementes=32):
+    """BFS simultânea a partir de `sementes` nós sorteados."""
+    return amostra_bfs(indptr, indices, alvo, rng, sementes=sementes)
+
+
+ESTRATEGIAS = {
+    'bfs': amostra_bfs,
+    'dfs': amostra_dfs,
+    'random_walk': amostra_random_walk,
+    'forest_fire': amostra_forest_fire,
+    'multi_semente': amostra_multi_semente,
+}
+
+
+def subgrafo_induzido(A, nos):
+    """Subgrafo induzido por `nos`, com o nó nos[k] renumerado para k."""
+    sub = csr_matrix(A)[nos][:, nos]
+    sub.sort_indices()
+    return sub
+
+
+def amostrar(A, alvo, estrategia='bfs', seed=42, **opcoes):
+    """
+    Amostra `alvo` nós de A com a estratégia pedida.
+    Retorna (A_sub, nos): subgrafo induzido renumerado 0..alvo-1 e o índice
+    em A de cada nó do subgrafo.
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"estratégia desconhecida: {estrategia}")
+    rng = np.random.default_rng(seed)
+    indptr = np.asarray(A.indptr, dtype=np.int64)
+    indices = np.asarray(A.indices)
+    nos = ESTRATEGIAS[estrategia](indptr, indices, alvo, rng, **opcoes)
+    return subgrafo_induzido(A, nos), nos
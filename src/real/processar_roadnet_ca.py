@@ -1,101 +1,234 @@
 import os
+import sys
 import gzip
+import argparse
+import warnings
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
 from datetime import datetime
-from matplotlib.colors import Normalize
-from matplotlib import cm
-
-def carregar_roadnet_arquivo(caminho):
-    G = nx.Graph()
-    with gzip.open(caminho, 'rt') as f:
-        for linha in f:
-            if linha.startswith('#'):
-                continue
-            u, v = map(int, linha.strip().split())
-            G.add_edge(u, v)
-    return G
-
-def amostrar_subgrafo(G, num_nos=10000, seed=42):
-    print(f"[INFO] Amostrando {num_nos} nós conectados...")
-    np.random.seed(seed)
-    nos_amostrados = set()
-    fila = [np.random.choice(list(G.nodes))]
-    while len(nos_amostrados) < num_nos and fila:
-        atual = fila.pop()
-        if atual not in nos_amostrados:
-            nos_amostrados.add(atual)
-            fila.extend(G.neighbors(atual))
-    subG = G.subgraph(nos_amostrados).copy()
-    print(f"[OK] Subgrafo com {subG.number_of_nodes()} nós e {subG.number_of_edges()} arestas")
-    return subG
-
-def atribuir_atributos(G, seed=42):
-    np.random.seed(seed)
+from scipy.sparse.csgraph import shortest_path
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from graph.grafo_csr import montar_csr, arestas_csr, csr_para_networkx
+from graph.grafo_binario import (
+    salvar_grafo_binario, existe_grafo_binario, carregar_grafo_binario, carregar_extra, pasta_binaria,
+)
+from real.amostragem import ESTRATEGIAS, amostrar
+import renderizacao
+
+# Bytes descomprimidos lidos por vez do .txt.gz
+TAMANHO_BLOCO = 64 * 1024 * 1024
+# Acima disto o spring_layout (quadrático) dá lugar ao Pivot MDS
+LIMITE_SPRING = 20000
+
+def _converter_bloco(bloco):
+    """Linhas 'u<TAB>v' completas -> array int64 achatado (u0, v0, u1, v1, ...)."""
+    # comentários SNAP ficam no cabeçalho; só um '#' fora dele força o filtro linha a linha
+    while bloco.startswith(b'#'):
+        bloco = bloco[bloco.find(b'\n') + 1:] if b'\n' in bloco else b''
+    if b'#' in bloco:
+        bloco = b'\n'.join(l for l in bloco.split(b'\n') if not l.startswith(b'#'))
+    with warnings.catch_warnings():
+        # conforme a versão do NumPy, texto inválido gera DeprecationWarning ou ValueError
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            valores = np.fromstring(bloco, dtype=np.int64, sep=' ')
+        except (DeprecationWarning, ValueError) as e:
+            raise ValueError(f"linha inválida na lista de arestas: {e}") from None
+    if len(valores) % 2:
+        raise ValueError("lista de arestas com número ímpar de ids")
+    return valores
+
+
+def ler_arestas_gzip(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê a lista de arestas SNAP (.txt.gz) em blocos grandes, cortando cada
+    bloco na última quebra de linha. Retorna array (m, 2) int64 com os ids originais.
+    """
+    partes = []
+    resto = b''
+    with gzip.open(caminho, 'rb') as f:
+        while True:
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                break
+            bloco = resto + bloco
+            corte = bloco.rfind(b'\n') + 1
+            resto = bloco[corte:]
+            partes.append(_converter_bloco(bloco[:corte]))
+    if resto.strip():
+        partes.append(_converter_bloco(resto))
+    return np.concatenate(partes).reshape(-1, 2) if partes else np.empty((0, 2), dtype=np.int64)
+
+
+def pasta_cache(caminho):
+    """Pasta do cache binário ao lado do arquivo: roadNet-CA.txt.gz -> roadNet-CA/."""
+    nome = os.path.basename(caminho)
+    for ext in ('.gz', '.txt'):
+        if nome.endswith(ext):
+            nome = nome[:-len(ext)]
+    return os.path.join(os.path.dirname(caminho), nome)
+
+
+def carregar_roadnet_csr(caminho, usar_cache=True, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Grafo completo do RoadNet como (A, ids): adjacência CSR simétrica sem
+    laços nem arestas repetidas (pesos 1), com os nós renumerados 0..n-1, e
+    ids[k] = id SNAP original do nó k. A primeira leitura grava o cache no
+    formato binário (graph/grafo_binario.py, extra `ids`) ao lado do .txt.gz;
+    as seguintes só abrem os .npy com mmap.
+    """
+    cache = pasta_cache(caminho)
+    if usar_cache and existe_grafo_binario(cache):
+        if os.path.getmtime(os.path.join(pasta_binaria(cache), "indptr.npy")) >= os.path.getmtime(caminho):
+            print(f"[INFO] Usando cache binário em {cache}")
+            A, _ = carregar_grafo_binario(cache)
+            return A, carregar_extra(cache, "ids")
+
+    pares = ler_arestas_gzip(caminho, tamanho_bloco)
+    ids, compactos = np.unique(pares, return_inverse=True)
+    compactos = compactos.reshape(-1, 2)
+    n = len(ids)
+
+    # o arquivo lista cada aresta nos dois sentidos: fica uma cópia i < j
+    i = compactos.min(axis=1)
+    j = compactos.max(axis=1)
+    sem_laco = i != j
+    chaves = np.sort(i[sem_laco] * n + j[sem_laco])
+    chaves = chaves[np.r_[True, chaves[1:] != chaves[:-1]]]
+    i = (chaves // n).astype(np.int32)
+    j = (chaves % n).astype(np.int32)
+    A = montar_csr(n, i, j, np.ones(len(i), dtype=np.float32))
+
+    if usar_cache:
+        salvar_grafo_binario(cache, A, ids=ids)
+    return A, ids
+
+
+def layout_pivot_mds(A, pivos=50, seed=42):
+    """
+    Posições 2D para grafos grandes (Pivot MDS, Brandes & Pich 2006): BFS a
+    partir de `pivos` nós escolhidos por max-min, centragem dupla da matriz
+    n × pivos de distâncias ao quadrado e os 2 primeiros vetores singulares.
+    Custo O(pivos · arestas), sem matriz n × n. Saída em [-1, 1] como o spring_layout.
+    """
+    n = A.shape[0]
+    rng = np.random.default_rng(seed)
+    pivos = min(pivos, n)
+    escolhidos = [int(rng.integers(n))]
+    D = np.empty((n, pivos))
+    for k in range(pivos):
+        D[:, k] = shortest_path(A, indices=escolhidos[k], unweighted=True, directed=False)
+        if k + 1 < pivos:
+            minimo = np.min(np.where(np.isinf(D[:, :k + 1]), -1, D[:, :k + 1]), axis=1)
+            minimo[escolhidos] = -1
+            escolhidos.append(int(np.argmax(minimo)))
+    # nós de outras componentes: distância finita "logo além" da maior
+    finito = np.isfinite(D)
+    D[~finito] = D[finito].max() + 1 if finito.any() else 1
+    D2 = D ** 2
+    C = -0.5 * (D2 - D2.mean(axis=0) - D2.mean(axis=1, keepdims=True) + D2.mean())
+    U, S, _ = np.linalg.svd(C, full_matrices=False)
+    pos = U[:, :2] * S[:2]
+    pos -= pos.mean(axis=0)
+    escala = np.abs(pos).max()
+    return pos / escala if escala > 0 else pos
+
+
+def atribuir_atributos(A, seed=42, layout=None):
+    """
+    Tabela de estados (x, y, vel, theta, bat) dos nós do subgrafo CSR:
+    posição por spring_layout (networkx, até LIMITE_SPRING nós) ou Pivot MDS,
+    vel = log(grau + 1) × 10, theta e bat sorteados.
+    """
     print("[INFO] Atribuindo atributos aos nós...")
-
-    pos = nx.spring_layout(G, seed=seed, k=0.15)
-
-    for n in G.nodes:
-        grau = G.degree[n]
-        G.nodes[n]['x'], G.nodes[n]['y'] = pos[n]
-        G.nodes[n]['vel'] = np.log(grau + 1) * 10
-        G.nodes[n]['theta'] = np.random.uniform(0, 2*np.pi)
-        G.nodes[n]['bat'] = np.random.uniform(20, 100)
-
-    return G
-
-def salvar_grafo(G, pasta_saida):
+    n = A.shape[0]
+    if layout is None:
+        layout = 'spring' if n <= LIMITE_SPRING else 'pivot_mds'
+    if layout == 'spring':
+        pos = nx.spring_layout(nx.from_scipy_sparse_array(A), seed=seed, k=0.15)
+        xy = np.array([pos[k] for k in range(n)])
+    elif layout == 'pivot_mds':
+        xy = layout_pivot_mds(A, seed=seed)
+    else:
+        raise ValueError(f"layout desconhecido: {layout}")
+
+    rng = np.random.default_rng(seed)
+    grau = np.diff(A.indptr)
+    estados = np.empty((n, 5))
+    estados[:, :2] = xy
+    estados[:, 2] = np.log(grau + 1) * 10
+    estados[:, 3] = rng.uniform(0, 2 * np.pi, n)
+    estados[:, 4] = rng.uniform(20, 100, n)
+    return estados
+
+
+def ponderar_por_distancia(A, estados):
+    """Mesma estrutura de A, pesos = distância euclidiana entre as posições."""
+    i, j, _ = arestas_csr(A)
+    dist = np.sqrt(np.sum((estados[i, :2] - estados[j, :2]) ** 2, axis=1))
+    return montar_csr(A.shape[0], i, j, dist)
+
+
+def salvar_grafo(A, estados, ids, pasta_saida, graphml=True, desenhar=True):
+    """
+    Grava o subgrafo (A com pesos = distância) na pasta: artefato binário,
+    edges.csv e stats.txt sempre; GraphML e figura quando pedidos (exigem
+    montar o networkx do subgrafo).
+    """
     os.makedirs(pasta_saida, exist_ok=True)
 
-    # Salvar como .graphml
-    nx.write_graphml(G, os.path.join(pasta_saida, "grafo.graphml"))
-
-    # Salvar CSV de arestas com pesos (distância euclidiana)
-    with open(os.path.join(pasta_saida, "edges.csv"), "w") as f:
-        f.write("source,target,weight\n")
-        for u, v in G.edges():
-            d = np.linalg.norm([
-                G.nodes[u]['x'] - G.nodes[v]['x'],
-                G.nodes[u]['y'] - G.nodes[v]['y']
-            ])
-            f.write(f"{u},{v},{d:.4f}\n")
+    # Salvar artefato binário (CSR + estados, abre com mmap)
+    salvar_grafo_binario(pasta_saida, A, estados, ids=ids)
+
+    # Salvar CSV de arestas com pesos (distância euclidiana), com os ids SNAP
+    i, j, d = arestas_csr(A)
+    np.savetxt(os.path.join(pasta_saida, "edges.csv"), np.column_stack((ids[i], ids[j], d)),
+               fmt=("%d", "%d", "%.4f"), delimiter=",", header="source,target,weight", comments="")
 
     # Estatísticas
-    graus = [G.degree[n] for n in G.nodes]
+    graus = np.diff(A.indptr)
     with open(os.path.join(pasta_saida, "stats.txt"), "w") as f:
-        f.write(f"n_nodes: {G.number_of_nodes()}\n")
-        f.write(f"n_edges: {G.number_of_edges()}\n")
+        f.write(f"n_nodes: {A.shape[0]}\n")
+        f.write(f"n_edges: {len(i)}\n")
         f.write(f"avg_degree: {np.mean(graus):.2f}\n")
         f.write(f"min_degree: {np.min(graus)}\n")
         f.write(f"max_degree: {np.max(graus)}\n")
         f.write(f"Data: {datetime.now()}\n")
 
+    # Salvar como .graphml
+    if graphml:
+        G = nx.relabel_nodes(csr_para_networkx(A, estados), dict(enumerate(ids.tolist())))
+        nx.write_graphml(G, os.path.join(pasta_saida, "grafo.graphml"))
+
     # Visualização por velocidade
-    norm = Normalize(vmin=min(nx.get_node_attributes(G, "vel").values()),
-                     vmax=max(nx.get_node_attributes(G, "vel").values()))
-    cmap = cm.viridis
-    node_colors = [cmap(norm(G.nodes[n]["vel"])) for n in G.nodes]
-    pos_plot = {n: (G.nodes[n]['x'], G.nodes[n]['y']) for n in G.nodes}
-
-    fig, ax = plt.subplots(figsize=(10, 8))
-    nx.draw(G, pos_plot, node_color=node_colors, node_size=5, edge_color="gray", alpha=0.3, width=0.1, ax=ax)
-    sm = cm.ScalarMappable(norm=norm, cmap=cmap)
-    sm.set_array([])
-    fig.colorbar(sm, ax=ax, label="Velocidade (log(grau+1) × 10)")
-    ax.set_title("RoadNet-CA (subgrafo) com velocidade estimada")
-    plt.tight_layout()
-    plt.savefig(os.path.join(pasta_saida, "grafo_velocidade.png"), dpi=300)
-    plt.close()
+    if desenhar:
+        renderizacao.agendar(renderizacao.figura_grafo, os.path.join(pasta_saida, "grafo_velocidade.png"),
+                             estados[:, :2], i, j, cores=estados[:, 2], largura=0.1, alpha=0.3,
+                             titulo="RoadNet-CA (subgrafo) com velocidade estimada",
+                             rotulo_barra="Velocidade (log(grau+1) × 10)", figsize=(10, 8))
 
     print(f"[OK] Grafo salvo em {pasta_saida}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Amostra um subgrafo do RoadNet-CA e atribui estados de robôs")
+    parser.add_argument("--num-nos", type=int, default=10000)
+    parser.add_argument("--estrategia", choices=sorted(ESTRATEGIAS), default="dfs",
+                        help="Amostragem sobre a CSR do grafo completo")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--layout", choices=["spring", "pivot_mds"], default=None,
+                        help=f"Posições dos nós (padrão: spring até {LIMITE_SPRING} nós)")
+    parser.add_argument("--saida", default=os.path.join("data", "grafo", "roadnet_ca"))
+    parser.add_argument("--sem-graphml", action="store_true")
+    parser.add_argument("--sem-desenhar", action="store_true")
+    args = parser.parse_args()
+
     nome_arquivo = "roadNet-CA.txt.gz"
     caminho_dados = os.path.join("data", "externo")
     caminho_arquivo = os.path.join(caminho_dados, nome_arquivo)
-    pasta_saida = os.path.join("data", "grafo", "roadnet_ca")
 
     os.makedirs(caminho_dados, exist_ok=True)
 
@@ -105,12 +238,17 @@ def main():
         return
 
     print("[INFO] Carregando grafo completo...")
-    G = carregar_roadnet_arquivo(caminho_arquivo)
-    print(f"[INFO] Grafo original: {G.number_of_nodes()} nós e {G.number_of_edges()} arestas")
+    A, ids = carregar_roadnet_csr(caminho_arquivo)
+    print(f"[INFO] Grafo original: {A.shape[0]} nós e {A.nnz // 2} arestas")
+
+    print(f"[INFO] Amostrando {args.num_nos} nós ({args.estrategia})...")
+    A_sub, nos = amostrar(A, args.num_nos, args.estrategia, seed=args.seed)
+    print(f"[OK] Subgrafo com {A_sub.shape[0]} nós e {A_sub.nnz // 2} arestas")
 
-    G = amostrar_subgrafo(G, num_nos=10000, seed=42)
-    G = atribuir_atributos(G, seed=42)
-    salvar_grafo(G, pasta_saida)
+    estados = atribuir_atributos(A_sub, seed=args.seed, layout=args.layout)
+    A_sub = ponderar_por_distancia(A_sub, estados)
+    salvar_grafo(A_sub, estados, np.asarray(ids)[nos], args.saida,
+                 graphml=not args.sem_graphml, desenhar=not args.sem_desenhar)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,261 @@
+"""
+Extração de subgrafos do Reddit (reddit_data.npz / reddit_graph.npz) sem
+carregar os arquivos inteiros.
+
+Os membros .npy dos .npz gravados sem compressão (np.savez) são abertos
+com np.memmap direto no offset do zip; membros comprimidos (savez_compressed,
+sp.save_npz) são lidos em blocos, descomprimindo em fluxo. Só as linhas
+selecionadas das features são materializadas, e as arestas são filtradas
+bloco a bloco.
+
+Saída no formato binário de graph/grafo_binario.py: adjacência CSR
+simétrica (pesos 1) mais os extras features.npy, labels.npy, node_ids.npy
+e nos.npy (índice de cada nó no grafo completo).
+"""
+import os
+import sys
+import struct
+import argparse
+import zipfile
+import numpy as np
+from numpy.lib import format as npy_format
+from numpy.lib.format import open_memmap
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from graph.grafo_csr import montar_csr
+from graph.grafo_binario import salvar_grafo_binario, pasta_binaria
+
+base_dir = os.path.abspath(os.path.join(SRC_DIR, '..'))
+raw_dir = os.path.join(base_dir, 'data', 'Reddit', 'raw')
+processed_dir = os.path.join(base_dir, 'data', 'Reddit', 'processed')
+
+SELECOES = ('estratificada', 'aleatoria', 'prefixo')
+# Elementos lidos por vez de um membro (arestas ou linhas de features)
+TAMANHO_BLOCO = 8 * 1024 * 1024
+
+
+# =====================================================
+# Leitura de membros .npy dentro de .npz
+# =====================================================
+def _cabecalho_npy(f):
+    """(shape, fortran_order, dtype) do cabeçalho .npy no início de `f`."""
+    versao = npy_format.read_magic(f)
+    if versao == (1, 0):
+        return npy_format.read_array_header_1_0(f)
+    return npy_format.read_array_header_2_0(f)
+
+
+def info_membro(caminho, nome):
+    """
+    (shape, dtype, offset) do membro `nome` do .npz; offset é a posição dos
+    dados no arquivo se o membro estiver sem compressão, senão None.
+    """
+    with zipfile.ZipFile(caminho) as zf:
+        info = zf.getinfo(nome + '.npy')
+        with zf.open(info) as f:
+            shape, fortran, dtype = _cabecalho_npy(f)
+            tam_cabecalho = f.tell()
+    if fortran and len(shape) > 1:
+        raise ValueError(f"{nome}: arrays em ordem Fortran não são suportados")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return shape, dtype, None
+    with open(caminho, 'rb') as f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+    tam_nome, tam_extra = struct.unpack('<HH', local[26:30])
+    return shape, dtype, info.header_offset + 30 + tam_nome + tam_extra + tam_cabecalho
+
+
+def abrir_membro(caminho, nome):
+    """Memmap somente leitura do membro, ou None se ele estiver comprimido."""
+    shape, dtype, offset = info_membro(caminho, nome)
+    if offset is None:
+        return None
+    return np.memmap(caminho, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+
+def iterar_blocos(caminho, nome, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Percorre o membro ao longo do eixo 0 em blocos de ~tamanho_bloco
+    elementos; gera (inicio, bloco). Usa o memmap quando possível.
+    """
+    shape, dtype, offset = info_membro(caminho, nome)
+    por_linha = int(np.prod(shape[1:], dtype=np.int64))
+    linhas = max(1, tamanho_bloco // max(por_linha, 1))
+    if offset is not None:
+        arr = np.memmap(caminho, dtype=dtype, mode='r', offset=offset, shape=shape)
+        for ini in range(0, shape[0], linhas):
+            yield ini, np.asarray(arr[ini:ini + linhas])
+        return
+    with zipfile.ZipFile(caminho) as zf, zf.open(nome + '.npy') as f:
+        _cabecalho_npy(f)
+        for ini in range(0, shape[0], linhas):
+            k = min(linhas, shape[0] - ini)
+            dados = f.read(k * por_linha * dtype.itemsize)
+            yield ini, np.frombuffer(dados, dtype=dtype).reshape((k,) + tuple(shape[1:]))
+
+
+def ler_linhas(caminho, nome, linhas, tamanho_bloco=TAMANHO_BLOCO, saida=None):
+    """Linhas `linhas` (crescentes) do membro, sem materializar o resto."""
+    shape, dtype, _ = info_membro(caminho, nome)
+    if saida is None:
+        saida = np.empty((len(linhas),) + tuple(shape[1:]), dtype=dtype)
+    arr = abrir_membro(caminho, nome)
+    if arr is not None:
+        # em blocos de linhas para limitar a memória temporária
+        passo = max(1, tamanho_bloco // max(int(np.prod(shape[1:], dtype=np.int64)), 1))
+        for k in range(0, len(linhas), passo):
+            saida[k:k + passo] = arr[linhas[k:k + passo]]
+        return saida
+    pos = 0
+    for ini, bloco in iterar_blocos(caminho, nome, tamanho_bloco):
+        fim = np.searchsorted(linhas, ini + len(bloco))
+        saida[pos:fim] = bloco[linhas[pos:fim] - ini]
+        pos = fim
+    return saida
+
+
+# =====================================================
+# Seleção de nós e filtragem de arestas
+# =====================================================
+def selecionar_nos(rotulos, n, selecao='estratificada', seed=42):
+    """
+    Índices (crescentes) de `n` nós do grafo completo:
+      - 'estratificada': cada classe com a mesma proporção do grafo completo
+        (alocação pelos maiores restos), nós sorteados dentro da classe;
+      - 'aleatoria': sorteio uniforme sem reposição;
+      - 'prefixo': os n primeiros (o recorte original do reddit_5k).
+    """
+    total = len(rotulos)
+    if n >= total:
+        return np.arange(total)
+    rng = np.random.default_rng(seed)
+    if selecao == 'prefixo':
+        return np.arange(n)
+    if selecao == 'aleatoria':
+        return np.sort(rng.choice(total, size=n, replace=False))
+    if selecao != 'estratificada':
+        raise ValueError(f"seleção desconhecida: {selecao}")
+
+    classes, inversos, contagens = np.unique(rotulos, return_inverse=True, return_counts=True)
+    cota_exata = contagens * (n / total)
+    cotas = np.floor(cota_exata).astype(np.int64)
+    faltam = n - cotas.sum()
+    cotas[np.argsort(cotas - cota_exata, kind='stable')[:faltam]] += 1
+    # nós agrupados por classe, em ordem aleatória dentro de cada grupo
+    ordem = np.lexsort((rng.random(total), inversos))
+    inicio = np.r_[0, np.cumsum(contagens)[:-1]]
+    escolhidos = [ordem[a:a + c] for a, c in zip(inicio, cotas)]
+    return np.sort(np.concatenate(escolhidos))
+
+
+def filtrar_arestas(caminho_grafo, nos, total, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Arestas do subgrafo induzido por `nos`, renumeradas 0..len(nos)-1, como
+    pares (i, j) com i < j sem repetição nem laços. Lê row/col em blocos.
+    """
+    mapa = np.full(total, -1, dtype=np.int64)
+    mapa[nos] = np.arange(len(nos))
+    blocos_col = iterar_blocos(caminho_grafo, 'col', tamanho_bloco)
+    chaves = []
+    n = len(nos)
+    for (_, row), (_, col) in zip(iterar_blocos(caminho_grafo, 'row', tamanho_bloco), blocos_col):
+        r = mapa[row]
+        c = mapa[col]
+        manter = (r >= 0) & (c >= 0) & (r != c)
+        r, c = r[manter], c[manter]
+        chaves.append(np.minimum(r, c) * n + np.maximum(r, c))
+    chaves = np.sort(np.concatenate(chaves)) if chaves else np.empty(0, dtype=np.int64)
+    chaves = chaves[np.r_[True, chaves[1:] != chaves[:-1]]] if len(chaves) else chaves
+    return (chaves // n).astype(np.int32), (chaves % n).astype(np.int32)
+
+
+# =====================================================
+# Amostras de features (sem grafo)
+# =====================================================
+def normalizar_linhas(X):
+    """
+    Mesma transformação do NormalizeFeatures do PyG, aplicada só à amostra:
+    desloca para mínimo 0 e divide cada linha pela sua soma (mínimo 1).
+    """
+    X = X - X.min()
+    X /= np.maximum(X.sum(axis=1, keepdims=True), 1)
+    return X
+
+
+def carregar_amostra(n, selecao='estratificada', seed=42, entrada_dir=raw_dir, normalizar=True,
+                     tamanho_bloco=TAMANHO_BLOCO):
+    """
+    (X, y, nos) de `n` nós do Reddit: lê dos .npz só os rótulos e as linhas
+    selecionadas das features (float64, normalizadas se pedido).
+    """
+    caminho_dados = os.path.join(entrada_dir, 'reddit_data.npz')
+    rotulos = abrir_membro(caminho_dados, 'label')
+    if rotulos is None:
+        with np.load(caminho_dados) as dados:
+            rotulos = dados['label']
+    nos = selecionar_nos(rotulos, n, selecao, seed)
+    X = ler_linhas(caminho_dados, 'feature', nos, tamanho_bloco).astype(np.float64)
+    if normalizar:
+        X = normalizar_linhas(X)
+    return X, np.asarray(rotulos[nos]), nos
+
+
+# =====================================================
+# Extração
+# =====================================================
+def pasta_subgrafo(n, selecao, seed, saida_root=processed_dir):
+    return os.path.join(saida_root, f"reddit_{n}_{selecao}_seed{seed}")
+
+
+def extrair_subgrafo(n, selecao='estratificada', seed=42, entrada_dir=raw_dir,
+                     saida_root=processed_dir, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Extrai `n` nós (todos, se n >= total) do Reddit e grava o subgrafo no
+    formato binário. Retorna a pasta do subgrafo.
+    """
+    caminho_dados = os.path.join(entrada_dir, 'reddit_data.npz')
+    caminho_grafo = os.path.join(entrada_dir, 'reddit_graph.npz')
+
+    with np.load(caminho_dados) as dados:
+        rotulos = dados['label']
+        ids = dados['node_ids']
+    total = len(rotulos)
+    n = min(n, total)
+    nos = selecionar_nos(rotulos, n, selecao, seed)
+    i, j = filtrar_arestas(caminho_grafo, nos, total, tamanho_bloco)
+    A = montar_csr(n, i, j, np.ones(len(i), dtype=np.float32))
+
+    pasta = pasta_subgrafo(n, selecao, seed, saida_root)
+    salvar_grafo_binario(pasta, A, labels=rotulos[nos], node_ids=ids[nos], nos=nos)
+    shape, dtype, _ = info_membro(caminho_dados, 'feature')
+    features = open_memmap(os.path.join(pasta_binaria(pasta), 'features.npy'), mode='w+',
+                           dtype=dtype, shape=(n,) + tuple(shape[1:]))
+    ler_linhas(caminho_dados, 'feature', nos, tamanho_bloco, saida=features)
+    features.flush()
+    del features
+
+    print(f"[reddit] {n} nós ({selecao}), {len(i)} arestas -> {pasta}")
+    return pasta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrai subgrafos do Reddit em formato binário (CSR + features)")
+    parser.add_argument("--n", type=int, nargs="+", default=[5000],
+                        help="Tamanhos dos subgrafos (0 = grafo completo)")
+    parser.add_argument("--selecao", choices=SELECOES, default="estratificada")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--entrada", default=raw_dir, help="Pasta com reddit_data.npz e reddit_graph.npz")
+    parser.add_argument("--saida", default=processed_dir)
+    args = parser.parse_args()
+
+    for n in args.n:
+        extrair_subgrafo(n or np.iinfo(np.int64).max, args.selecao, args.seed,
+                         entrada_dir=args.entrada, saida_root=args.saida)
+
+
+if __name__ == "__main__":
+    main()
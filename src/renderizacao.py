@@ -0,0 +1,230 @@
+"""
+Camada de renderização das figuras do pipeline (`pipeline.py --plots`).
+
+Modos:
+  - 'none': nenhuma figura é gerada;
+  - 'fast': arestas rasterizadas em uma imagem de densidade com NumPy
+    (custo linear no número de arestas, independente de dpi), dpi 100;
+  - 'full': arestas como uma única LineCollection vetorizada, dpi 300.
+Nunca se monta um nx.Graph para desenhar: as funções recebem posições e
+arrays de arestas (i, j).
+
+Com `configurar(..., fundo=True)` as figuras são enviadas a um processo
+worker (criado só no primeiro `agendar`, então comandos que não desenham
+nada não abrem processo) e a etapa seguinte do pipeline começa na hora;
+`aguardar()` espera as pendentes (o pipeline chama ao encerrar). Sem configuração (scripts
+rodados diretamente), o modo é 'full' e tudo roda no próprio processo.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MODOS = ('none', 'fast', 'full')
+DPI = {'fast': 100, 'full': 300}
+# Arestas por bloco em rasterizar_arestas (limita os temporários por aresta/pixel)
+BLOCO_ARESTAS = 1 << 18
+
+_MODO = 'full'
+_FUNDO = False
+_POOL = None
+_PENDENTES = []
+
+
+def configurar(modo='full', fundo=False):
+    global _MODO, _FUNDO
+    if modo not in MODOS:
+        raise ValueError(f"modo de plots desconhecido: {modo}")
+    _MODO = modo
+    _FUNDO = fundo
+
+
+def modo_atual():
+    return _MODO
+
+
+def ativo():
+    return _MODO != 'none'
+
+
+def _iniciar_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def agendar(funcao, *args, **kwargs):
+    """
+    Executa `funcao(*args, **kwargs)` (uma das figura_* deste módulo, ou
+    outra função de módulo) no worker de fundo, se houver, ou aqui mesmo.
+    No modo 'none' não faz nada. O modo atual é repassado como `modo=`.
+    """
+    global _POOL
+    if not ativo():
+        return None
+    kwargs.setdefault('modo', _MODO)
+    if not _FUNDO:
+        return funcao(*args, **kwargs)
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=1, initializer=_iniciar_worker)
+    fut = _POOL.submit(funcao, *args, **kwargs)
+    _PENDENTES.append(fut)
+    return fut
+
+
+def aguardar():
+    """Espera as figuras pendentes e encerra o worker; propaga erros de renderização."""
+    global _POOL
+    try:
+        for fut in _PENDENTES:
+            fut.result()
+    finally:
+        _PENDENTES.clear()
+        if _POOL is not None:
+            _POOL.shutdown()
+            _POOL = None
+
+
+# =====================================================
+# Primitivas
+# =====================================================
+def segmentos(pos, i, j):
+    """Array (m, 2, 2) com os extremos de cada aresta, para LineCollection."""
+    return np.stack((pos[i, :2], pos[j, :2]), axis=1)
+
+
+def rasterizar_arestas(pos, i, j, resolucao=1000, extent=None, bloco=BLOCO_ARESTAS):
+    """
+    Densidade de arestas em uma grade resolucao × resolucao: cada aresta é
+    amostrada em ~1 ponto por pixel ao longo do segmento e os pontos são
+    acumulados com bincount. As arestas são processadas em blocos de
+    `bloco`, somados na mesma imagem, então a memória temporária não cresce
+    com o total de arestas. Retorna (imagem[linha=y, coluna=x], extent).
+    """
+    pos = np.asarray(pos, dtype=np.float64)
+    i, j = np.asarray(i), np.asarray(j)
+    if extent is None:
+        (x0, y0), (x1, y1) = pos[:, :2].min(axis=0), pos[:, :2].max(axis=0)
+        extent = (x0, x1 if x1 > x0 else x0 + 1, y0, y1 if y1 > y0 else y0 + 1)
+    x0, x1, y0, y1 = extent
+    escala = np.array([(resolucao - 1) / (x1 - x0), (resolucao - 1) / (y1 - y0)])
+
+    imagem = np.zeros(resolucao * resolucao, dtype=np.int64)
+    for k in range(0, len(i), bloco):
+        a = (pos[i[k:k + bloco], :2] - (x0, y0)) * escala
+        b = (pos[j[k:k + bloco], :2] - (x0, y0)) * escala
+        passos = np.ceil(np.abs(b - a).max(axis=1)).astype(np.int64) + 1
+        aresta = np.repeat(np.arange(len(a)), passos)
+        inicio = np.cumsum(passos) - passos
+        t = (np.arange(passos.sum()) - np.repeat(inicio, passos)) / np.maximum(np.repeat(passos, passos) - 1, 1)
+        pts = a[aresta] + (b[aresta] - a[aresta]) * t[:, None]
+        px = np.clip(np.rint(pts).astype(np.int64), 0, resolucao - 1)
+        imagem += np.bincount(px[:, 1] * resolucao + px[:, 0], minlength=resolucao * resolucao)
+    return imagem.reshape(resolucao, resolucao).astype(np.float64), extent
+
+
+def _desenhar_arestas(ax, pos, i, j, modo, cor='gray', largura=0.2, alpha=0.4):
+    if len(i) == 0:
+        return
+    if modo == 'fast':
+        img, extent = rasterizar_arestas(pos, i, j)
+        ax.imshow(np.log1p(img), origin='lower', extent=extent, cmap='Greys',
+                  alpha=0.8, aspect='auto', interpolation='nearest')
+    else:
+        from matplotlib.collections import LineCollection
+        ax.add_collection(LineCollection(segmentos(pos, i, j), colors=cor,
+                                         linewidths=largura, alpha=alpha))
+
+
+# =====================================================
+# Figuras
+# =====================================================
+def figura_grafo(caminho, pos, i, j, cores=None, cmap='viridis', titulo=None,
+                 rotulo_barra=None, tamanho_no=5, largura=0.2, alpha=0.4,
+                 figsize=(8, 6), modo='full'):
+    """
+    Nós em `pos` (coloridos por `cores`, se dado) sobre as arestas (i, j).
+    `rotulo_barra` adiciona a barra de cores.
+    """
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=figsize)
+    _desenhar_arestas(ax, pos, i, j, modo, largura=largura, alpha=alpha)
+    sc = ax.scatter(pos[:, 0], pos[:, 1], s=tamanho_no, c=cores if cores is not None else 'tab:blue',
+                    cmap=cmap if cores is not None else None, linewidths=0,
+                    rasterized=modo == 'fast', zorder=2)
+    ax.autoscale()
+    ax.set_axis_off()
+    if rotulo_barra and cores is not None:
+        fig.colorbar(sc, ax=ax, label=rotulo_barra)
+    if titulo:
+        ax.set_title(titulo)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=DPI[modo])
+    plt.close(fig)
+
+
+def figura_dispersao(caminho, x, y, cores, cmap='tab10', titulo=None, rotulo_barra=None,
+                     xlabel='Posição X', ylabel='Posição Y', tamanho=30, figsize=(8, 6), modo='full'):
+    """Dispersão simples (ex.: rótulos de cluster no plano)."""
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=figsize)
+    sc = ax.scatter(x, y, c=cores, cmap=cmap, s=tamanho, rasterized=modo == 'fast')
+    if rotulo_barra:
+        fig.colorbar(sc, ax=ax, label=rotulo_barra)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if titulo:
+        ax.set_title(titulo)
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=DPI[modo])
+    plt.close(fig)
+
+
+def figura_heatmap_arestas(caminho, pos, i, j, bins=150, titulo="Heatmap de densidade de arestas",
+                           modo='full'):
+    """Histograma 2D dos pontos médios das arestas."""
+    import matplotlib.pyplot as plt
+    meio = (pos[i, :2] + pos[j, :2]) / 2
+    h, xe, ye = np.histogram2d(meio[:, 0], meio[:, 1], bins=bins)
+    fig, ax = plt.subplots(figsize=(6, 6))
+    im = ax.imshow(h.T, origin='lower', extent=(xe[0], xe[-1], ye[0], ye[-1]),
+                   cmap='hot', aspect='auto', interpolation='nearest')
+    fig.colorbar(im, ax=ax, label="contagem de arestas")
+    ax.set_title(titulo)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=DPI[modo])
+    plt.close(fig)
+
+
+def figura_histograma(caminho, valores, bins=30, xlabel=None, ylabel=None, titulo=None,
+                      cor=None, figsize=(6, 4), modo='full'):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.hist(valores, bins=bins, edgecolor="black", color=cor)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    if titulo:
+        ax.set_title(titulo)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=DPI[modo])
+    plt.close(fig)
+
+
+def figura_imagem(caminho, imagem, cmap='inferno', titulo=None, rotulo_barra=None,
+                  xlabel=None, ylabel=None, figsize=(6, 6), modo='full'):
+    """Matriz 2D como imagem (origem embaixo), ex.: campo de densidade."""
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=figsize)
+    im = ax.imshow(imagem, origin='lower', cmap=cmap, interpolation='nearest')
+    if rotulo_barra:
+        fig.colorbar(im, ax=ax, label=rotulo_barra)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    if titulo:
+        ax.set_title(titulo)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=DPI[modo])
+    plt.close(fig)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+
+# Mesmo preâmbulo dos scripts: raiz (config.py, tools/) e src/ no sys.path
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for caminho in (ROOT_DIR, os.path.join(ROOT_DIR, 'src')):
+    if caminho not in sys.path:
+        sys.path.insert(0, caminho)
+
+
+def estados_aleatorios(n, lado, seed):
+    """Estados (x, y, velocidade, direção, bateria) uniformes num quadrado lado×lado."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.random(n) * lado, rng.random(n) * lado, rng.random(n) * 30,
+                            rng.random(n) * 2 * np.pi, rng.random(n)])
+
+
+def instancia(n, lado, raio, seed):
+    """Estados aleatórios e sua adjacência ε-ball em CSR."""
+    from scipy.spatial import KDTree
+    from graph.grafo_csr import pares_epsilon, montar_csr
+    estados = estados_aleatorios(n, lado, seed)
+    i, j, dist = pares_epsilon(KDTree(estados[:, :2]), estados[:, :2], raio)
+    return estados, montar_csr(n, i, j, dist)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+import real.amostragem as amostragem
+from conftest import instancia
+from real.amostragem import ESTRATEGIAS, amostra_random_walk, amostrar
+
+
+def pares_isolados(k):
+    """2k nós em k componentes de uma aresta (força recomeços a todo momento)."""
+    i = np.arange(0, 2 * k, 2)
+    A = csr_matrix((np.ones(2 * k), (np.r_[i, i + 1], np.r_[i + 1, i])), shape=(2 * k, 2 * k))
+    return A
+
+
+def test_random_walk_recomeca_em_nos_distintos(monkeypatch):
+    recomecos = []
+    original = amostragem._Reinicios.varios
+
+    def varios(self, visitado, k):
+        nos = original(self, visitado, k)
+        recomecos.append((nos, visitado[nos].copy()))
+        return nos
+
+    monkeypatch.setattr(amostragem._Reinicios, 'varios', varios)
+    A = pares_isolados(500)
+    nos = amostra_random_walk(A.indptr.astype(np.int64), A.indices, 800, np.random.default_rng(0),
+                              caminhantes=16, max_passos_sem_novo=2)
+    assert len(nos) == 800 and len(np.unique(nos)) == 800
+    assert recomecos
+    for novos, ja_visitados in recomecos:
+        assert len(novos) == len(np.unique(novos))
+        assert not ja_visitados.any()
+    assert max(len(novos) for novos, _ in recomecos) == 16
+
+
+@pytest.mark.parametrize("estrategia", sorted(ESTRATEGIAS))
+def test_amostra_e_subgrafo_induzido_simetrico(estrategia):
+    # raio pequeno: vários componentes, então as estratégias precisam recomeçar
+    _, A = instancia(1000, 400, 15, 2)
+    sub, nos = amostrar(A, 300, estrategia, seed=1)
+    assert len(nos) == 300 and len(np.unique(nos)) == 300
+    assert nos.min() >= 0 and nos.max() < A.shape[0]
+    assert sub.shape == (300, 300)
+    assert (sub != sub.T).nnz == 0
+    np.testing.assert_array_equal(sub.toarray(), A.toarray()[np.ix_(nos, nos)])
+    _, de_novo = amostrar(A, 300, estrategia, seed=1)
+    np.testing.assert_array_equal(nos, de_novo)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.metrics import adjusted_rand_score, mutual_info_score, normalized_mutual_info_score
+
+import avaliacao
+from avaliacao import Particoes, comparar, matriz_comparacoes
+
+
+def vi_sklearn(a, b):
+    return (mutual_info_score(a, a) + mutual_info_score(b, b) - 2 * mutual_info_score(a, b))
+
+
+def rotulos_aleatorios(rng, n):
+    # k = 1 e k = n cobrem os casos degenerados; k grande força o caminho sort da contingência
+    k = rng.choice([1, 2, 5, 40, 300, n])
+    return rng.integers(0, k, n) * 7 - 3
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_comparar_igual_sklearn(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(10):
+        a, b = rotulos_aleatorios(rng, 500), rotulos_aleatorios(rng, 500)
+        nmi, ari, vi = comparar(a, b)
+        assert nmi == pytest.approx(normalized_mutual_info_score(a, b), abs=1e-9)
+        assert ari == pytest.approx(adjusted_rand_score(a, b), abs=1e-9)
+        assert vi == pytest.approx(vi_sklearn(a, b), abs=1e-9)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matrizes_iguais_comparar(monkeypatch, workers):
+    monkeypatch.setattr(avaliacao, 'PARES_POR_TAREFA', 4)
+    rng = np.random.default_rng(9)
+    rotulos = {f'p{x}': rotulos_aleatorios(rng, 300) for x in range(6)}
+    rotulos['outro_n'] = rng.integers(0, 3, 200)
+    particoes = Particoes.carregar(rotulos)
+    matrizes = matriz_comparacoes(particoes, workers=workers)
+    nomes = list(rotulos)
+    for x, y in particoes.pares():
+        esperado = comparar(rotulos[nomes[x]], rotulos[nomes[y]])
+        for m, v in zip(avaliacao.MEDIDAS, esperado):
+            assert matrizes[m][x, y] == pytest.approx(v)
+    assert np.isnan(matrizes['nmi'][0, nomes.index('outro_n')])
@@ -0,0 +1,49 @@
+import numpy as np
+
+from consensus.consenso import CoocorrenciaIncremental, hash_particao, nome_rodada
+
+
+def contagens_densas(rotulos):
+    C = sum((r[:, None] == r[None, :]).astype(np.int64) for r in rotulos)
+    return np.triu(C, k=1)
+
+
+def test_contagens_incrementais_iguais_densas(tmp_path):
+    rng = np.random.default_rng(0)
+    rotulos = [rng.integers(0, k, 300) for k in (3, 7, 20, 50, 7)]
+    co = CoocorrenciaIncremental(300)
+    for r in rotulos[:3]:
+        co.adicionar(r, hash_particao(r))
+    # lê C no meio para consolidar e continua somando
+    assert co.C.nnz > 0
+    for r in rotulos[3:]:
+        co.adicionar(r, hash_particao(r))
+    np.testing.assert_array_equal(co.C.toarray(), contagens_densas(rotulos))
+
+    caminho = tmp_path / 'estado.npz'
+    co.salvar(caminho)
+    lido = CoocorrenciaIncremental.carregar(caminho)
+    np.testing.assert_array_equal(lido.C.toarray(), contagens_densas(rotulos))
+    assert lido.rodadas == co.rodadas
+
+
+def test_hash_ignora_numeracao_dos_clusters():
+    r = np.array([0, 0, 1, 2, 1, 2])
+    assert hash_particao(r) == hash_particao(np.array([5, 5, 3, 9, 3, 9]))
+    assert hash_particao(r) != hash_particao(np.array([0, 1, 1, 2, 1, 2]))
+
+
+def test_arquivos_iguais_contam_separado(tmp_path):
+    r = np.array([0, 0, 1, 1, 2])
+    a, b = tmp_path / 'kmeans_s1.npy', tmp_path / 'kmeans_s2.npy'
+    np.save(a, r)
+    np.save(b, r)
+    co = CoocorrenciaIncremental(5)
+    assert co.adicionar(np.load(a), nome_rodada(a, np.load(a)))
+    assert co.adicionar(np.load(b), nome_rodada(b, np.load(b)))
+    # o mesmo arquivo, sem mudança, não conta de novo; com outro conteúdo, conta
+    assert not co.adicionar(np.load(a), nome_rodada(a, np.load(a)))
+    np.save(a, np.array([0, 1, 1, 1, 2]))
+    assert co.adicionar(np.load(a), nome_rodada(a, np.load(a)))
+    assert co.m == 3
+    assert co.C[0, 1] == 2
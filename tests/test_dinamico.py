@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from scipy.spatial import KDTree
+
+from conftest import estados_aleatorios
+from graph.grafo_csr import pares_epsilon
+from graph.dinamico import GrafoDinamico, GulosoIncremental
+from heuristics.guloso_fo1 import guloso_clusterizacao_csr
+
+
+def particao(rotulos):
+    return {frozenset(np.flatnonzero(rotulos == c).tolist()) for c in np.unique(rotulos)}
+
+
+@pytest.mark.parametrize("folga,lado", [(None, None), (0.0, None), (15.0, 400.0)])
+def test_incremental_igual_reconstrucao(folga, lado):
+    n = 600
+    estados = estados_aleatorios(n, 400, 7)
+    grafo = GrafoDinamico(estados, 30, dt=0.5, folga=folga, lado=lado)
+    guloso = GulosoIncremental(grafo)
+    for _ in range(40):
+        adicionadas, removidas, _ = grafo.avancar()
+        guloso.reparar(adicionadas, removidas)
+
+    pos = grafo.estados[:, :2]
+    i, j, _ = pares_epsilon(KDTree(pos), pos, 30)
+    np.testing.assert_array_equal(grafo.chaves(), np.sort(i.astype(np.int64) * n + j))
+    esperado = [set() for _ in range(n)]
+    for u, v in zip(i.tolist(), j.tolist()):
+        esperado[u].add(v)
+        esperado[v].add(u)
+    assert grafo.adj == esperado
+
+    A = grafo.matriz()
+    refeito = guloso_clusterizacao_csr(A.indptr, A.indices, grafo.estados[:, 2])
+    assert particao(guloso.rotulos) == particao(refeito)
+    assert len(guloso.membros) == len(np.unique(refeito))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scipy.spatial import KDTree
+
+from conftest import estados_aleatorios
+import graph.grafo_ladrilhos as grafo_ladrilhos
+from graph.grafo_binario import carregar_grafo_binario
+from graph.grafo_csr import pares_epsilon, montar_csr
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ladrilhos_igual_montar_csr(tmp_path, monkeypatch, workers):
+    # blocos pequenos para exercitar as passadas em blocos da mesclagem
+    monkeypatch.setattr(grafo_ladrilhos, 'TAMANHO_BLOCO', 1000)
+    n = 3000
+    estados = estados_aleatorios(n, 600, 3)
+    caminho = tmp_path / 'robos.npy'
+    np.save(caminho, estados)
+
+    _, arestas, ladrilhos = grafo_ladrilhos.construir_grafo_ladrilhos(
+        str(caminho), str(tmp_path), 20.0, lado_ladrilho=60.0, workers=workers)
+    assert ladrilhos.total == 100
+
+    i, j, dist = pares_epsilon(KDTree(estados[:, :2]), estados[:, :2], 20.0)
+    esperado = montar_csr(n, i, j, dist)
+    obtido, estados_lidos = carregar_grafo_binario(str(tmp_path))
+    assert arestas == len(i)
+    np.testing.assert_array_equal(obtido.indptr, esperado.indptr)
+    np.testing.assert_array_equal(obtido.indices, esperado.indices)
+    np.testing.assert_allclose(obtido.data, esperado.data)
+    np.testing.assert_array_equal(estados_lidos, estados)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from conftest import instancia
+from graph.grafo_csr import csr_para_networkx
+from heuristics.guloso_fo1 import (
+    guloso_clusterizacao, calcular_fo1, guloso_clusterizacao_csr, calcular_fo1_rotulos,
+)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_csr_igual_networkx(seed):
+    estados, A = instancia(400, 300, 30, seed)
+    G = csr_para_networkx(A, estados)
+    clusters = guloso_clusterizacao(G)
+    rotulos = guloso_clusterizacao_csr(A.indptr, A.indices, estados[:, 2])
+
+    esperado = {frozenset(c) for c in clusters}
+    obtido = {frozenset(np.flatnonzero(rotulos == c).tolist()) for c in np.unique(rotulos)}
+    assert obtido == esperado
+    assert calcular_fo1_rotulos(rotulos, estados[:, 2]) == pytest.approx(calcular_fo1(G, clusters))
+
+
+def test_fo1_vazio():
+    assert calcular_fo1_rotulos(np.empty(0, dtype=np.int64), np.empty(0)) == 0.0
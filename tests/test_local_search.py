@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from conftest import instancia
+from config import DELTA_V
+from heuristics.guloso_fo1 import guloso_clusterizacao_csr, calcular_fo1_rotulos
+from heuristics.local_search import ParticaoFO1, busca_local
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fo1_incremental_igual_recalculo(seed):
+    estados, A = instancia(400, 300, 30, seed)
+    vel = estados[:, 2]
+    part = ParticaoFO1(A.indptr, A.indices, vel, guloso_clusterizacao_csr(A.indptr, A.indices, vel))
+    aplicados = 0
+    for _ in range(3):
+        for u in np.random.default_rng(seed).permutation(len(vel)).tolist():
+            delta, tipo, alvo, _ = part.melhor_vizinho(u)
+            if tipo == 'mover':
+                part.mover(u, alvo, delta)
+            elif tipo == 'trocar':
+                part.trocar(u, alvo, delta)
+            else:
+                continue
+            aplicados += 1
+    assert aplicados > 0
+    assert part.fo1 == pytest.approx(calcular_fo1_rotulos(part.rotulos, vel))
+
+
+def test_busca_local_respeita_delta_v():
+    estados, A = instancia(400, 300, 30, 3)
+    vel = estados[:, 2]
+    inicial = guloso_clusterizacao_csr(A.indptr, A.indices, vel)
+    rotulos, fo1, stats = busca_local(A.indptr, A.indices, vel, inicial, tempo_max=None)
+    assert fo1 >= stats['fo1_inicial'] - 1e-9
+    faixa = np.array([np.ptp(vel[rotulos == c]) for c in np.unique(rotulos)])
+    assert (faixa <= DELTA_V + 1e-9).all()
+
+
+def test_heaps_limitados_por_n():
+    estados, A = instancia(400, 300, 30, 4)
+    vel = estados[:, 2]
+    part = ParticaoFO1(A.indptr, A.indices, vel, guloso_clusterizacao_csr(A.indptr, A.indices, vel))
+    rng = np.random.default_rng(4)
+    n = len(vel)
+    aplicados = 0
+    # aceita qualquer movimento válido (como uma cadeia de SA quente)
+    for u in rng.integers(0, n, 20000).tolist():
+        viz = A.indices[A.indptr[u]:A.indptr[u + 1]]
+        if len(viz) == 0:
+            continue
+        b = part.rotulos[viz[rng.integers(len(viz))]]
+        if b == part.rotulos[u]:
+            continue
+        delta = part.delta_mover(u, b)
+        if delta is not None:
+            part.mover(u, b, delta)
+            aplicados += 1
+    assert aplicados > n
+    assert sum(map(len, part.heap_min)) <= 2 * n
+    assert sum(map(len, part.heap_max)) <= 2 * n
+    assert part.fo1 == pytest.approx(calcular_fo1_rotulos(part.rotulos, vel))
+    for c in np.unique(part.rotulos).tolist():
+        assert part.vmin(c) == vel[part.rotulos == c].min()
+        assert part.vmax(c) == vel[part.rotulos == c].max()
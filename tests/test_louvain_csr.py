@@ -0,0 +1,32 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import cluster_baselines.louvain_csr as louvain_csr_mod
+from cluster_baselines.louvain_csr import louvain_csr
+from conftest import instancia
+
+community = pytest.importorskip("community")
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_modularidade_igual_python_louvain(seed):
+    _, A = instancia(800, 300, 30, seed)
+    rotulos, q, niveis = louvain_csr(A)
+    G = nx.from_scipy_sparse_array(A)
+    assert niveis >= 1
+    # mesma modularidade calculada pelo python-louvain para os nossos rótulos
+    assert q == pytest.approx(community.modularity(dict(enumerate(rotulos.tolist())), G), abs=1e-9)
+    # e qualidade comparável à do python-louvain
+    referencia = community.modularity(community.best_partition(G, random_state=seed), G)
+    assert q >= referencia - 0.01
+
+
+def test_paralelo_igual_serial(monkeypatch):
+    # força os níveis pequenos a passarem pelo pool de workers
+    monkeypatch.setattr(louvain_csr_mod, 'MIN_NOS_PARALELO', 0)
+    _, A = instancia(1500, 400, 30, 5)
+    serial, q_serial, _ = louvain_csr(A, workers=1)
+    paralelo, q_paralelo, _ = louvain_csr(A, workers=2)
+    np.testing.assert_array_equal(serial, paralelo)
+    assert q_paralelo == pytest.approx(q_serial)
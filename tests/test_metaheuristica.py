@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from conftest import instancia
+from config import SEED
+from heuristics.guloso_fo1 import guloso_clusterizacao_csr
+from heuristics.metaheuristica import multi_start_sa, recozimento_simulado
+
+
+def test_cadeias_paralelas_iguais_serial():
+    estados, A = instancia(400, 300, 30, 6)
+    vel = estados[:, 2]
+    inicial = guloso_clusterizacao_csr(A.indptr, A.indices, vel)
+    opcoes = dict(n_cadeias=3, seed=SEED, tempo_max=600.0, max_iter=3000)
+
+    rot1, fo1_1, res1 = multi_start_sa(A.indptr, A.indices, vel, inicial, workers=1, **opcoes)
+    rot2, fo1_2, res2 = multi_start_sa(A.indptr, A.indices, vel, inicial, workers=2, **opcoes)
+    np.testing.assert_array_equal(rot1, rot2)
+    assert fo1_1 == fo1_2
+
+    # cada cadeia do pool = a mesma cadeia rodada no processo, com a semente derivada
+    sementes = np.random.SeedSequence(SEED).spawn(3)
+    for semente, r1, r2 in zip(sementes, res1, res2):
+        rot, fo1, it = recozimento_simulado(A.indptr, A.indices, vel, inicial,
+                                            np.random.default_rng(semente),
+                                            tempo_max=600.0, max_iter=3000)
+        assert it == r1[2] == r2[2] == 3000
+        np.testing.assert_array_equal(rot, r1[0])
+        np.testing.assert_array_equal(rot, r2[0])
+        assert fo1 == pytest.approx(r1[1]) and fo1 == pytest.approx(r2[1])
@@ -0,0 +1,13 @@
+import numpy as np
+
+from renderizacao import rasterizar_arestas
+
+
+def test_rasterizacao_em_blocos_igual_bloco_unico():
+    rng = np.random.default_rng(0)
+    pos = rng.random((2000, 2)) * 500
+    i, j = rng.integers(0, 2000, 5000), rng.integers(0, 2000, 5000)
+    inteira, extent = rasterizar_arestas(pos, i, j, resolucao=200, bloco=len(i))
+    blocos, extent_blocos = rasterizar_arestas(pos, i, j, resolucao=200, bloco=777)
+    assert extent == extent_blocos
+    np.testing.assert_array_equal(inteira, blocos)